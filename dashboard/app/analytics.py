@@ -0,0 +1,88 @@
+'''In-process DuckDB for slicing data the dashboard has already pulled from MotherDuck'''
+import threading
+import logging
+from typing import Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+OTHER_LABEL = "Other"
+
+class LocalAnalytics:
+    """
+    In-memory DuckDB holding copies of loaded DataFrames as tables.
+
+    Each dataset is copied in once per data version, so filter changes query
+    local columnar tables instead of round-tripping through the MotherDuck client.
+    Queries run on their own cursor, which keeps concurrent sessions thread safe.
+    """
+    def __init__(self):
+        self._conn = duckdb.connect(":memory:")
+        self._lock = threading.Lock()
+        self._versions: dict[str, str] = {}
+
+    def version(self, name: str) -> Optional[str]:
+        return self._versions.get(name)
+
+    def register(self, name: str, df: pd.DataFrame, version: str) -> None:
+        """Materialise df as table `name` unless this version is already loaded."""
+        if self._versions.get(name) == version:
+            return
+        with self._lock:
+            if self._versions.get(name) == version:
+                return
+            cursor = self._conn.cursor()
+            try:
+                cursor.register("incoming_df", df)
+                cursor.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM incoming_df")
+                cursor.unregister("incoming_df")
+            finally:
+                cursor.close()
+            self._versions[name] = version
+            log.info(f"Registered {name} ({len(df)} rows) at version {version}")
+
+    def query(self, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+
+def top_n_with_other(df: pd.DataFrame, item_col: str, value_col: str, n: int,
+                     group_cols: Sequence[str] = (), other_label: str = OTHER_LABEL) -> pd.DataFrame:
+    """
+    Keep the n largest items per group and fold the rest into one "Other (k)" row per group.
+
+    Done with vectorised group-bys so chart payloads stay small however wide the date range is.
+    Returns group_cols, item_col and value_col only, sorted by group then value descending.
+    """
+    group_cols = list(group_cols)
+    keys = group_cols + [item_col]
+    totals = (
+        df.groupby(keys, as_index=False, sort=False)[value_col].sum()
+        .sort_values(group_cols + [value_col], ascending=[True] * len(group_cols) + [False], kind="stable")
+    )
+    if group_cols:
+        rank = totals.groupby(group_cols, sort=False).cumcount()
+    else:
+        rank = pd.Series(range(len(totals)), index=totals.index)
+    folded = rank >= n
+    if not folded.any():
+        return totals.reset_index(drop=True)
+
+    rest = totals[folded]
+    if group_cols:
+        other = rest.groupby(group_cols, as_index=False, sort=False).agg(
+            **{value_col: (value_col, "sum"), "folded": (item_col, "size")}
+        )
+    else:
+        other = pd.DataFrame({value_col: [rest[value_col].sum()], "folded": [len(rest)]})
+    other[item_col] = other_label + " (" + other["folded"].astype(str) + ")"
+
+    return (
+        pd.concat([totals[~folded], other[keys + [value_col]]], ignore_index=True)
+        .sort_values(group_cols + [value_col], ascending=[True] * len(group_cols) + [False], kind="stable")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,163 @@
+'''Plotly figure builders shared by the dashboard pages'''
+import plotly.graph_objects as go
+import plotly.express as px
+import pandas as pd
+
+CHART_HEIGHT_TREND = 400
+CHART_HEIGHT_DONUT = 400
+CHART_HEIGHT_TREEMAP = 600
+CHART_HEIGHT_BARS = 300
+CHART_HEIGHT_FRESHNESS = 250
+COLOR_SCHEME = px.colors.sequential.Viridis_r
+
+def create_trend_chart(trend_df: pd.DataFrame) -> go.Figure:
+    """Create 6-month spending trend line chart."""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=trend_df['year_month'],
+        y=trend_df['monthly_total'],
+        mode='lines+markers',
+        name='Actual Spending',
+        line=dict(color='#440154', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{x}</b><br>£%{y:,.0f}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title='6-Month Spending Trend',
+        xaxis_title='Month',
+        yaxis_title='Amount (£)',
+        height=CHART_HEIGHT_TREND,
+        hovermode='x unified',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig
+
+def create_donut_chart(category_totals: pd.DataFrame) -> go.Figure:
+    """Create donut chart for spending by category."""
+    total_spending_calc = category_totals['total_amount'].sum()
+    
+    fig = px.pie(
+        category_totals,
+        names='spending_category',
+        values='total_amount',
+        color_discrete_sequence=COLOR_SCHEME,
+        hole=0.5
+    )
+    
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>£%{value:,.0f}<extra></extra>'
+    )
+    
+    fig.add_annotation(
+        text=f'£{total_spending_calc:,.0f}',
+        x=0.5, y=0.52,
+        font_size=20,
+        font_weight='bold',
+        showarrow=False
+    )
+    
+    fig.add_annotation(
+        text='Total',
+        x=0.5, y=0.45,
+        font_size=12,
+        font_color='gray',
+        showarrow=False
+    )
+    
+    fig.update_layout(
+        height=CHART_HEIGHT_DONUT,
+        showlegend=False,
+        margin=dict(t=0, b=0, l=0, r=0)
+    )
+    
+    return fig
+
+def create_top_stores_chart(top_locations: pd.DataFrame) -> go.Figure:
+    """Create horizontal bar chart for top 5 stores."""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        y=top_locations['spent_at'],
+        x=top_locations['total_amount'],
+        orientation='h',
+        marker=dict(
+            color=top_locations['total_amount'],
+            colorscale=COLOR_SCHEME,
+            showscale=False
+        ),
+        text=[f"£{val:,.0f}" for val in top_locations['total_amount']],
+        textposition='inside',
+        hovertemplate='<b>%{y}</b><br>£%{x:,.0f}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        height=CHART_HEIGHT_BARS,
+        margin=dict(t=0, b=0, l=0, r=0),
+        xaxis_title=None,
+        yaxis_title=None,
+        showlegend=False,
+        xaxis=dict(showticklabels=False, showgrid=False),
+        yaxis=dict(autorange="reversed")
+    )
+    
+    return fig
+
+def create_treemap(filtered_df: pd.DataFrame) -> go.Figure:
+    """Create treemap for detailed spending breakdown."""
+    fig = px.treemap(
+        filtered_df,
+        path=['spending_category', 'spent_at'],
+        values='total_amount',
+        color='total_amount',
+        color_continuous_scale=COLOR_SCHEME,
+    )
+    
+    fig.update_traces(
+        textinfo='label+value+percent parent',
+        hovertemplate='<b>%{label}</b><br>Amount: £%{value:,.2f}<br>%{percentParent:.1%}<extra></extra>',
+        texttemplate='<b>%{label}</b><br>£%{value:,.0f}<br>%{percentParent:.1%}'
+    )
+    
+    fig.update_layout(
+        height=CHART_HEIGHT_TREEMAP,
+        coloraxis_showscale=False
+    )
+    
+    return fig
+
+def create_freshness_chart(history_df: pd.DataFrame) -> go.Figure:
+    """Create end-to-end freshness trend, p50 and p90 minutes from webhook event to dashboard."""
+    end_to_end = history_df[history_df['stage'] == 'event_to_served']
+    fig = go.Figure()
+    
+    for column, name, color in (('p50_s', 'p50', '#440154'), ('p90_s', 'p90', '#21918c')):
+        fig.add_trace(go.Scatter(
+            x=end_to_end['computed_at'],
+            y=end_to_end[column] / 60,
+            mode='lines+markers',
+            name=name,
+            line=dict(color=color, width=2),
+            hovertemplate=f'<b>%{{x}}</b><br>{name}: %{{y:,.1f}} min<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        height=CHART_HEIGHT_FRESHNESS,
+        margin=dict(t=30, b=0, l=0, r=0),
+        xaxis_title=None,
+        yaxis_title='Minutes',
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    
+    return fig
@@ -1,19 +1,149 @@
 import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence
 import duckdb
+import pandas as pd
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 APP_DIR = Path(__file__).parent
 
 MOTHERDUCK_TOKEN = os.getenv('MD_TOKEN')
 DATABASE = 'b_app'
+# Environment variable pointing at a local b_app.duckdb file, used instead of MotherDuck
+# by benchmarks and offline runs. Read on every connect so a benchmark can switch files.
+LOCAL_DUCKDB_ENV = 'DASHBOARD_DUCKDB_PATH'
+
+# Directory of the local read replica, when set the dashboard reads the replica instead of MotherDuck
+REPLICA_DIR_ENV = 'DASHBOARD_REPLICA_DIR'
+# Tables the dashboard reads, mapped to the key changed rows are upserted on.
+# Tables without a key are copied in full whenever they change.
+REPLICA_TABLES = {
+    'stg.transactions': 'transaction_id',
+    'stg.dim_spaces': 'space_id',
+    'stg.dim_counterparty': 'counterparty_key',
+    'stg.balance': None,
+    'stg.dim_date': None,
+    'ops.freshness_slo': None,
+}
+
+# Trailing window of served webhook events the freshness percentiles are computed over
+FRESHNESS_WINDOW_HOURS = 168
+# Days of freshness history shown on the overview panel
+FRESHNESS_HISTORY_DAYS = 30
+
+POOL_MAX_SIZE = 8
+POOL_IDLE_TIMEOUT = 300
+POOL_ACQUIRE_TIMEOUT = 30
 
 def get_md_connection():
+    local_path = os.getenv(LOCAL_DUCKDB_ENV)
+    if local_path:
+        return duckdb.connect(local_path, read_only=True)
     md_connection = duckdb.connect(f'md:{DATABASE}?motherduck_token={MOTHERDUCK_TOKEN}')
     return md_connection
 
+class ConnectionPool:
+    """
+    Thread-safe pool of DuckDB cursors over one lazily opened connection.
+
+    A DuckDB connection must not be shared between threads, but cursors of the same
+    connection can run in parallel. Every caller checks out its own cursor, at most
+    max_size are open at once, idle cursors are closed after idle_timeout seconds and
+    a reused cursor is health checked before it is handed out.
+    """
+    def __init__(self, connect: Callable[[], duckdb.DuckDBPyConnection] = get_md_connection,
+                 max_size: int = POOL_MAX_SIZE, idle_timeout: float = POOL_IDLE_TIMEOUT,
+                 acquire_timeout: float = POOL_ACQUIRE_TIMEOUT):
+        self._connect = connect
+        self._idle_timeout = idle_timeout
+        self._acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._connection: Optional[duckdb.DuckDBPyConnection] = None
+        self._idle: list[tuple[duckdb.DuckDBPyConnection, float]] = []
+
+    def _root(self) -> duckdb.DuckDBPyConnection:
+        with self._lock:
+            if self._connection is None:
+                log.info("Opening database connection for the pool")
+                self._connection = self._connect()
+            return self._connection
+
+    def _reconnect(self) -> None:
+        with self._lock:
+            for cursor, _ in self._idle:
+                cursor.close()
+            self._idle.clear()
+            if self._connection is not None:
+                try:
+                    self._connection.close()
+                except duckdb.Error:
+                    pass
+            self._connection = None
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self._idle_timeout
+        with self._lock:
+            expired = [cursor for cursor, last_used in self._idle if last_used < cutoff]
+            self._idle = [(cursor, last_used) for cursor, last_used in self._idle if last_used >= cutoff]
+        for cursor in expired:
+            cursor.close()
+        if expired:
+            log.info(f"Closed {len(expired)} idle cursors")
+
+    def _checkout(self) -> duckdb.DuckDBPyConnection:
+        self._evict_idle()
+        with self._lock:
+            cursor = self._idle.pop()[0] if self._idle else None
+        if cursor is not None:
+            try:
+                cursor.execute("SELECT 1").fetchone()
+                return cursor
+            except duckdb.Error as e:
+                log.warning(f"Discarding unhealthy cursor: {e}")
+                cursor.close()
+        try:
+            cursor = self._root().cursor()
+            cursor.execute("SELECT 1").fetchone()
+            return cursor
+        except duckdb.Error as e:
+            log.warning(f"Database connection unhealthy, reconnecting: {e}")
+            self._reconnect()
+            return self._root().cursor()
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Check out a cursor for the duration of the block, waiting for a free slot if the pool is full."""
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            raise TimeoutError(f"No database cursor available after {self._acquire_timeout}s")
+        try:
+            cursor = self._checkout()
+            try:
+                yield cursor
+            except BaseException:
+                # Any failure may leave a query or a result half read on the cursor, never reuse it
+                cursor.close()
+                raise
+            else:
+                with self._lock:
+                    self._idle.append((cursor, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def query(self, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
+        with self.cursor() as cursor:
+            return cursor.execute(sql, params).df()
+
+    def close(self) -> None:
+        self._reconnect()
+
 
 if __name__ == "__main__":
     print("why you calling Constants bro?")
-
@@ -0,0 +1,173 @@
+'''Cached dataset loaders and the prewarmer that fills them before users ask'''
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from app.constants import FRESHNESS_HISTORY_DAYS
+from app.freshness import FreshnessRecorder
+from app.poll import PipelinePoller, get_pipeline_poller
+from app.replica import ReadReplica
+from app.resources import get_connection_pool, get_local_analytics, get_read_replica, get_freshness_recorder
+from app.queries import data_versions_query, available_budget_query, summary_query, freshness_query
+from app.utils.tracing import setup_tracing, tracer
+
+log = logging.getLogger(__name__)
+
+CACHE_TTL = 1800
+# Concurrent dataset queries per load, kept below the connection pool size
+LOADER_THREADS = 4
+
+# ==============================================================================
+# DATA LOADING FUNCTIONS
+# ==============================================================================
+@st.cache_data(ttl=CACHE_TTL, max_entries=4)
+def load_data_versions(pipeline_version: int) -> dict[str, str]:
+    """
+    Load per-dataset versions from the staging table watermarks.
+
+    Keyed on the pipeline version, so the watermark query runs once per completed
+    pipeline run per process rather than on every rerun of every session.
+    """
+    try:
+        return get_connection_pool().query(data_versions_query).iloc[0].to_dict()
+    except Exception as e:
+        log.error(f"Failed to load data versions: {e}")
+        raise
+
+# Loaders are keyed on their dataset version, only datasets whose sources changed are re-queried.
+# There is no TTL, a version can only ever map to one result and max_entries bounds memory.
+@st.cache_data(max_entries=2)
+def load_available_budget(version: str) -> pd.DataFrame:
+    """Load available budget data with caching."""
+    try:
+        return get_connection_pool().query(available_budget_query)
+    except Exception as e:
+        log.error(f"Failed to load available budget: {e}")
+        raise
+
+@st.cache_data(max_entries=2)
+def load_summary_data(version: str) -> pd.DataFrame:
+    """Load main spending summary data with caching."""
+    try:
+        return get_connection_pool().query(summary_query)
+    except Exception as e:
+        log.error(f"Failed to load summary data: {e}")
+        raise
+
+@st.cache_data(max_entries=2)
+def load_freshness(version: str) -> pd.DataFrame:
+    """Load recent freshness percentiles with caching."""
+    try:
+        return get_connection_pool().query(freshness_query, [FRESHNESS_HISTORY_DAYS])
+    except Exception as e:
+        log.error(f"Failed to load freshness percentiles: {e}")
+        raise
+
+# ==============================================================================
+# DATASET REGISTRY
+# ==============================================================================
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    loader: Callable[[str], pd.DataFrame]
+    # Table name in the local analytics engine, for datasets that pages slice further
+    local_table: Optional[str] = None
+
+# Keys match the columns of data_versions_query
+DATASETS = {
+    "available": Dataset("available", load_available_budget),
+    "spending": Dataset("spending", load_summary_data, local_table="summary_df"),
+    "freshness": Dataset("freshness", load_freshness),
+}
+
+def load_datasets(names: Sequence[str], pipeline_version: int) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+    """
+    Load only the named datasets, each from its version keyed cache.
+
+    Independent datasets are loaded concurrently, each query on its own pooled cursor, so a
+    cold load takes as long as the slowest query rather than the sum. Returns the frames and
+    the data version of every dataset, pages key figures on the latter.
+    """
+    data_versions = load_data_versions(pipeline_version)
+    if len(names) == 1:
+        frames = {names[0]: DATASETS[names[0]].loader(data_versions[names[0]])}
+    else:
+        # Loader threads run under the caller's script context so st.cache_data behaves as in
+        # the script thread. They exit with the executor, no context outlives this call.
+        ctx = get_script_run_ctx(suppress_warning=True)
+        initializer = (lambda: add_script_run_ctx(ctx=ctx)) if ctx else None
+        with ThreadPoolExecutor(max_workers=min(len(names), LOADER_THREADS), thread_name_prefix="dataset-loader",
+                                initializer=initializer) as executor:
+            futures = {name: executor.submit(DATASETS[name].loader, data_versions[name]) for name in names}
+            frames = {name: future.result() for name, future in futures.items()}
+
+    for name in names:
+        dataset = DATASETS[name]
+        if dataset.local_table:
+            get_local_analytics().register(dataset.local_table, frames[name], data_versions[name])
+    return frames, data_versions
+
+# ==============================================================================
+# PREWARMING
+# ==============================================================================
+def prewarm(pipeline_version: int) -> None:
+    """Load every registered dataset for a pipeline version into the shared caches."""
+    started = time.perf_counter()
+    with tracer.start_as_current_span("prewarm datasets", attributes={"dashboard.data_version": pipeline_version}):
+        load_datasets(list(DATASETS), pipeline_version)
+    log.info(f"Prewarmed datasets for pipeline version {pipeline_version} in {time.perf_counter() - started:.2f}s")
+
+def _safe_prewarm(pipeline_version: int) -> None:
+    try:
+        prewarm(pipeline_version)
+    except Exception as e:
+        log.error(f"Prewarm failed for pipeline version {pipeline_version}: {e}")
+
+def _record_freshness(pipeline_version: int, recorder: FreshnessRecorder, replica: Optional[ReadReplica],
+                      run_end: Optional[datetime]) -> None:
+    """
+    Stamp the run's webhook events as served, then reload the freshness panel onto the new percentiles.
+
+    The prewarm read the version's data versions before these percentiles existed. The replica
+    copies ops.freshness_slo again and the data versions are re-read before the poller publishes
+    the version, so its sessions show this run's numbers rather than the previous run's.
+    """
+    if not recorder.record_after_run(pipeline_version, run_end):
+        return
+    try:
+        if replica is not None:
+            replica.sync(["ops.freshness_slo"])
+        load_data_versions.clear(pipeline_version)
+        load_datasets(["freshness"], pipeline_version)
+    except Exception as e:
+        log.error(f"Reloading freshness for pipeline version {pipeline_version} failed: {e}")
+
+@st.cache_resource
+def start_prewarming() -> PipelinePoller:
+    """
+    Warm the caches now and before every new pipeline version is published.
+
+    The poller runs the prewarm before bumping its version, so sessions only rerun
+    onto data that is already cached. With a read replica the replica syncs first and
+    the prewarm reads from it. Once the prewarm is done, the webhook events of the run
+    are stamped as served and the freshness panel is reloaded. Runs once per process.
+    """
+    setup_tracing()
+    poller = get_pipeline_poller()
+    replica = get_read_replica()
+    if replica is not None:
+        poller.add_listener(replica.sync_after_run)
+    poller.add_listener(_safe_prewarm)
+    recorder = get_freshness_recorder()
+    if recorder is not None:
+        poller.add_listener(lambda version: _record_freshness(version, recorder, replica, poller.latest_run_end))
+    threading.Thread(target=_safe_prewarm, args=(poller.version,), name="prewarm", daemon=True).start()
+    return poller
@@ -0,0 +1,56 @@
+'''Bounded LRU cache for built Plotly figures, shared by every dashboard session'''
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import plotly.graph_objects as go
+
+log = logging.getLogger(__name__)
+
+FIGURE_CACHE_SIZE = 64
+
+class FigureCache:
+    """
+    Least recently used cache of Plotly figures.
+
+    Keys should hold everything a figure depends on, the chart name, the data version
+    and the selected filters, so a hit can be handed straight to st.plotly_chart.
+    Figures are shared between sessions and must not be mutated after they are built.
+    """
+    def __init__(self, max_entries: int = FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures: OrderedDict[Hashable, go.Figure] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._figures
+
+    def get_or_create(self, key: Hashable, build: Callable[[], go.Figure]) -> go.Figure:
+        """Return the cached figure for key, building and storing it on a miss."""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            self.misses += 1
+
+        # Build outside the lock so a slow treemap does not block other charts
+        figure = build()
+
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                evicted, _ = self._figures.popitem(last=False)
+                log.debug(f"Evicted figure {evicted}")
+        return figure
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
@@ -0,0 +1,62 @@
+'''Time to insight: when webhook events first reach the dashboard, and lag percentiles per hop'''
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import duckdb
+
+from app.constants import FRESHNESS_WINDOW_HOURS, get_md_connection
+from app.queries import mark_served_query, record_freshness_slo_query
+
+log = logging.getLogger(__name__)
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, the convention of every timestamp in the database."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+class FreshnessRecorder:
+    """
+    Completes ops.transaction_freshness and keeps ops.freshness_slo current.
+
+    The pipeline records event, landing and staging times of every webhook event. Once
+    a refresh has loaded a run into the shared caches, the events staged by that run are
+    stamped as served, and p50/p90/p99 lag per hop over the trailing window are appended.
+    """
+    def __init__(self, connect: Callable[[], duckdb.DuckDBPyConnection] = get_md_connection,
+                 window_hours: int = FRESHNESS_WINDOW_HOURS):
+        self._connect = connect
+        self.window_hours = window_hours
+
+    def record(self, staged_before: datetime, served_at: Optional[datetime] = None) -> int:
+        """Stamp events staged up to staged_before as served, returns how many were newly served."""
+        served_at = _utc(served_at or datetime.now(timezone.utc))
+        with self._connect() as connection:
+            connection.execute("BEGIN TRANSACTION")
+            try:
+                served = connection.execute(
+                    mark_served_query, {"served_at": served_at, "staged_before": _utc(staged_before)}
+                ).fetchone()[0]
+                if served:
+                    connection.execute(record_freshness_slo_query,
+                                       {"served_at": served_at, "window_hours": self.window_hours})
+                connection.execute("COMMIT")
+            except duckdb.Error:
+                connection.execute("ROLLBACK")
+                raise
+        if served:
+            log.info(f"Recorded {served} webhook events first served at {served_at}")
+        return served
+
+    def record_after_run(self, pipeline_version: int, run_end: Optional[datetime]) -> int:
+        """
+        Runs after the prewarm, returns how many events were newly served.
+
+        Failures are logged and count as nothing served, they never block a refresh.
+        """
+        if run_end is None:
+            return 0
+        try:
+            return self.record(run_end)
+        except Exception as e:
+            log.error(f"Recording freshness for pipeline version {pipeline_version} failed: {e}")
+            return 0
@@ -0,0 +1,257 @@
+import plotly.graph_objects as go
+import streamlit as st
+import pandas as pd
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+from app.analytics import top_n_with_other
+from app.charts import create_trend_chart, create_donut_chart, create_top_stores_chart, create_treemap, \
+    create_freshness_chart
+from app.utils.formatting import format_month, format_lag, days_left_in_month_func
+from app.datasets import load_datasets
+from app.resources import get_local_analytics, get_figure_cache
+from app.queries import filtered_spending_query, trend_query, months_in_range_query, months_query
+from app.utils.timing import timer
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+# Datasets this page reads, only these are loaded when it is shown
+DATASETS = ("available", "spending", "freshness")
+LOOKBACK_DAYS = 180 
+# Chart payload limits, smaller counterparties and categories are folded into "Other"
+TREEMAP_TOP_N = 15
+DONUT_TOP_N = 8
+# Hops of a webhook event in pipeline order, as stored in ops.freshness_slo
+FRESHNESS_STAGES = ["event_to_landed", "landed_to_staged", "staged_to_served", "event_to_served"]
+
+log = logging.getLogger(__name__)
+
+# ==============================================================================
+# SHARED RESOURCES
+# ==============================================================================
+_local = get_local_analytics()
+_figures = get_figure_cache()
+
+# ==============================================================================
+# DATA PROCESSING FUNCTIONS
+# ==============================================================================
+def get_filtered_spending(summary_df: pd.DataFrame, start_month: str, end_month: str) -> pd.DataFrame:
+    """
+    Filter spending data by date range using parameterized query.
+    
+    This prevents SQL injection and makes the code more maintainable.
+    Even though we're using DuckDB on DataFrames (not raw user input),
+    this pattern is important for consistency and when migrating to SQL Server.
+    Runs on the local in-process DuckDB, summary_df is already registered there.
+    """
+    try:
+        return _local.query(filtered_spending_query, [start_month, end_month])
+    except Exception as e:
+        log.error(f"Failed to filter spending data: {e}")
+        raise
+
+def get_trend_data(summary_df: pd.DataFrame, lookback_days: int = LOOKBACK_DAYS) -> pd.DataFrame:
+    """Get spending trend for the last N days."""
+    try:
+        cutoff_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m')
+        return _local.query(trend_query, [cutoff_date])
+    except Exception as e:
+        log.error(f"Failed to get trend data: {e}")
+        raise
+
+def get_months_in_range(summary_df: pd.DataFrame, start_month: str, end_month: str) -> int:
+    """Calculate number of months in the selected range."""
+    try:
+        return _local.query(months_in_range_query, [start_month, end_month])['num_months'][0]
+    except Exception as e:
+        log.error(f"Failed to count months in range: {e}")
+        return 1
+
+# ==============================================================================
+# CHART RENDERING
+# ==============================================================================
+def show_figure(key: tuple, build: Callable[[], go.Figure]) -> None:
+    """Render a figure from the shared cache, building it on a miss."""
+    with timer.phase("figures"):
+        fig = _figures.get_or_create(key, build)
+    with timer.phase("render"):
+        st.plotly_chart(fig, width='stretch')
+
+# ==============================================================================
+# MAIN APPLICATION
+# ==============================================================================
+
+# Load data with error handling
+try:
+    with st.spinner('Loading data...'), timer.phase("data_load"):
+        datasets, data_versions = load_datasets(DATASETS, st.session_state.pipeline_version)
+        available_df = datasets["available"]
+        summary_df = datasets["spending"]
+        freshness_df = datasets["freshness"]
+except Exception as e:
+    st.error("Unable to load data from database. Please try refreshing the page.")
+    st.exception(e)
+    st.stop()
+
+# Get unique months for filter
+try:
+    with timer.phase("slicing"):
+        all_months = sorted(_local.query(months_query)['year_month'].unique())
+except Exception as e:
+    log.error(f"Failed to get months list: {e}")
+    st.error("Unable to load date filter options.")
+    st.stop()
+
+# ==============================================================================
+# SIDEBAR FILTERS
+# ==============================================================================
+st.sidebar.subheader("Date Range")
+
+# Format months for display
+formatted_months = [format_month(m) for m in all_months]
+month_mapping = dict(zip(formatted_months, all_months))
+
+start_month_formatted = st.sidebar.selectbox(
+    "From:",
+    options=formatted_months,
+    index=len(formatted_months) - 1,
+    key="start_month"
+)
+start_month = month_mapping[start_month_formatted]
+
+end_month_formatted = st.sidebar.selectbox(
+    "To:",
+    options=formatted_months,
+    index=len(formatted_months) - 1,
+    key="end_month"
+)
+end_month = month_mapping[end_month_formatted]
+
+# Validate date range
+if start_month > end_month:
+    st.sidebar.error("⚠️ Start month must be before or equal to end month")
+    st.stop()
+
+# ==============================================================================
+# DATA PROCESSING
+# ==============================================================================
+try:
+    with timer.phase("slicing"):
+        # Get filtered data
+        filtered_df = get_filtered_spending(summary_df, start_month, end_month)
+        
+        # Get trend data (unfiltered, last 6 months)
+        trend_df = get_trend_data(summary_df)
+        
+        # Calculate metrics
+        total_spending = filtered_df['total_amount'].sum()
+        available_budget = available_df['available_budget'].sum()
+        
+        #now = datetime.now()
+        #days_in_month = calendar.monthrange(now.year, now.month)[1]
+        days_left_in_month = days_left_in_month_func()
+        available_budget_per_day = available_budget / days_left_in_month
+        
+        months_in_range = get_months_in_range(summary_df, start_month, end_month)
+    
+except Exception as e:
+    log.error(f"Failed to process data: {e}")
+    st.error("Unable to process spending data.")
+    st.exception(e)
+    st.stop()
+
+# ==============================================================================
+# METRICS DISPLAY
+# ==============================================================================
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.metric(
+        label="Total Budget Remaining",
+        value=f"£{available_budget:,.0f}"
+    )
+
+with col2:
+    st.metric(
+        label="Budget Remaining Per Day",
+        value=f"£{available_budget_per_day:,.0f}"
+    )
+
+with col3:
+    st.metric(
+        label=f"Total Spent ({months_in_range} month{'s' if months_in_range != 1 else ''})",
+        value=f"£{total_spending:,.0f}"
+    )
+
+st.divider()
+
+# ==============================================================================
+# TREND CHART
+# ==============================================================================
+st.title("Where My Money @ Analysis")
+
+spending_version = data_versions["spending"]
+show_figure(
+    ("trend", spending_version, datetime.now().date()),
+    lambda: create_trend_chart(trend_df)
+)
+
+st.divider()
+
+# ==============================================================================
+# DETAILED BREAKDOWN
+# ==============================================================================
+st.subheader(f'Detailed Spending Breakdown ({start_month} to {end_month})')
+
+col_left, col_right = st.columns([1, 2])
+
+# Donut chart
+with col_left:
+    show_figure(
+        ("donut", spending_version, start_month, end_month),
+        lambda: create_donut_chart(top_n_with_other(filtered_df, 'spending_category', 'total_amount', DONUT_TOP_N))
+    )
+
+# Top 5 stores
+with col_right:
+    st.text("Top 5 Stores")
+    show_figure(
+        ("top_stores", spending_version, start_month, end_month),
+        lambda: create_top_stores_chart(filtered_df.nlargest(5, 'total_amount'))
+    )
+
+# Treemap
+show_figure(
+    ("treemap", spending_version, start_month, end_month),
+    lambda: create_treemap(
+        top_n_with_other(filtered_df, 'spent_at', 'total_amount', TREEMAP_TOP_N, group_cols=['spending_category'])
+    )
+)
+
+# ==============================================================================
+# DATA FRESHNESS
+# ==============================================================================
+with st.expander("Data freshness"):
+    if freshness_df.empty:
+        st.caption("No webhook events served yet.")
+    else:
+        latest = (freshness_df[freshness_df['computed_at'] == freshness_df['computed_at'].max()]
+                  .set_index('stage')
+                  .reindex(FRESHNESS_STAGES)
+                  .dropna(subset=['events']))
+        if 'event_to_served' in latest.index:
+            end_to_end = latest.loc['event_to_served']
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Event to dashboard p50", format_lag(end_to_end['p50_s']))
+            col2.metric("p90", format_lag(end_to_end['p90_s']))
+            col3.metric("p99", format_lag(end_to_end['p99_s']))
+        st.caption(
+            f"{int(latest['events'].max())} webhook events served in the last {int(latest['window_hours'].iloc[0])} hours, "
+            f"updated {latest['computed_at'].iloc[0]:%d %b %H:%M} UTC"
+        )
+        lags = latest[['p50_s', 'p90_s', 'p99_s', 'max_s']].map(format_lag).rename(columns=lambda c: c.removesuffix('_s'))
+        lags.insert(0, 'events', latest['events'].astype(int))
+        st.dataframe(lags, width='stretch')
+        show_figure(("freshness", data_versions["freshness"]), lambda: create_freshness_chart(freshness_df))
@@ -0,0 +1,112 @@
+import streamlit as st
+import pandas as pd
+import logging
+
+from app.resources import get_connection_pool
+from app.queries import EXPLORER_SORTS, explorer_categories_query, explorer_counterparties_query, \
+    transaction_page_query
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+# Pages through sem.spending on the server, no cached datasets needed
+DATASETS = ()
+PAGE_SIZE = 50
+FILTER_CACHE_TTL = 1800
+PAGE_CACHE_TTL = 60
+
+log = logging.getLogger(__name__)
+
+_pool = get_connection_pool()
+
+# ==============================================================================
+# DATA LOADING FUNCTIONS
+# ==============================================================================
+@st.cache_data(ttl=FILTER_CACHE_TTL)
+def load_filter_options() -> tuple[list[str], dict[int, str]]:
+    """Load the category and counterparty choices for the filters."""
+    try:
+        categories = _pool.query(explorer_categories_query)['spending_category'].dropna().tolist()
+        counterparties = _pool.query(explorer_counterparties_query)
+        return categories, dict(zip(counterparties['counterparty_key'], counterparties['counterparty_name']))
+    except Exception as e:
+        log.error(f"Failed to load explorer filters: {e}")
+        raise
+
+@st.cache_data(ttl=PAGE_CACHE_TTL, max_entries=200)
+def load_page(sql: str, params: list) -> pd.DataFrame:
+    """Fetch a single page of transactions, only the visible rows leave MotherDuck."""
+    try:
+        return _pool.query(sql, params)
+    except Exception as e:
+        log.error(f"Failed to load transaction page: {e}")
+        raise
+
+def page_anchor(row: pd.Series, column: str) -> tuple:
+    """Keyset anchor of the last row on a page, the next page starts strictly after it."""
+    value = row[column]
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    return value, row['transaction_id']
+
+# ==============================================================================
+# MAIN APPLICATION
+# ==============================================================================
+st.title("Transactions")
+
+try:
+    categories, counterparties = load_filter_options()
+except Exception as e:
+    st.error("Unable to load filter options from database. Please try refreshing the page.")
+    st.exception(e)
+    st.stop()
+
+st.sidebar.subheader("Filters")
+sort = st.sidebar.selectbox("Sort:", options=list(EXPLORER_SORTS), key="explorer_sort")
+selected_categories = st.sidebar.multiselect("Categories:", options=categories, key="explorer_categories")
+counterparty_key = st.sidebar.selectbox(
+    "Spent at:",
+    options=[None, *counterparties],
+    format_func=lambda key: "All" if key is None else counterparties[key],
+    key="explorer_counterparty"
+)
+
+# Anchors of every page visited so far, the first page has none
+filters = (sort, tuple(selected_categories), counterparty_key)
+if st.session_state.get('explorer_filters') != filters:
+    st.session_state.explorer_filters = filters
+    st.session_state.explorer_anchors = [None]
+anchors = st.session_state.explorer_anchors
+
+sql, params = transaction_page_query(sort, selected_categories, counterparty_key, anchors[-1], PAGE_SIZE)
+try:
+    page = load_page(sql, params)
+except Exception as e:
+    st.error("Unable to load transactions.")
+    st.exception(e)
+    st.stop()
+
+has_next = len(page) > PAGE_SIZE
+page = page.head(PAGE_SIZE)
+
+st.dataframe(
+    page.drop(columns=['transaction_id']),
+    width='stretch',
+    hide_index=True,
+    column_config={
+        "transaction_time": st.column_config.DatetimeColumn("Time", format="YYYY-MM-DD HH:mm"),
+        "amount": st.column_config.NumberColumn("Amount", format="£%.2f"),
+    }
+)
+
+col_prev, col_page, col_next = st.columns([1, 2, 1])
+with col_prev:
+    if st.button("Previous", disabled=len(anchors) == 1, width='stretch'):
+        anchors.pop()
+        st.rerun()
+with col_page:
+    st.caption(f"Page {len(anchors)}")
+with col_next:
+    if st.button("Next", disabled=not has_next, width='stretch'):
+        anchors.append(page_anchor(page.iloc[-1], EXPLORER_SORTS[sort][0]))
+        st.rerun()
@@ -2,96 +2,174 @@ from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
 import asyncio
+import threading
 from datetime import datetime, timezone
+from typing import Callable, Optional
 import logging
 
+from prefect import get_client
+from prefect.client.orchestration import PrefectClient
+from prefect.client.schemas.filters import DeploymentFilter, DeploymentFilterName, FlowRunFilter, \
+    FlowRunFilterEndTime, FlowRunFilterState, FlowRunFilterStateType
+from prefect.client.schemas.objects import FlowRun, StateType
+from prefect.client.schemas.sorting import FlowRunSort
+
 from app.utils.logging_config import setup_logging
+from app.utils.tracing import TRACEPARENT_LABEL, context_from_traceparent, tracer
 
 log = logging.getLogger(__name__)
 
-@st.cache_data(ttl=2)
-def poll_for_pipeline_run(
-    pipeline_names: tuple = None,  
-    last_refreshed_iso: str = None,
-    timeout: int = 30
-) -> bool:
+PIPELINE_NAMES = ("main-pipeline", "webhook-pipeline")
+POLL_SECONDS = 5
+
+class PrefectQueryClient:
     """
-    Check if any flows in pipeline_names have completed runs after last_refreshed.
-    Returns True if a refresh is needed, False otherwise.
+    Long-lived Prefect client owned by a background event loop thread.
+
+    The client and its HTTP connection pool are opened once and kept alive, callers on
+    any thread submit queries to the loop and block on the result. A failed query drops
+    the client so the next one reconnects.
     """
-    if pipeline_names is None:
-        pipeline_names = ("main-pipeline", "webhook-pipeline")
-    
-    if last_refreshed_iso is None:
-        last_refreshed_iso = st.session_state.last_refresh_time
-    
-    # Convert ISO string to datetime for comparison
-    last_refreshed = datetime.fromisoformat(last_refreshed_iso)
-    
-    # Run the async function in a new event loop (for Streamlit compatibility)
-    return asyncio.run(_check_recent_runs(pipeline_names, last_refreshed, timeout))
-
-
-async def _check_recent_runs(
-    pipeline_names: tuple,
-    last_refreshed: datetime,
-    timeout: int
-) -> bool:
-    from prefect import get_client
-    from prefect.client.schemas.filters import DeploymentFilter, DeploymentFilterId
-    """Async helper to check for recent flow runs."""
-    async with get_client() as client:
-        log.info(f"Polling Prefect for deployments: {pipeline_names}")
-        
+    def __init__(self, timeout: int = 30):
+        self.timeout = timeout
+        self._client: Optional[PrefectClient] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="prefect-client", daemon=True)
+        self._thread.start()
+
+    async def _get_client(self) -> PrefectClient:
+        if self._client is None:
+            client = get_client()
+            await client.__aenter__()
+            self._client = client
+        return self._client
+
+    async def _reset_client(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception as e:
+                log.warning(f"Error closing Prefect client: {e}")
+
+    async def _latest_completed_run(self, pipeline_names: tuple, after: Optional[datetime]) -> Optional[FlowRun]:
+        client = await self._get_client()
         try:
-            async with asyncio.timeout(timeout):
-                deployments = await client.read_deployments()
-                matching_deployments = [
-                    d for d in deployments 
-                    if d.name in pipeline_names
-                ]
-                
-                if not matching_deployments:
-                    log.warning(f"No deployments found matching: {pipeline_names}")
-                    return False
-                
-                # Check for recent runs across all matching deployments
-                for deployment in matching_deployments:
-                    # Create proper filter object using Prefect's filter classes
-                    deployment_filter = DeploymentFilter(
-                        id=DeploymentFilterId(any_=[deployment.id])
-                    )
-                    
-                    runs = await client.read_flow_runs(
-                        deployment_filter=deployment_filter,
-                        sort="EXPECTED_START_TIME_DESC",
-                        limit=5
-                    )
-                    
-                    for run in runs:
-                        if (run.state and 
-                            run.state.is_completed() and 
-                            run.end_time and 
-                            run.end_time > last_refreshed):
-                            
-                            log.info(
-                                f"Found recent run for '{deployment.name}': "
-                                f"{run.name} ended at {run.end_time}"
-                            )
-                            return True
-                
-                log.info(f"No recent completed runs found for {pipeline_names}")
-                return False
-                
-        except asyncio.TimeoutError:
-            error_msg = f"Timeout after {timeout}s polling {pipeline_names}"
+            runs = await client.read_flow_runs(
+                flow_run_filter=FlowRunFilter(
+                    state=FlowRunFilterState(type=FlowRunFilterStateType(any_=[StateType.COMPLETED])),
+                    end_time=FlowRunFilterEndTime(after_=after) if after else None,
+                ),
+                deployment_filter=DeploymentFilter(name=DeploymentFilterName(any_=list(pipeline_names))),
+                sort=FlowRunSort.END_TIME_DESC,
+                limit=1,
+            )
+        except Exception:
+            await self._reset_client()
+            raise
+        # The server filter is inclusive, the run that ended exactly at `after` was already seen
+        if not runs or (after is not None and runs[0].end_time <= after):
+            return None
+        return runs[0]
+
+    def latest_completed_run(self, pipeline_names: tuple, after: Optional[datetime] = None) -> Optional[FlowRun]:
+        """
+        Latest completed run of any deployment in pipeline_names.
+
+        Filtering happens on the Prefect server, when `after` is given only runs that
+        ended later are considered. Safe to call from any thread.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._latest_completed_run(pipeline_names, after), self._loop)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            error_msg = f"Timeout after {self.timeout}s polling {pipeline_names}"
             log.error(error_msg)
             raise TimeoutError(error_msg)
-        except Exception as e:
-            log.error(f"Failed to poll Prefect: {str(e)}")
-            raise
-  
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._reset_client(), self._loop).result(timeout=self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+class PipelinePoller:
+    """
+    One background thread per server process that watches Prefect for completed pipeline runs.
+
+    Every time a run newer than the last one seen completes, `version` is bumped.
+    Sessions compare their own copy of the version against it, so Prefect load stays
+    constant no matter how many dashboards are open. Listeners are called with the
+    new version before it is published.
+    """
+    def __init__(self, pipeline_names: tuple = PIPELINE_NAMES, interval: float = POLL_SECONDS, timeout: int = 30):
+        self.pipeline_names = pipeline_names
+        self.interval = interval
+        self.client = PrefectQueryClient(timeout)
+        self.version = 0
+        self.latest_run_end: Optional[datetime] = None
+        self._listeners: list[Callable[[int], None]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pipeline-poller", daemon=True)
+
+    def start(self) -> "PipelinePoller":
+        self._thread.start()
+        log.info(f"Started pipeline poller for {self.pipeline_names} every {self.interval}s")
+        return self
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        self._listeners.append(listener)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.client.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                log.error(f"Failed to poll Prefect: {e}")
+            self._stop.wait(self.interval)
+
+    def check(self) -> bool:
+        """Poll once, returns True when a newer completed run was found."""
+        run = self.client.latest_completed_run(self.pipeline_names, after=self.latest_run_end)
+        if run is None:
+            return False
+        if self.latest_run_end is None:
+            # First poll only sets the baseline, sessions loaded their data after this run
+            self.latest_run_end = run.end_time
+            return False
+        if run.end_time > self.latest_run_end:
+            self.latest_run_end = run.end_time
+            self._publish(run)
+            log.info(f"Pipeline run completed at {run.end_time}, data version now {self.version}")
+            return True
+        return False
+
+    def _publish(self, run: FlowRun) -> None:
+        """
+        Run the listeners and bump the version, traced as a child of the pipeline run.
+
+        Prefect keeps the run's span context in a label, so the refresh joins the trace the
+        webhook started, and the time from run end to pickup is recorded on the span.
+        """
+        attributes = {
+            "prefect.flow_run.id": str(run.id),
+            "dashboard.data_version": self.version + 1,
+            "pipeline.pickup_lag_s": (datetime.now(timezone.utc) - run.end_time).total_seconds(),
+        }
+        with tracer.start_as_current_span("dashboard refresh", attributes=attributes,
+                                          context=context_from_traceparent(run.labels.get(TRACEPARENT_LABEL))):
+            for listener in self._listeners:
+                listener(self.version + 1)
+            self.version += 1
+
+@st.cache_resource
+def get_pipeline_poller() -> PipelinePoller:
+    """Process-wide poller, started on first use."""
+    return PipelinePoller().start()
+
 if __name__ == "__main__":
-    setup_logging
-    asyncio.run(poll_for_pipeline_run(("main-pipeline", "webhook-pipeline"), datetime.now(timezone.utc), 30))      
-        
\ No newline at end of file
+    setup_logging()
+    print(PrefectQueryClient().latest_completed_run(PIPELINE_NAMES))
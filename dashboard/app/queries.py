@@ -0,0 +1,169 @@
+'''SQL used by the dashboard, kept in one place so benchmarks run the exact statements'''
+from typing import Any, Optional, Sequence
+
+def _watermark(table: str) -> str:
+    """Row count and latest last_modified of a schema qualified table, changes whenever it is written to"""
+    return f"(SELECT COUNT(*) || '@' || COALESCE(MAX(last_modified)::VARCHAR, '') FROM b_app.{table})"
+
+# One version per dashboard dataset, built from the tables behind its semantic view
+data_versions_query = f"""
+    SELECT
+        {_watermark('stg.balance')} AS available,
+        {_watermark('stg.transactions')} || '/' || {_watermark('stg.dim_spaces')} || '/' || {_watermark('stg.dim_counterparty')} AS spending,
+        {_watermark('ops.freshness_slo')} AS freshness
+"""
+
+available_budget_query = """
+    SELECT available_budget, available_total
+    FROM b_app.sem.available
+"""
+
+summary_query = """
+    SELECT
+        year_month,
+        spending_category,
+        counterparty_key,
+        ANY_VALUE(spent_at) as spent_at,
+        ROUND(SUM(AMOUNT)) as total_amount
+    FROM b_app.sem.spending
+    WHERE space = 'Default'
+      AND spending_category != 'bills and services'
+    GROUP BY year_month, spending_category, counterparty_key
+    ORDER BY total_amount DESC
+"""
+
+# Bound to the days of history shown
+freshness_query = """
+    SELECT computed_at, window_hours, stage, events, p50_s, p90_s, p99_s, max_s
+    FROM b_app.ops.freshness_slo
+    WHERE computed_at >= CURRENT_DATE - ? * INTERVAL 1 DAY
+    ORDER BY computed_at
+"""
+
+filtered_spending_query = """
+    SELECT
+        spending_category,
+        counterparty_key,
+        ANY_VALUE(spent_at) as spent_at,
+        SUM(total_amount) as total_amount
+    FROM summary_df
+    WHERE year_month >= ? AND year_month <= ?
+    GROUP BY spending_category, counterparty_key
+    ORDER BY total_amount DESC
+"""
+
+trend_query = """
+    SELECT
+        year_month,
+        SUM(total_amount) as monthly_total
+    FROM summary_df
+    WHERE year_month >= ?
+    GROUP BY year_month
+    ORDER BY year_month
+"""
+
+months_in_range_query = """
+    SELECT COUNT(DISTINCT year_month) as num_months
+    FROM summary_df
+    WHERE year_month >= ? AND year_month <= ?
+"""
+
+months_query = """
+    SELECT DISTINCT year_month
+    FROM summary_df
+    ORDER BY year_month DESC
+"""
+
+# ==============================================================================
+# TRANSACTION EXPLORER
+# ==============================================================================
+EXPLORER_COLUMNS = "transaction_id, transaction_time, space, spending_category, spent_at, amount, spending_reference, user_note"
+EXPLORER_SORTS = {
+    "Newest first": ("transaction_time", "DESC"),
+    "Oldest first": ("transaction_time", "ASC"),
+    "Largest amount": ("amount", "DESC"),
+    "Smallest amount": ("amount", "ASC"),
+}
+
+explorer_categories_query = """
+    SELECT DISTINCT spending_category
+    FROM b_app.sem.spending
+    ORDER BY spending_category
+"""
+
+explorer_counterparties_query = """
+    SELECT counterparty_key, counterparty_name
+    FROM b_app.stg.dim_counterparty
+    ORDER BY counterparty_name
+"""
+
+def transaction_page_query(sort: str = "Newest first", categories: Sequence[str] = (),
+                           counterparty_key: Optional[int] = None, after: Optional[tuple[Any, str]] = None,
+                           page_size: int = 50) -> tuple[str, list]:
+    """
+    Build one keyset-paginated page of sem.spending with every filter pushed down to SQL.
+
+    Pages are anchored on (sort column, transaction_id) of the last row already shown, so
+    each page costs the same however deep it is. One row more than page_size is fetched
+    to tell whether a next page exists.
+    """
+    column, direction = EXPLORER_SORTS[sort]
+    comparison = "<" if direction == "DESC" else ">"
+    conditions, params = [], []
+
+    if categories:
+        conditions.append(f"spending_category IN ({', '.join('?' for _ in categories)})")
+        params.extend(categories)
+    if counterparty_key is not None:
+        conditions.append("counterparty_key = ?")
+        params.append(counterparty_key)
+    if after is not None:
+        # The redundant range predicate lets DuckDB prune row groups before the tie-break
+        conditions.append(f"{column} {comparison}= ? AND ({column} {comparison} ? OR ({column} = ? AND transaction_id {comparison} ?))")
+        params.extend([after[0], after[0], after[0], after[1]])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+    SELECT {EXPLORER_COLUMNS}
+    FROM b_app.sem.spending
+    {where}
+    ORDER BY {column} {direction}, transaction_id {direction}
+    LIMIT {int(page_size) + 1}
+"""
+    return sql, params
+
+# ==============================================================================
+# FRESHNESS RECORDING
+# ==============================================================================
+# Rows staged before the refreshed run ended are in the data the dashboard now serves
+mark_served_query = """
+    UPDATE b_app.ops.transaction_freshness
+    SET served_at = $served_at
+    WHERE served_at IS NULL
+      AND staged_at <= $staged_before
+"""
+
+# Lag of every hop of the events served in the window, UNPIVOT drops hops with a missing timestamp
+record_freshness_slo_query = """
+    INSERT INTO b_app.ops.freshness_slo
+    SELECT
+        $served_at AS computed_at,
+        $window_hours AS window_hours,
+        stage,
+        COUNT(*) AS events,
+        quantile_cont(lag_s, 0.5) AS p50_s,
+        quantile_cont(lag_s, 0.9) AS p90_s,
+        quantile_cont(lag_s, 0.99) AS p99_s,
+        MAX(lag_s) AS max_s,
+        $served_at AS last_modified
+    FROM (
+        SELECT
+            epoch(landed_at - event_at) AS event_to_landed,
+            epoch(staged_at - landed_at) AS landed_to_staged,
+            epoch(served_at - staged_at) AS staged_to_served,
+            epoch(served_at - event_at) AS event_to_served
+        FROM b_app.ops.transaction_freshness
+        WHERE served_at > $served_at - to_hours($window_hours::BIGINT)
+    ) UNPIVOT (lag_s FOR stage IN (event_to_landed, landed_to_staged, staged_to_served, event_to_served))
+    GROUP BY stage
+"""
@@ -0,0 +1,170 @@
+'''Local DuckDB read replica of the semantic layer, refreshed after every pipeline run'''
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import duckdb
+
+from app.constants import DATABASE, REPLICA_TABLES, get_md_connection
+from app.utils.tracing import tracer
+
+log = logging.getLogger(__name__)
+
+class ReadReplica:
+    """
+    Local copy of the tables behind the semantic views and panels, and the views themselves.
+
+    The replica file is named after the remote database, so every dashboard query runs
+    against it unchanged. A sync only moves what changed: rows with a newer last_modified
+    are upserted on the table key, a table whose row count still differs afterwards
+    (deletes, or no key to upsert on) is copied in full. Every table is swapped in its own
+    transaction, readers never see a half copied table, and a failed sync leaves the last
+    good data in place.
+    """
+    def __init__(self, directory: Path, remote_connect: Callable[[], duckdb.DuckDBPyConnection] = get_md_connection,
+                 tables: Optional[dict[str, Optional[str]]] = None):
+        self.path = Path(directory) / f"{DATABASE}.duckdb"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._remote_connect = remote_connect
+        self._tables = REPLICA_TABLES if tables is None else tables
+        self._sync_lock = threading.Lock()
+        # Read-write, syncs and dashboard reads share this one database instance
+        self._db = duckdb.connect(str(self.path))
+        for schema in sorted({table.split(".")[0] for table in self._tables} | {"sem"}):
+            self._db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+
+    def connect(self) -> duckdb.DuckDBPyConnection:
+        """Root connection for a ConnectionPool, its cursors see every committed sync."""
+        return self._db.cursor()
+
+    @property
+    def ready(self) -> bool:
+        """True once a sync, in this or an earlier process, has created the semantic views."""
+        with self._db.cursor() as cursor:
+            views = cursor.execute(
+                "SELECT COUNT(*) FROM duckdb_views() WHERE database_name = ? AND schema_name = 'sem'", [DATABASE]
+            ).fetchone()[0]
+        return views > 0
+
+    def sync(self, tables: Optional[Sequence[str]] = None) -> int:
+        """
+        Bring the replica up to date with the remote database, returns the number of rows copied.
+
+        Only the given tables are synced when passed, every replicated table otherwise.
+        """
+        with self._sync_lock, tracer.start_as_current_span("replica sync") as span:
+            started = time.perf_counter()
+            remote = self._remote_connect()
+            try:
+                selected = {table: key for table, key in self._tables.items() if tables is None or table in tables}
+                copied = sum(self._sync_table(remote, table, key) for table, key in selected.items())
+                self._sync_views(remote)
+            finally:
+                remote.close()
+            span.set_attribute("replica.rows_copied", copied)
+            log.info(f"Replica synced {copied} rows in {time.perf_counter() - started:.2f}s")
+            return copied
+
+    def sync_after_run(self, pipeline_version: int) -> None:
+        """Poller listener, a failed sync is logged and the dashboard keeps serving the last good data."""
+        try:
+            self.sync()
+        except Exception as e:
+            log.error(f"Replica sync for pipeline version {pipeline_version} failed, serving last synced data: {e}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ==========================================================================
+    # SYNC STEPS
+    # ==========================================================================
+    @staticmethod
+    def _columns(connection: duckdb.DuckDBPyConnection, table: str) -> list[tuple[str, str]]:
+        return [(name, column_type) for name, column_type, *_ in connection.execute(f"DESCRIBE {table}").fetchall()]
+
+    @staticmethod
+    def _watermark(connection: duckdb.DuckDBPyConnection, table: str, tracked: bool) -> tuple:
+        latest = "MAX(last_modified)" if tracked else "NULL"
+        return connection.execute(f"SELECT COUNT(*), {latest} FROM {table}").fetchone()
+
+    def _sync_table(self, remote: duckdb.DuckDBPyConnection, table: str, key: Optional[str]) -> int:
+        # Tables are schema qualified, e.g. stg.transactions
+        source, target = f"{DATABASE}.{table}", table
+        schema, name = table.split(".")
+        columns = self._columns(remote, source)
+        # Keyless tables are rewritten with the same row count (stg.balance), their last_modified tells a reload apart
+        tracked = any(name == "last_modified" for name, _ in columns)
+        incremental = key is not None and tracked
+        remote_count, remote_latest = self._watermark(remote, source, tracked)
+
+        with self._db.cursor() as local:
+            exists = local.execute(
+                "SELECT COUNT(*) FROM duckdb_tables() WHERE database_name = ? AND schema_name = ? AND table_name = ?",
+                [DATABASE, schema, name],
+            ).fetchone()[0]
+            if not exists or self._columns(local, target) != columns:
+                return self._copy_full(remote, local, source, target, columns)
+
+            local_count, local_latest = self._watermark(local, target, tracked)
+            if (local_count, local_latest) == (remote_count, remote_latest):
+                return 0
+            if not incremental or local_latest is None:
+                return self._copy_full(remote, local, source, target, columns)
+
+            # >= re-copies rows sharing the latest timestamp, the upsert makes that harmless
+            changed = remote.execute(f"SELECT * FROM {source} WHERE last_modified >= ?", [local_latest]).fetch_arrow_table()
+            local.register("incoming", changed)
+            local.execute("BEGIN TRANSACTION")
+            try:
+                # Arrow carries UUIDs as strings, cast back to the key type before comparing
+                key_type = dict(columns)[key]
+                local.execute(f"DELETE FROM {target} WHERE {key} IN (SELECT CAST({key} AS {key_type}) FROM incoming)")
+                local.execute(f"INSERT INTO {target} SELECT * FROM incoming")
+                local.execute("COMMIT")
+            except duckdb.Error:
+                local.execute("ROLLBACK")
+                raise
+            finally:
+                local.unregister("incoming")
+
+            if local.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0] != remote_count:
+                log.info(f"Row count of {target} still differs after the incremental copy, copying in full")
+                return changed.num_rows + self._copy_full(remote, local, source, target, columns)
+            log.info(f"Replica upserted {changed.num_rows} rows into {target}")
+            return changed.num_rows
+
+    @staticmethod
+    def _copy_full(remote: duckdb.DuckDBPyConnection, local: duckdb.DuckDBPyConnection, source: str, target: str,
+                   columns: list[tuple[str, str]]) -> int:
+        rows = remote.execute(f"SELECT * FROM {source}").fetch_arrow_table()
+        definition = ", ".join(f'"{name}" {column_type}' for name, column_type in columns)
+        local.register("incoming", rows)
+        local.execute("BEGIN TRANSACTION")
+        try:
+            local.execute(f"CREATE OR REPLACE TABLE {target} ({definition})")
+            local.execute(f"INSERT INTO {target} SELECT * FROM incoming")
+            local.execute("COMMIT")
+        except duckdb.Error:
+            local.execute("ROLLBACK")
+            raise
+        finally:
+            local.unregister("incoming")
+        log.info(f"Replica copied {rows.num_rows} rows into {target}")
+        return rows.num_rows
+
+    def _sync_views(self, remote: duckdb.DuckDBPyConnection) -> None:
+        """Replay the remote semantic view definitions, they only reference tables the replica holds."""
+        views = remote.execute(
+            "SELECT sql FROM duckdb_views() WHERE database_name = ? AND schema_name = 'sem'", [DATABASE]
+        ).fetchall()
+        with self._db.cursor() as local:
+            local.execute("BEGIN TRANSACTION")
+            try:
+                for (sql,) in views:
+                    local.execute(sql.replace("CREATE VIEW", "CREATE OR REPLACE VIEW", 1))
+                local.execute("COMMIT")
+            except duckdb.Error:
+                local.execute("ROLLBACK")
+                raise
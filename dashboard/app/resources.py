@@ -0,0 +1,59 @@
+'''Process-wide resources shared by every dashboard page and session'''
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+import streamlit as st
+
+from app.constants import LOCAL_DUCKDB_ENV, REPLICA_DIR_ENV, get_md_connection, ConnectionPool
+from app.analytics import LocalAnalytics
+from app.figure_cache import FigureCache
+from app.replica import ReadReplica
+from app.freshness import FreshnessRecorder
+
+log = logging.getLogger(__name__)
+
+@st.cache_resource
+def get_read_replica() -> Optional[ReadReplica]:
+    """
+    Process-wide local read replica, None unless a replica directory is configured.
+
+    Synced once on creation, when MotherDuck is unreachable the data of the last sync is served.
+    """
+    directory = os.getenv(REPLICA_DIR_ENV)
+    if not directory or os.getenv(LOCAL_DUCKDB_ENV):
+        return None
+    replica = ReadReplica(Path(directory))
+    try:
+        replica.sync()
+    except Exception as e:
+        log.error(f"Initial replica sync failed, serving the last synced data: {e}")
+    return replica
+
+@st.cache_resource
+def get_freshness_recorder() -> Optional[FreshnessRecorder]:
+    """Writes to MotherDuck, None when the dashboard reads a local file, which is opened read only."""
+    if os.getenv(LOCAL_DUCKDB_ENV):
+        return None
+    return FreshnessRecorder()
+
+@st.cache_resource
+def get_connection_pool() -> ConnectionPool:
+    """Get the process-wide connection pool, sessions each check out their own cursor."""
+    replica = get_read_replica()
+    if replica is not None:
+        if replica.ready:
+            return ConnectionPool(replica.connect)
+        log.warning("Read replica has never synced, reading from MotherDuck")
+    return ConnectionPool(get_md_connection)
+
+@st.cache_resource
+def get_local_analytics() -> LocalAnalytics:
+    """Process-wide in-memory DuckDB used to slice already loaded data."""
+    return LocalAnalytics()
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Process-wide figure cache, keyed on data version and filters."""
+    return FigureCache()
@@ -0,0 +1,23 @@
+'''Start the dashboard server with its caches warming before the first visitor arrives'''
+from dotenv import load_dotenv
+load_dotenv()
+import sys
+import logging
+
+from streamlit.web import bootstrap
+
+from app.constants import APP_DIR
+from app.datasets import start_prewarming
+from app.utils.logging_config import setup_logging
+
+log = logging.getLogger(__name__)
+
+def main() -> None:
+    # Same process as the server, so sessions find the caches this fills
+    setup_logging()
+    bootstrap.load_config_options(flag_options={})
+    start_prewarming()
+    bootstrap.run(str(APP_DIR / "dashboard.py"), False, sys.argv[1:], {})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+import calendar
+
+def format_month(month_str: str) -> str:
+    """Convert YYYY-MM to 'MMM YYYY' format for display."""
+    dt = datetime.strptime(month_str, '%Y-%m')
+    return dt.strftime('%b %Y')
+
+def format_lag(seconds: float) -> str:
+    """Format a lag in seconds as s, min or h for display."""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+def days_left_in_month_func() -> int:
+    now = datetime.now()
+    days_in_month = calendar.monthrange(now.year, now.month)[1]
+    days_left = days_in_month - now.day
+    
+    if days_left == 0:
+        next_month_start = now.replace(day=1) + timedelta(days=days_in_month)
+        days_in_next_month = calendar.monthrange(next_month_start.year, next_month_start.month)[1]
+        return days_in_next_month
+    else:
+        return days_left
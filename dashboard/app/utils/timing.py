@@ -0,0 +1,39 @@
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase of a script run.
+
+    Disabled by default so production reruns only pay for a boolean check,
+    the dashboard benchmark enables it and reads the totals after each run.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._totals: dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._totals[name] += (time.perf_counter() - started) * 1000
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def totals(self) -> dict[str, float]:
+        with self._lock:
+            return {name: round(ms, 3) for name, ms in self._totals.items()}
+
+timer = PhaseTimer()
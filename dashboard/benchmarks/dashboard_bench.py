@@ -0,0 +1,173 @@
+'''
+Headless dashboard performance benchmark.
+
+Seeds a local b_app.duckdb with synthetic transactions at several scales and drives
+app/dashboard.py through Streamlit's AppTest harness. Each repetition times a cold load
+(empty process caches), a warm rerun and a rerun after changing the month filter, with
+the time split into data load, DuckDB slicing, figure building and chart rendering.
+The run exits non-zero when a phase regresses beyond the threshold against the baseline.
+
+Pipeline polling is stubbed out, Prefect is not part of what is measured.
+
+    cd dashboard
+    python -m benchmarks.dashboard_bench --update-baseline   # record a baseline
+    python -m benchmarks.dashboard_bench                     # compare against it
+'''
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from app import poll
+from app.constants import APP_DIR, LOCAL_DUCKDB_ENV
+from app.utils.timing import timer
+from benchmarks.seed import build_synthetic_database
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "dashboard_baseline.json"
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DASHBOARD_SCRIPT = APP_DIR / "dashboard.py"
+RUNS = ["cold_load", "warm_rerun", "filter_change"]
+PHASES = ["total", "data_load", "slicing", "figures", "render"]
+# The filter change widens the range from the latest month to this many months back
+FILTER_MONTHS = 6
+
+def _no_pipeline_runs(self, pipeline_names: tuple, after=None) -> None:
+    return None
+
+def _timed_run(at: AppTest) -> Dict[str, float]:
+    timer.reset()
+    started = time.perf_counter()
+    at.run()
+    total_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(f"Dashboard raised during benchmark: {[e.value for e in at.exception]}")
+    return {"total": round(total_ms, 3), **timer.totals()}
+
+def run_repetition() -> Dict[str, Dict[str, float]]:
+    """One cold load, warm rerun and filter change on a fresh set of process caches."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(DASHBOARD_SCRIPT), default_timeout=300)
+
+    results = {"cold_load": _timed_run(at), "warm_rerun": _timed_run(at)}
+    start_month = at.selectbox(key="start_month")
+    start_month.set_value(start_month.options[max(0, len(start_month.options) - FILTER_MONTHS)])
+    results["filter_change"] = _timed_run(at)
+    return results
+
+def run_scale(transactions: int, counterparties: int, repeats: int, workdir: Path) -> Dict[str, Any]:
+    db_path = build_synthetic_database(workdir / f"scale_{transactions}", transactions, counterparties)
+    os.environ[LOCAL_DUCKDB_ENV] = str(db_path)
+    repetitions = [run_repetition() for _ in range(repeats)]
+
+    # Median per run and phase, a phase a run never entered counts as 0
+    results = {
+        run: {
+            phase: round(statistics.median(rep[run].get(phase, 0.0) for rep in repetitions), 3)
+            for phase in PHASES
+        }
+        for run in RUNS
+    }
+    logger.info(f"[{transactions}] " + ", ".join(f"{run}: {results[run]['total']} ms" for run in RUNS))
+    return results
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     min_delta_ms: float) -> List[str]:
+    """
+    Compare median phase times per scale and run.
+
+    A phase regresses when it is both `threshold` slower relative to the baseline
+    and at least `min_delta_ms` slower in absolute terms, so sub-millisecond noise is ignored.
+    """
+    regressions = []
+    for scale, runs in current["scales"].items():
+        for run, phases in runs.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(run)
+            if base is None:
+                logger.warning(f"No baseline for {run} at scale {scale}")
+                continue
+            for phase, ms in phases.items():
+                base_ms = base.get(phase, 0.0)
+                delta = ms - base_ms
+                if delta > min_delta_ms and ms > base_ms * (1 + threshold):
+                    change = f"+{delta / base_ms:.0%}" if base_ms else "new"
+                    regressions.append(f"{run}.{phase} @ {scale}: {base_ms} ms -> {ms} ms ({change})")
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'scale':>10}  {'run':<15}" + "".join(f"  {phase + ' ms':>12}" for phase in PHASES))
+    for scale, runs in report["scales"].items():
+        for run, phases in runs.items():
+            print(f"{scale:>10}  {run:<15}" + "".join(f"  {phases[phase]:>12}" for phase in PHASES))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless dashboard performance benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="transaction counts to seed")
+    parser.add_argument("--counterparties", type=int, default=500, help="distinct merchants in the synthetic data")
+    parser.add_argument("--repeats", type=int, default=3, help="repetitions per scale, the median is reported")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="write the full report to this file")
+    parser.add_argument("--workdir", type=Path, help="where the local databases are built (default: temp dir)")
+    args = parser.parse_args(argv)
+
+    poll.PrefectQueryClient.latest_completed_run = _no_pipeline_runs
+    timer.enabled = True
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "streamlit_version": st.__version__,
+            "duckdb_version": duckdb.__version__,
+            "repeats": args.repeats,
+            "counterparties": args.counterparties,
+            "scales": {
+                str(scale): run_scale(scale, args.counterparties, args.repeats, workdir) for scale in args.scales
+            },
+        }
+
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        logger.info(f"Report written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline updated at {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        logger.error(f"No baseline at {args.baseline}, run with --update-baseline first")
+        return 1
+
+    regressions = find_regressions(report, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging(log_to_file=False, log_level=logging.WARNING)
+    sys.exit(main())
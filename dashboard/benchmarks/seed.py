@@ -0,0 +1,98 @@
+import logging
+from pathlib import Path
+from typing import List
+
+import duckdb
+
+from app.constants import DATABASE
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+DATABASE_DIR = REPO_DIR / "database"
+
+# Ordered list of every DDL file, shared with the orchestrator's local database builder
+DDL_MANIFEST = DATABASE_DIR / "ddl_order.txt"
+
+def ddl_files() -> List[str]:
+    """DDL files of a fresh database in dependency order, as listed in the manifest."""
+    lines = (line.strip() for line in DDL_MANIFEST.read_text().splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+N_SPACES = 5
+HISTORY_DAYS = 730
+CATEGORIES = ['groceries', 'eating out', 'transport', 'shopping', 'entertainment', 'bills and services',
+              'general', 'holidays']
+
+seed_spaces = f"""
+    INSERT INTO stg.dim_spaces (space_id, account_uid, space_name, amount, received_at, last_modified)
+    SELECT md5('space-' || i)::UUID, md5('account')::UUID, 'Space ' || i, (i + 1) * 100, now(), now()
+    FROM range({N_SPACES}) AS t(i);
+"""
+
+seed_balance = """
+    INSERT INTO stg.balance (account_uid, balance, balance_with_spaces, received_at, last_modified)
+    VALUES (md5('account')::UUID, 1234.56, 6789.01, now(), now());
+"""
+
+seed_counterparties = """
+    INSERT INTO stg.dim_counterparty (counterparty_name, raw_name, counterparty_uid, counterparty_type, first_seen, last_modified)
+    SELECT 'merchant ' || i, 'MERCHANT ' || i, md5('merchant-' || i), 'MERCHANT', now(), now()
+    FROM range(?) AS t(i);
+"""
+
+# Transactions spread over the last HISTORY_DAYS so the default month filters always hit data
+seed_transactions = f"""
+    INSERT INTO stg.transactions
+        (transaction_id, account_uid, space_id, in_or_out, updated_at, transaction_time, source_type, counter_party_type,
+         counter_party_name, counterparty_key, reference, country, spending_category, currency, amount,
+         user_note, status, data_source, received_at, last_modified, last_modified_by)
+    SELECT
+        md5('tx-' || i)::UUID,
+        md5('account')::UUID,
+        CASE WHEN i % 20 = 0 THEN md5('space-' || (i % {N_SPACES}))::UUID ELSE md5('default')::UUID END,
+        CASE WHEN i % 10 = 0 THEN 'in' ELSE 'out' END,
+        ts,
+        ts,
+        'MASTER_CARD',
+        'MERCHANT',
+        'MERCHANT ' || (i % ?),
+        (i % ?) + 1,
+        'REF ' || i,
+        'GB',
+        list_element(?, (i % {len(CATEGORIES)})::INTEGER + 1),
+        'GBP',
+        ((hash(i) % 10000) / 100)::DECIMAL(10,2) + 0.01,
+        NULL,
+        'SETTLED',
+        'api',
+        ts,
+        now(),
+        'benchmark'
+    FROM (
+        SELECT i, now()::TIMESTAMP - to_seconds((i * 7919) % ({HISTORY_DAYS} * 86400)) AS ts
+        FROM range(?) AS t(i)
+    );
+"""
+
+def build_synthetic_database(directory: Path, transactions: int, counterparties: int) -> Path:
+    """
+    Create a local b_app.duckdb from the DDL manifest, its staging tables filled with synthetic rows.
+
+    The file is named after DATABASE so b_app.sem.spending resolves exactly as it does on MotherDuck.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    db_path = directory / f"{DATABASE}.duckdb"
+    for path in (db_path, db_path.with_suffix(".duckdb.wal")):
+        path.unlink(missing_ok=True)
+
+    with duckdb.connect(str(db_path)) as conn:
+        for ddl_file in ddl_files():
+            conn.execute((DATABASE_DIR / ddl_file).read_text())
+        conn.execute(seed_spaces)
+        conn.execute(seed_balance)
+        conn.execute(seed_counterparties, [counterparties])
+        conn.execute(seed_transactions, [counterparties, counterparties, CATEGORIES, transactions])
+        conn.execute("CHECKPOINT")
+    logger.info(f"Seeded {transactions} transactions over {counterparties} counterparties at {db_path}")
+    return db_path
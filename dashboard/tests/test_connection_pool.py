@@ -0,0 +1,74 @@
+import threading
+import time
+
+import duckdb
+import pytest
+from app.constants import ConnectionPool
+
+def make_pool(**kwargs) -> ConnectionPool:
+    return ConnectionPool(connect=lambda: duckdb.connect(":memory:"), **kwargs)
+
+def test_checkout_runs_queries():
+    pool = make_pool()
+    assert pool.query("SELECT ? + 1 AS n", [41])["n"].tolist() == [42]
+
+def test_returned_cursor_is_reused():
+    pool = make_pool()
+    with pool.cursor() as first:
+        pass
+    with pool.cursor() as second:
+        assert second is first
+    assert len(pool._idle) == 1
+
+def test_concurrent_checkouts_get_their_own_cursor():
+    pool = make_pool(max_size=2)
+    with pool.cursor() as first, pool.cursor() as second:
+        assert first is not second
+    assert len(pool._idle) == 2
+
+@pytest.mark.parametrize("error", [duckdb.Error, ValueError, KeyboardInterrupt])
+def test_failed_block_closes_its_cursor(error):
+    pool = make_pool(max_size=1)
+    with pytest.raises(error):
+        with pool.cursor() as cursor:
+            raise error("boom")
+    with pytest.raises(duckdb.ConnectionException):
+        cursor.execute("SELECT 1")
+    assert pool._idle == []
+    # The slot is released with the cursor
+    with pool.cursor() as replacement:
+        assert replacement is not cursor
+
+def test_idle_cursors_are_evicted():
+    pool = make_pool(idle_timeout=0.01)
+    with pool.cursor() as first:
+        pass
+    time.sleep(0.05)
+    with pool.cursor() as second:
+        assert second is not first
+    with pytest.raises(duckdb.ConnectionException):
+        first.execute("SELECT 1")
+
+def test_acquire_times_out_when_the_pool_is_full():
+    pool = make_pool(max_size=1, acquire_timeout=0.05)
+    with pool.cursor():
+        with pytest.raises(TimeoutError):
+            with pool.cursor():
+                pass
+
+def test_waiting_checkout_gets_the_returned_cursor():
+    pool = make_pool(max_size=1, acquire_timeout=5)
+    checked_out = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.cursor():
+            checked_out.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    checked_out.wait()
+    release.set()
+    assert pool.query("SELECT 1 AS n")["n"].tolist() == [1]
+    holder.join()
@@ -0,0 +1,28 @@
+import plotly.graph_objects as go
+from app.figure_cache import FigureCache
+
+def test_hit_reuses_figure_without_rebuilding():
+    cache = FigureCache(max_entries=2)
+    builds = []
+    build = lambda: builds.append(1) or go.Figure()
+    first = cache.get_or_create(("treemap", "v1", "2024-01", "2024-03"), build)
+    second = cache.get_or_create(("treemap", "v1", "2024-01", "2024-03"), build)
+    assert first is second
+    assert len(builds) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_new_data_version_builds_new_figure():
+    cache = FigureCache(max_entries=2)
+    first = cache.get_or_create(("donut", "v1", "2024-01", "2024-01"), go.Figure)
+    second = cache.get_or_create(("donut", "v2", "2024-01", "2024-01"), go.Figure)
+    assert first is not second
+
+def test_least_recently_used_is_evicted():
+    cache = FigureCache(max_entries=2)
+    cache.get_or_create("a", go.Figure)
+    cache.get_or_create("b", go.Figure)
+    cache.get_or_create("a", go.Figure)
+    cache.get_or_create("c", go.Figure)
+    assert len(cache) == 2
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
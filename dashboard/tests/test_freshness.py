@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+import pytest
+import app.datasets as datasets
+from app.constants import ConnectionPool
+from app.freshness import FreshnessRecorder
+from benchmarks.seed import build_synthetic_database
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+DDL_FILES = ["schema/ops.sql", "tables/ops.transaction_freshness.sql", "tables/ops.freshness_slo.sql"]
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "b_app.duckdb")
+    with duckdb.connect(path) as connection:
+        for ddl_file in DDL_FILES:
+            connection.execute((DATABASE_DIR / ddl_file).read_text())
+        # Two events staged by the run that just ended, one staged by a later run
+        connection.execute("""
+            INSERT INTO ops.transaction_freshness (webhook_event_uid, event_at, landed_at, staged_at) VALUES
+                ('e1', '2025-01-01 10:00:00', '2025-01-01 10:00:02', '2025-01-01 10:00:30'),
+                ('e2', '2025-01-01 10:00:10', '2025-01-01 10:00:11', '2025-01-01 10:00:30'),
+                ('e3', '2025-01-01 10:01:00', '2025-01-01 10:01:01', '2025-01-01 10:01:30');
+        """)
+    return path
+
+def test_events_of_the_refreshed_run_are_served(database):
+    recorder = FreshnessRecorder(lambda: duckdb.connect(database))
+    served = recorder.record(datetime(2025, 1, 1, 10, 0, 45), served_at=datetime(2025, 1, 1, 10, 1, 0))
+    assert served == 2
+    with duckdb.connect(database) as connection:
+        unserved = connection.execute("SELECT webhook_event_uid FROM ops.transaction_freshness WHERE served_at IS NULL").fetchall()
+        slo = dict(connection.execute("SELECT stage, max_s FROM ops.freshness_slo").fetchall())
+    assert unserved == [("e3",)]
+    assert slo == {"event_to_landed": 2, "landed_to_staged": 28, "staged_to_served": 30, "event_to_served": 60}
+
+def test_nothing_new_served_records_no_percentiles(database):
+    recorder = FreshnessRecorder(lambda: duckdb.connect(database))
+    recorder.record(datetime(2025, 1, 1, 10, 0, 45), served_at=datetime(2025, 1, 1, 10, 1, 0))
+    assert recorder.record(datetime(2025, 1, 1, 10, 0, 45), served_at=datetime(2025, 1, 1, 10, 2, 0)) == 0
+    with duckdb.connect(database) as connection:
+        assert connection.execute("SELECT COUNT(DISTINCT computed_at) FROM ops.freshness_slo").fetchone()[0] == 1
+
+def test_refresh_shows_the_percentiles_of_its_own_run(tmp_path, monkeypatch):
+    path = str(build_synthetic_database(tmp_path, transactions=10, counterparties=2))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with duckdb.connect(path) as connection:
+        connection.execute("""INSERT INTO ops.transaction_freshness (webhook_event_uid, event_at, landed_at, staged_at)
+                              VALUES ('e1', ?, ?, ?)""", [now - timedelta(seconds=60), now - timedelta(seconds=50),
+                                                          now - timedelta(seconds=30)])
+    pool = ConnectionPool(lambda: duckdb.connect(path))
+    monkeypatch.setattr(datasets, "get_connection_pool", lambda: pool)
+    datasets.load_data_versions.clear()
+    datasets.load_freshness.clear()
+
+    # The prewarm of version 1 ran before the run's events were served
+    assert datasets.load_datasets(["freshness"], 1)[0]["freshness"].empty
+    datasets._record_freshness(1, FreshnessRecorder(lambda: duckdb.connect(path)), None, now)
+    assert set(datasets.load_datasets(["freshness"], 1)[0]["freshness"]["stage"]) >= {"event_to_served"}
+    pool.close()
@@ -0,0 +1,85 @@
+import duckdb
+import pytest
+from app.replica import ReadReplica
+
+TABLES = {"stg.transactions": "transaction_id", "stg.balance": None}
+
+@pytest.fixture
+def remote(tmp_path):
+    (tmp_path / "remote").mkdir()
+    connection = duckdb.connect(str(tmp_path / "remote" / "b_app.duckdb"))
+    connection.execute("""
+        CREATE SCHEMA stg; CREATE SCHEMA sem;
+        CREATE TABLE stg.transactions (transaction_id UUID, amount DECIMAL(10,2), last_modified DATETIME);
+        CREATE TABLE stg.balance (balance DECIMAL(19,2), last_modified DATETIME);
+        INSERT INTO stg.transactions VALUES
+            ('00000000-0000-0000-0000-000000000001', 10.50, '2024-01-01 10:00'),
+            ('00000000-0000-0000-0000-000000000002', 20.00, '2024-01-02 10:00');
+        INSERT INTO stg.balance VALUES (100.00, '2024-01-02 10:00');
+        CREATE VIEW sem.spending AS SELECT transaction_id, amount FROM b_app.stg.transactions WHERE amount > 0;
+    """)
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def replica(tmp_path, remote):
+    path = str(tmp_path / "remote" / "b_app.duckdb")
+    replica = ReadReplica(tmp_path / "replica", remote_connect=lambda: duckdb.connect(path), tables=TABLES)
+    yield replica
+    replica.close()
+
+def local_query(replica, sql):
+    with replica.connect() as connection:
+        return connection.execute(sql).fetchall()
+
+def test_first_sync_copies_tables_and_views(replica):
+    assert not replica.ready
+    assert replica.sync() == 3
+    assert replica.ready
+    assert local_query(replica, "SELECT SUM(amount) FROM b_app.sem.spending") == [(pytest.approx(30.5),)]
+
+def test_unchanged_source_copies_nothing(replica):
+    replica.sync()
+    assert replica.sync() == 0
+
+def test_only_changed_rows_are_copied(replica, remote):
+    replica.sync()
+    remote.execute("""
+        UPDATE stg.transactions SET amount = 25.00, last_modified = '2024-01-03 10:00'
+        WHERE transaction_id = '00000000-0000-0000-0000-000000000002';
+        INSERT INTO stg.transactions VALUES ('00000000-0000-0000-0000-000000000003', 5.00, '2024-01-03 10:00');
+    """)
+    assert replica.sync() == 2
+    assert local_query(replica, "SELECT COUNT(*), SUM(amount) FROM b_app.sem.spending") == [(3, pytest.approx(40.5))]
+
+def test_deleted_rows_trigger_full_copy(replica, remote):
+    replica.sync()
+    remote.execute("DELETE FROM stg.transactions WHERE transaction_id = '00000000-0000-0000-0000-000000000001'")
+    replica.sync()
+    assert local_query(replica, "SELECT COUNT(*) FROM b_app.stg.transactions") == [(1,)]
+
+def test_failed_sync_keeps_last_good_data(replica):
+    replica.sync()
+
+    def unreachable():
+        raise duckdb.IOException("MotherDuck unreachable")
+
+    replica._remote_connect = unreachable
+    replica.sync_after_run(1)
+    assert local_query(replica, "SELECT COUNT(*) FROM b_app.sem.spending") == [(2,)]
+
+def test_sync_of_named_tables_leaves_the_others(replica, remote):
+    replica.sync()
+    remote.execute("""
+        INSERT INTO stg.transactions VALUES ('00000000-0000-0000-0000-000000000003', 5.00, '2024-01-03 10:00');
+        INSERT INTO stg.balance VALUES (50.00, '2024-01-03 10:00');
+    """)
+    assert replica.sync(["stg.balance"]) == 2
+    assert local_query(replica, "SELECT SUM(balance) FROM b_app.stg.balance") == [(pytest.approx(150.0),)]
+    assert local_query(replica, "SELECT COUNT(*) FROM b_app.stg.transactions") == [(2,)]
+
+def test_reloaded_table_without_key_is_copied_again(replica, remote):
+    replica.sync()
+    remote.execute("UPDATE stg.balance SET balance = 50.00, last_modified = '2024-01-03 10:00'")
+    assert replica.sync() == 1
+    assert local_query(replica, "SELECT balance FROM b_app.stg.balance") == [(pytest.approx(50.0),)]
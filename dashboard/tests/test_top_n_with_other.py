@@ -0,0 +1,26 @@
+import pandas as pd
+from app.analytics import top_n_with_other
+
+def spending():
+    return pd.DataFrame({
+        "spending_category": ["groceries"] * 4 + ["transport"] * 2,
+        "spent_at": ["tesco", "aldi", "lidl", "coop", "tfl", "uber"],
+        "total_amount": [40.0, 30.0, 20.0, 10.0, 5.0, 3.0],
+    })
+
+def test_folds_tail_per_group_and_keeps_totals():
+    reduced = top_n_with_other(spending(), "spent_at", "total_amount", 2, group_cols=["spending_category"])
+    groceries = reduced[reduced["spending_category"] == "groceries"]
+    assert groceries["spent_at"].tolist() == ["tesco", "aldi", "Other (2)"]
+    assert groceries["total_amount"].tolist() == [40.0, 30.0, 30.0]
+    assert reduced[reduced["spending_category"] == "transport"]["spent_at"].tolist() == ["tfl", "uber"]
+    assert reduced["total_amount"].sum() == spending()["total_amount"].sum()
+
+def test_without_groups_sums_duplicates_first():
+    reduced = top_n_with_other(spending(), "spending_category", "total_amount", 1)
+    assert reduced.to_dict("list") == {"spending_category": ["groceries", "Other (1)"], "total_amount": [100.0, 8.0]}
+
+def test_nothing_folded_when_under_n():
+    reduced = top_n_with_other(spending(), "spent_at", "total_amount", 10, group_cols=["spending_category"])
+    assert len(reduced) == 6
+    assert not reduced["spent_at"].str.startswith("Other").any()
@@ -0,0 +1,48 @@
+import duckdb
+import pytest
+from app.queries import transaction_page_query
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect()
+    conn.execute("ATTACH ':memory:' AS b_app")
+    conn.execute("CREATE SCHEMA b_app.sem")
+    conn.execute("""
+        CREATE TABLE b_app.sem.spending AS
+        SELECT
+            md5('tx-' || i)::UUID AS transaction_id,
+            TIMESTAMP '2024-01-01' + to_days((i // 3)::INTEGER) AS transaction_time,
+            'Default' AS space,
+            CASE WHEN i % 2 = 0 THEN 'groceries' ELSE 'eating out' END AS spending_category,
+            i % 5 AS counterparty_key,
+            'Shop ' || (i % 5) AS spent_at,
+            (i % 7)::DECIMAL(10,2) AS amount,
+            NULL AS spending_reference,
+            NULL AS user_note
+        FROM range(30) AS t(i)
+    """)
+    return conn
+
+def read_all_pages(conn, page_size, **filters):
+    rows, after = [], None
+    while True:
+        sql, params = transaction_page_query(after=after, page_size=page_size, **filters)
+        page = conn.execute(sql, params).fetchall()
+        rows.extend(page[:page_size])
+        if len(page) <= page_size:
+            return rows
+        last = page[page_size - 1]
+        after = (last[5] if filters.get("sort", "").endswith("amount") else last[1], last[0])
+
+@pytest.mark.parametrize("sort", ["Newest first", "Oldest first", "Largest amount", "Smallest amount"])
+def test_pages_cover_every_row_once_despite_ties(conn, sort):
+    rows = read_all_pages(conn, page_size=4, sort=sort)
+    assert len(rows) == 30
+    assert len({row[0] for row in rows}) == 30
+
+def test_filters_are_parameterised(conn):
+    sql, params = transaction_page_query(categories=["groceries"], counterparty_key=2, page_size=10)
+    assert "groceries" not in sql
+    assert params == ["groceries", 2]
+    rows = read_all_pages(conn, page_size=2, categories=["groceries"], counterparty_key=2)
+    assert rows and all(row[3] == "groceries" and row[4] == "Shop 2" for row in rows)
@@ -1 +1 @@
-CREATE OR REPLACE INDEX idx_stg_dim_date_key ON stg.dim_date(date_key);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_stg_dim_date_key ON stg.dim_date(date_key);
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- Multi-account ingestion: landing and staging rows carry the Starling account they belong to.
+-- Only needed for databases created before the column, new ones get it from tables/.
+-- Re-run views/ afterwards. Existing rows stay NULL until the next main-pipeline run reloads them.
+ALTER TABLE lnd.transactions_api_pull ADD COLUMN IF NOT EXISTS accountUid UUID;
+ALTER TABLE lnd.spaces ADD COLUMN IF NOT EXISTS accountUid UUID;
+ALTER TABLE lnd.balance ADD COLUMN IF NOT EXISTS accountUid UUID;
+ALTER TABLE stg.transactions ADD COLUMN IF NOT EXISTS account_uid UUID;
+ALTER TABLE stg.dim_spaces ADD COLUMN IF NOT EXISTS account_uid UUID;
+ALTER TABLE stg.balance ADD COLUMN IF NOT EXISTS account_uid UUID;
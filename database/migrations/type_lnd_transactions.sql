@@ -0,0 +1,51 @@
+-- Typed landing transactions: uuids and timestamps are native columns instead of VARCHAR.
+-- Only needed for databases created before the typed tables/lnd.transactions_api_pull.sql, run it
+-- after add_account_uid.sql. The table keeps backfilled history, so its rows are cast into a
+-- typed copy that replaces it rather than being recreated empty. Safe to re-run on a typed table.
+BEGIN TRANSACTION;
+CREATE OR REPLACE TABLE lnd.transactions_api_pull_typed
+    (
+      feedItemUid UUID,
+      accountUid UUID,
+      categoryUid UUID,
+      direction VARCHAR,
+      updatedAt TIMESTAMP,
+      transactionTime TIMESTAMP,
+      settlementTime TIMESTAMP,
+      source VARCHAR,
+      sourceSubType VARCHAR,
+      status VARCHAR,
+      transactingApplicationUserUid VARCHAR,
+      counterPartyType VARCHAR,
+      counterPartyUid VARCHAR,
+      counterPartyName VARCHAR,
+      counterPartySubEntityUid VARCHAR,
+      reference VARCHAR,
+      country VARCHAR,
+      spendingCategory VARCHAR,
+      userNote VARCHAR,
+      hasAttachment BOOLEAN,
+      hasReceipt BOOLEAN,
+      batchPaymentDetails VARCHAR,
+      "amount.currency" VARCHAR,
+      "amount.minorUnits" BIGINT,
+      "sourceAmount.currency" VARCHAR,
+      "sourceAmount.minorUnits" BIGINT,
+      counterPartySubEntityName VARCHAR,
+      counterPartySubEntityIdentifier VARCHAR,
+      counterPartySubEntitySubIdentifier VARCHAR,
+      received_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    );
+INSERT INTO lnd.transactions_api_pull_typed BY NAME
+SELECT * REPLACE (
+    feedItemUid::UUID AS feedItemUid,
+    accountUid::UUID AS accountUid,
+    categoryUid::UUID AS categoryUid,
+    updatedAt::TIMESTAMP AS updatedAt,
+    transactionTime::TIMESTAMP AS transactionTime,
+    settlementTime::TIMESTAMP AS settlementTime
+)
+FROM lnd.transactions_api_pull;
+DROP TABLE lnd.transactions_api_pull;
+ALTER TABLE lnd.transactions_api_pull_typed RENAME TO transactions_api_pull;
+COMMIT;
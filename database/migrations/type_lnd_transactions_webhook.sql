@@ -0,0 +1,57 @@
+-- Typed webhook landing: feedItemUid, categoryUid and accountUid are UUID columns instead of VARCHAR.
+-- Only needed for databases created before the typed tables/lnd.transactions_webhook.sql. Every
+-- webhook event ever received lives here, so its rows are cast into a typed copy that replaces
+-- it. Safe to re-run on a typed table.
+BEGIN TRANSACTION;
+CREATE OR REPLACE TABLE lnd.transactions_webhook_typed (
+    feedItemUid UUID PRIMARY KEY,
+    categoryUid UUID ,
+    accountUid UUID ,
+    amount_currency VARCHAR ,
+    amount_minorUnits INTEGER ,
+    sourceAmount_currency VARCHAR ,
+    sourceAmount_minorUnits INTEGER ,
+    direction VARCHAR ,
+    updatedAt TIMESTAMP ,
+    transactionTime TIMESTAMP ,
+    settlementTime TIMESTAMP ,
+    source VARCHAR ,
+    status VARCHAR ,
+    transactingApplicationUserUid VARCHAR ,
+    counterPartyType VARCHAR ,
+    counterPartyUid VARCHAR ,
+    counterPartyName VARCHAR ,
+    counterPartySubEntityUid VARCHAR,
+    counterPartySubEntityName VARCHAR,
+    counterPartySubEntityIdentifier VARCHAR,
+    counterPartySubEntitySubIdentifier VARCHAR,
+    exchangeRate DOUBLE,
+    totalFeeAmount_currency VARCHAR,
+    totalFeeAmount_minorUnits INTEGER,
+    reference VARCHAR,
+    country VARCHAR,
+    spendingCategory VARCHAR,
+    userNote VARCHAR,
+    roundUp_goalCategoryUid VARCHAR,
+    roundUp_amount_currency VARCHAR,
+    roundUp_amount_minorUnits INTEGER,
+    hasAttachment BOOLEAN ,
+    receiptPresent BOOLEAN ,
+    feedItemFailureReason VARCHAR,
+    sourceUid VARCHAR ,
+    webhookEventUid VARCHAR ,
+    eventTimestamp TIMESTAMP ,
+    accountHolderUid VARCHAR ,
+    last_modified TIMESTAMP,
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO lnd.transactions_webhook_typed BY NAME
+SELECT * REPLACE (
+    feedItemUid::UUID AS feedItemUid,
+    categoryUid::UUID AS categoryUid,
+    accountUid::UUID AS accountUid
+)
+FROM lnd.transactions_webhook;
+DROP TABLE lnd.transactions_webhook;
+ALTER TABLE lnd.transactions_webhook_typed RENAME TO transactions_webhook;
+COMMIT;
@@ -1,4 +1,5 @@
 CREATE TABLE IF NOT EXISTS lnd.balance(
+  accountUid UUID,
   "clearedBalance.currency" VARCHAR,
   "clearedBalance.minorUnits" BIGINT,
   "effectiveBalance.currency" VARCHAR,
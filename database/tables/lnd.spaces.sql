@@ -1,9 +1,11 @@
-CREATE TABLE lnd.spaces(
-  savingsGoalUid VARCHAR,
+-- Landing is truncated and reloaded on every run, so it is safe to recreate with native types.
+CREATE OR REPLACE TABLE lnd.spaces(
+  savingsGoalUid UUID,
+  accountUid UUID,
   "name" VARCHAR,
   sortOrder BIGINT,
   state VARCHAR,
   "totalSaved.currency" VARCHAR,
   "totalSaved.minorUnits" BIGINT,
   received_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);    
\ No newline at end of file
+);    
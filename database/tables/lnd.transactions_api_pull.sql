@@ -1,11 +1,16 @@
+-- The main pipeline reloads the last 13 months on every run, older rows come from historical
+-- backfills (ops.backfill_ledger) and are not reloaded, so the table is no longer recreated.
+-- Columns are typed at load time (app/tasks/landing.py) so staging does not re-parse strings.
+-- Existing VARCHAR tables are retyped by database/migrations/type_lnd_transactions.sql.
 CREATE TABLE IF NOT EXISTS lnd.transactions_api_pull
     (
-      feedItemUid VARCHAR,
-      categoryUid VARCHAR,
+      feedItemUid UUID,
+      accountUid UUID,
+      categoryUid UUID,
       direction VARCHAR,
-      updatedAt VARCHAR,
-      transactionTime VARCHAR,
-      settlementTime VARCHAR,
+      updatedAt TIMESTAMP,
+      transactionTime TIMESTAMP,
+      settlementTime TIMESTAMP,
       source VARCHAR,
       sourceSubType VARCHAR,
       status VARCHAR,
@@ -29,4 +34,4 @@ CREATE TABLE IF NOT EXISTS lnd.transactions_api_pull
       counterPartySubEntityIdentifier VARCHAR,
       counterPartySubEntitySubIdentifier VARCHAR,
       received_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-    );
\ No newline at end of file
+    );
@@ -1,7 +1,9 @@
+-- Ids are typed like lnd.transactions_api_pull so staging and tenant filters do not cast per row.
+-- Existing VARCHAR tables are retyped by database/migrations/type_lnd_transactions_webhook.sql.
 CREATE TABLE IF NOT EXISTS lnd.transactions_webhook (
-    feedItemUid VARCHAR PRIMARY KEY,
-    categoryUid VARCHAR ,
-    accountUid VARCHAR ,
+    feedItemUid UUID PRIMARY KEY,
+    categoryUid UUID ,
+    accountUid UUID ,
     amount_currency VARCHAR ,
     amount_minorUnits INTEGER ,
     sourceAmount_currency VARCHAR ,
@@ -0,0 +1,17 @@
+-- One row per account and window of a historical backfill (orchestrator/app/flows/backfill.py).
+-- A window is marked done in the transaction that lands its rows, so a crashed or timed out
+-- backfill resumes from the windows that are still pending or failed.
+CREATE TABLE IF NOT EXISTS ops.backfill_ledger (
+    backfill_id VARCHAR NOT NULL,
+    tenant_id VARCHAR NOT NULL,
+    account_uid UUID NOT NULL,
+    window_start TIMESTAMP NOT NULL,
+    window_end TIMESTAMP NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'pending',  -- pending, done, failed
+    row_count INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error VARCHAR,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (backfill_id, account_uid, window_start)
+);
@@ -0,0 +1,12 @@
+-- Lag percentiles per hop over the trailing window, one row per stage each time the dashboard serves new events
+CREATE TABLE IF NOT EXISTS ops.freshness_slo (
+    computed_at TIMESTAMP,
+    window_hours INTEGER,
+    stage VARCHAR,
+    events BIGINT,
+    p50_s DOUBLE,
+    p90_s DOUBLE,
+    p99_s DOUBLE,
+    max_s DOUBLE,
+    last_modified TIMESTAMP
+);
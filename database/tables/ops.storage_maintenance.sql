@@ -0,0 +1,15 @@
+-- One row per table per maintenance run, before/after figures show whether a rewrite helped
+CREATE TABLE IF NOT EXISTS ops.storage_maintenance (
+    run_at TIMESTAMP,
+    table_name VARCHAR,
+    action VARCHAR,  -- rewrite, none, or unmeasured when the backend exposes no storage info
+    live_rows BIGINT,
+    row_groups_before INTEGER,
+    row_groups_after INTEGER,
+    fragmentation_before DOUBLE,
+    fragmentation_after DOUBLE,
+    size_bytes_before BIGINT,
+    size_bytes_after BIGINT,
+    scan_ms_before DOUBLE,
+    scan_ms_after DOUBLE
+);
@@ -0,0 +1,7 @@
+-- Owner of every Starling account, the partition key isolating tenants in landing and staging.
+-- The first tenant to see an account owns it, a joint account is loaded once by its owner.
+CREATE TABLE IF NOT EXISTS ops.tenant_accounts (
+    account_uid UUID PRIMARY KEY,
+    tenant_id VARCHAR NOT NULL,
+    claimed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,13 @@
+-- Tenant registry, one row per household member whose Starling token the pipeline runs for.
+-- token_env names the environment variable holding the token, tokens never live in the database.
+-- max_concurrent_runs caps the tenant's bulk runs, refresh_minutes is how often the scheduler
+-- runs its main pipeline. Webhooks are routed by account_holder_uid.
+CREATE TABLE IF NOT EXISTS ops.tenants (
+    tenant_id VARCHAR PRIMARY KEY,
+    account_holder_uid UUID UNIQUE,
+    token_env VARCHAR NOT NULL,
+    max_concurrent_runs INTEGER NOT NULL DEFAULT 1,
+    refresh_minutes INTEGER NOT NULL DEFAULT 1440,
+    active BOOLEAN NOT NULL DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
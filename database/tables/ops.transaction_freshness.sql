@@ -0,0 +1,11 @@
+-- One row per webhook event, how long each hop took from Starling to the dashboard. All times UTC.
+-- event_at: Starling eventTimestamp, landed_at: written to lnd.transactions_webhook,
+-- staged_at: merged into stg.transactions, served_at: first dashboard refresh holding the row
+CREATE TABLE IF NOT EXISTS ops.transaction_freshness (
+    webhook_event_uid VARCHAR PRIMARY KEY,
+    transaction_id UUID,
+    event_at TIMESTAMP,
+    landed_at TIMESTAMP,
+    staged_at TIMESTAMP,
+    served_at TIMESTAMP
+);
@@ -1,4 +1,5 @@
 CREATE TABLE IF NOT EXISTS stg.balance (
+  account_uid UUID,
   balance DECIMAL(19, 2),
   balance_with_spaces DECIMAL(19, 2),
   received_at DATETIME, 
@@ -0,0 +1,13 @@
+-- Counterparty dimension, one row per normalised merchant name.
+-- Built incrementally by the transactions flows; spelling variants of a merchant share one key.
+CREATE SEQUENCE IF NOT EXISTS stg.seq_counterparty_key START 1;
+
+CREATE TABLE IF NOT EXISTS stg.dim_counterparty (
+    counterparty_key INTEGER PRIMARY KEY DEFAULT nextval('stg.seq_counterparty_key'),
+    counterparty_name VARCHAR(250) NOT NULL UNIQUE,
+    raw_name VARCHAR(250),
+    counterparty_uid VARCHAR(100),
+    counterparty_type VARCHAR(250),
+    first_seen DATETIME,
+    last_modified DATETIME
+);
@@ -1,5 +1,6 @@
 CREATE TABLE stg.dim_spaces (
-    space_uuid UUID PRIMARY KEY,
+    space_id UUID PRIMARY KEY,
+    account_uid UUID,
     space_name VARCHAR,
     amount DECIMAL(10,2), 
     received_at DATETIME,
@@ -1,6 +1,7 @@
 CREATE OR REPLACE TABLE stg.transactions
     (
         transaction_id UUID PRIMARY KEY,
+        account_uid UUID,
         space_id UUID NOT NULL,
         in_or_out VARCHAR(10) NOT NULL,
         updated_at DATETIME ,
@@ -8,6 +9,7 @@ CREATE OR REPLACE TABLE stg.transactions
         source_type NVARCHAR(200),
         counter_party_type NVARCHAR(250),
         counter_party_name NVARCHAR(250),
+        counterparty_key INTEGER,
         reference NVARCHAR(250),
         country NVARCHAR(100),
         spending_category NVARCHAR(100),
@@ -18,7 +20,5 @@ CREATE OR REPLACE TABLE stg.transactions
         data_source VARCHAR(100),
         received_at DATETIME,
         last_modified DATETIME,
-        last_modified_by VARCHAR(100),
-
-        FOREIGN KEY (space_id) REFERENCES stg.dim_spaces(space_id)
+        last_modified_by VARCHAR(100)
     );
\ No newline at end of file
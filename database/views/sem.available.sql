@@ -1,5 +1,6 @@
 CREATE OR REPLACE VIEW sem.available AS
 FROM b_app.stg.balance
 SELECT
+	account_uid,
 	balance AS available_budget,
 	balance_with_spaces AS available_total,
\ No newline at end of file
@@ -3,13 +3,18 @@ CREATE OR REPLACE VIEW sem.spending AS
 FROM b_app.stg.transactions t
     LEFT JOIN b_app.stg.dim_spaces s
         ON t.space_id = s.space_id
+    LEFT JOIN b_app.stg.dim_counterparty c
+        ON t.counterparty_key = c.counterparty_key
     LEFT JOIN stg.dim_date d 
         ON t.transaction_time::DATE = d.date_key
 
 SELECT
+    t.transaction_id,
+    t.account_uid,
     COALESCE(s.space_name, 'Default') AS space,
     t.spending_category,
-    t.counter_party_name AS spent_at,
+    t.counterparty_key,
+    COALESCE(c.counterparty_name, t.counter_party_name) AS spent_at,
     t.reference AS spending_reference,
     t.user_note,
     t.amount,
@@ -1,6 +1,9 @@
 from dotenv import load_dotenv
+import duckdb
 import os
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
 from pathlib import Path
 
 load_dotenv()
@@ -8,13 +11,39 @@ load_dotenv()
 APP_DIR = Path(__file__).parent
 
 STARLING_TOKEN = os.getenv('STARLING_TOKEN')
+# Overridable so benchmarks can point the api tasks at benchmarks.starling_server
+STARLING_API_URL = os.getenv('STARLING_API_URL', 'https://api.starlingbank.com')
+# Prefix of the per-tenant Prefect global concurrency limits bulk feed tasks (13 month refresh,
+# backfill windows) hold a slot of, shared by a tenant's flow runs so they stay within its
+# token's rate limit
+STARLING_CONCURRENCY_LIMIT = "starling-api"
+STARLING_MAX_CONCURRENT_REQUESTS = int(os.getenv('STARLING_MAX_CONCURRENT_REQUESTS', 4))
 MOTHERDUCK_TOKEN = os.getenv('MD_TOKEN')
 DATABASE = 'b_app'
+# Environment variable pointing at a local b_app.duckdb file, used instead of MotherDuck
+# by offline benchmarks. Read on every connect so a benchmark can switch files.
+LOCAL_DUCKDB_ENV = 'ORCHESTRATOR_DUCKDB_PATH'
 
 def get_md_engine():
     """Create and return a new MotherDuck engine instance."""
+    local_path = os.getenv(LOCAL_DUCKDB_ENV)
+    if local_path:
+        # No pooled connections left open, native connections to the same file would conflict
+        return create_engine(f'duckdb:///{local_path}', poolclass=NullPool)
     return create_engine(f'duckdb:///md:{DATABASE}?motherduck_token={MOTHERDUCK_TOKEN}')
 
+# Connections to one database share an instance. Two threads opening the first one at once
+# race on registering pandas_scan, so per-account tasks open their connections one at a time.
+_connect_lock = threading.Lock()
+
+def get_md_connection():
+    """Create and return a native MotherDuck connection, used for columnar landing loads."""
+    local_path = os.getenv(LOCAL_DUCKDB_ENV)
+    with _connect_lock:
+        if local_path:
+            return duckdb.connect(local_path)
+        return duckdb.connect(f'md:{DATABASE}?motherduck_token={MOTHERDUCK_TOKEN}')
+
 #landing
 LANDING_SCHEMA = "lnd"
 TRANSACTIONS_LANDING_TABLE = "transactions_api_pull"
@@ -26,6 +55,36 @@ STAGING_SCHEMA = "stg"
 TRANSACTIONS_STAGING_TABLE = "transactions"
 SPACES_STAGING_TABLE = "dim_spaces"
 BALANCE_STAGING_TABLE = "balance"
+COUNTERPARTY_STAGING_TABLE = "dim_counterparty"
+#prefect variables holding the last staged api payload hash, suffixed with the account uid
+SPACES_HASH_VARIABLE = "spaces_payload_hash"
+BALANCE_HASH_VARIABLE = "balance_payload_hash"
+#ops
+OPS_SCHEMA = "ops"
+STORAGE_MAINTENANCE_TABLE = "storage_maintenance"
+FRESHNESS_TABLE = "transaction_freshness"
+TENANTS_TABLE = "tenants"
+TENANT_ACCOUNTS_TABLE = "tenant_accounts"
+BACKFILL_LEDGER_TABLE = "backfill_ledger"
+
+#tenants
+# Runs without a registered tenant use STARLING_TOKEN, as before the registry existed
+DEFAULT_TENANT = "default"
+DEFAULT_TOKEN_ENV = "STARLING_TOKEN"
+TENANT_TAG = "tenant:{tenant_id}"
+# Flow runs the served deployments execute at once, shared by every tenant
+PIPELINE_RUN_SLOTS = int(os.getenv('PIPELINE_RUN_SLOTS', 8))
+# Bulk runs (main pipeline, backfills) across all tenants, kept below PIPELINE_RUN_SLOTS so
+# webhook runs always find a free slot
+TENANT_BULK_SLOTS = int(os.getenv('TENANT_BULK_SLOTS', 3))
+TENANT_BULK_LIMIT = "tenant-bulk"
+
+#backfill
+# Months of history the main pipeline re-pulls on every run, older landing rows come from backfills
+TRANSACTIONS_REFRESH_MONTHS = 13
+BACKFILL_WINDOW_DAYS = 30
+# Windows of one backfill loading at once, their requests still share the tenant's api limit
+BACKFILL_PARALLEL_WINDOWS = int(os.getenv('BACKFILL_PARALLEL_WINDOWS', 4))
 
 
 
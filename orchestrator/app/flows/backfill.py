@@ -0,0 +1,58 @@
+from prefect import flow
+from prefect.futures import wait
+from prefect.task_runners import ThreadPoolTaskRunner
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.constants import DEFAULT_TENANT, BACKFILL_WINDOW_DAYS, BACKFILL_PARALLEL_WINDOWS
+from app.flows.transactions import insert_to_staging
+from app.tasks.api_calls import get_account_uids, refresh_window_start
+from app.tasks.backfill import naive_utc, make_backfill_id, split_windows, plan_backfill, backfill_window, \
+    backfill_progress
+from app.tasks.tenants import bulk_lane
+
+logger = logging.getLogger(__name__)
+
+@flow(name="historical-backfill", log_prints=True, description="Resumable backfill of landing transactions over a date range, window by window",
+      timeout_seconds=14400, task_runner=ThreadPoolTaskRunner(max_workers=BACKFILL_PARALLEL_WINDOWS))
+def historical_backfill(start: datetime, end: Optional[datetime] = None, window_days: int = BACKFILL_WINDOW_DAYS,
+                        tenant_id: str = DEFAULT_TENANT, backfill_id: Optional[str] = None):
+    """
+    Land the tenant's transactions from start to end, by default up to the main pipeline's
+    refresh window, then rebuild its staging.
+
+    Progress is kept per account and window in ops.backfill_ledger. Rerunning with the same
+    range (or backfill_id) after a crash, timeout or failed windows loads only what is not done.
+    """
+    start = naive_utc(start)
+    end = naive_utc(end or refresh_window_start())
+    if start >= end:
+        logger.error(f"Backfill start {start} is not before its end {end}")
+        raise ValueError("Backfill start must be before its end")
+    backfill_id = backfill_id or make_backfill_id(tenant_id, start, end, window_days)
+
+    with bulk_lane(tenant_id):
+        account_uids = get_account_uids(tenant_id)
+        open_windows = plan_backfill(backfill_id, tenant_id, account_uids, split_windows(start, end, window_days))
+        if open_windows:
+            account_column, start_column, end_column = (list(column) for column in zip(*open_windows))
+            futures = backfill_window.map(account_column, start_column, end_column,
+                                          backfill_id=backfill_id, tenant_id=tenant_id)
+            wait(futures)
+            # Done windows are complete, stage them even when others failed
+            if any(future.state.is_completed() for future in futures):
+                insert_to_staging(tenant_id)
+
+    progress = backfill_progress(backfill_id)
+    logger.info(f"Backfill {backfill_id}: " + ", ".join(f"{status} {windows} windows ({rows} rows)"
+                                                         for status, (windows, rows) in sorted(progress.items())))
+    unfinished = sum(windows for status, (windows, _) in progress.items() if status != "done")
+    if unfinished:
+        logger.error(f"Backfill {backfill_id}: {unfinished} windows not loaded, rerun with the same range to resume")
+        raise RuntimeError(f"Backfill {backfill_id} incomplete, {unfinished} windows left")
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging()
+    historical_backfill(datetime(2020, 1, 1))
@@ -1,28 +1,38 @@
 from prefect import flow
 import logging
+from typing import Dict
 
-from app.tasks.api_calls import upload_balance, get_account_details
-from app.tasks.sql import execute_raw_sql , execute_transaction, truncate_lnd_balance , truncate_stg_balance, insert_balance_to_staging
+from app.constants import BALANCE_HASH_VARIABLE, DEFAULT_TENANT
+from app.tasks.api_calls import upload_balance, get_account_uids, record_payload_hash, account_hash_variable
+from app.tasks.sql import execute_transaction, delete_stg_balance_for_tenant, insert_balance_to_staging
 
 logger = logging.getLogger(__name__)
 
 @flow(name="refresh-lnd-balance", log_prints=True, description="Full refresh of landing balance table via api call",timeout_seconds=180)     
-def refresh_lnd_balance():
-    account_uid = get_account_details('accountUid')
-    execute_raw_sql(truncate_lnd_balance, label="Trunacate Landing Balance")
-    upload_balance(account_uid)
+def refresh_lnd_balance(force: bool = False, tenant_id: str = DEFAULT_TENANT) -> Dict[str, str]:
+    """Reload the tenant's accounts in parallel, returns the new payload hash of each account that changed."""
+    account_uids = get_account_uids(tenant_id)
+    hash_variables = [account_hash_variable(BALANCE_HASH_VARIABLE, uid) for uid in account_uids]
+    futures = upload_balance.map(account_uids, hash_variables, force=force, tenant_id=tenant_id)
+    digests = dict(zip(account_uids, futures.result()))
+    return {uid: digest for uid, digest in digests.items() if digest is not None}
     
 @flow(name="insert-balance-to-staging", log_prints=True, description="Insert balance from landing to staging Table",timeout_seconds=180)
-def insert_to_balance_staging():
+def insert_to_balance_staging(tenant_id: str = DEFAULT_TENANT):
     execute_transaction([
-        (truncate_stg_balance , "truncate stg.balance "),
+        (delete_stg_balance_for_tenant , "delete tenant stg.balance"),
         (insert_balance_to_staging, "insert balance to staging from landing")
-    ], label="balance to staging transaction")
+    ], label="balance to staging transaction", params={"tenant_id": tenant_id})
     
 @flow(name="pipe-balance-lnd-to-stg", log_prints=True, description="Pipeline: balance from lnd to stg",timeout_seconds=360)    
-def balance_dag():
-    refresh_lnd_balance()
-    insert_to_balance_staging()
+def balance_dag(force: bool = False, tenant_id: str = DEFAULT_TENANT):
+    digests = refresh_lnd_balance(force, tenant_id)
+    if not digests:
+        logger.info("Balance unchanged for every account, skipping staging")
+        return
+    insert_to_balance_staging(tenant_id)
+    for account_uid, digest in digests.items():
+        record_payload_hash(account_hash_variable(BALANCE_HASH_VARIABLE, account_uid), digest)
     
 if __name__ == "__main__":
     from app.utils.logging_config import setup_logging
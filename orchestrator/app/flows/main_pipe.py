@@ -1,26 +1,38 @@
 from prefect import flow, serve
 import logging
+from typing import Optional
 
 from app.flows.balance import balance_dag
 from app.flows.spaces import spaces_dag
 from app.flows.transactions import transactions_dag, insert_webhook_to_staging
+from app.flows.maintenance import storage_maintenance
+from app.flows.scheduler import tenant_scheduler
+from app.flows.backfill import historical_backfill
+from app.constants import DEFAULT_TENANT, PIPELINE_RUN_SLOTS
+from app.tasks.tenants import bulk_lane, load_tenants, sync_tenant_limits
+from app.utils.tracing import setup_tracing
 
 
 logger = logging.getLogger(__name__)
+# Flow runs execute in worker subprocesses that import this module, set up their exporters here
+setup_tracing()
 
 @flow(name="webhook-pipeline", log_prints=True, description="Main pipeline to orchestrate all data flows",timeout_seconds=1800)
-def webhook_pipeline():
-    logger.info("Starting webhook pipeline")
-    balance_dag()
-    spaces_dag()
-    insert_webhook_to_staging()
+def webhook_pipeline(traceparent: Optional[str] = None, tenant_id: str = DEFAULT_TENANT):
+    # The webhook also sets the run's trace label, which parents this run's spans on its
+    # request trace, the parameter keeps the originating trace visible on the run itself
+    logger.info(f"Starting webhook pipeline for tenant {tenant_id}, traceparent: {traceparent}")
+    balance_dag(tenant_id=tenant_id)
+    spaces_dag(tenant_id=tenant_id)
+    insert_webhook_to_staging(tenant_id)
     
 @flow(name="main-pipeline", log_prints=True, description="Main pipeline to orchestrate all data flows",timeout_seconds=7200)
-def main_pipeline():
-    logger.info("Starting main pipeline")
-    transactions_dag()
-    balance_dag()
-    spaces_dag()
+def main_pipeline(tenant_id: str = DEFAULT_TENANT):
+    logger.info(f"Starting main pipeline for tenant {tenant_id}")
+    with bulk_lane(tenant_id):
+        transactions_dag(tenant_id)
+        balance_dag(tenant_id=tenant_id)
+        spaces_dag(tenant_id=tenant_id)
 
 
 if __name__ == "__main__":
@@ -55,4 +67,27 @@ if __name__ == "__main__":
             description="webhook pipeline to orchestrate webhook transactions, balance, and spaces dags",
             version="1.0.0",
             )
-    serve(main, webhook)
\ No newline at end of file
+    maintenance = storage_maintenance.to_deployment(
+            name="storage-maintenance",
+            tags=["banking-app", "dev"],
+            description="Nightly fragmentation check and table rewrites for truncate/insert churn",
+            version="1.0.0",
+            cron="0 3 * * *",
+            )
+    scheduler = tenant_scheduler.to_deployment(
+            name="tenant-scheduler",
+            tags=["banking-app", "dev"],
+            description="Queues main pipeline runs of due tenants, least recently refreshed first",
+            version="1.0.0",
+            cron="*/10 * * * *",
+            )
+    backfill = historical_backfill.to_deployment(
+            name="historical-backfill",
+            tags=["banking-app", "dev"],
+            description="Run on demand with a start date, rerun with the same range to resume",
+            version="1.0.0",
+            )
+    # Prefect skips missing limits instead of enforcing them, create them before serving
+    sync_tenant_limits(load_tenants())
+    # One pool of run slots shared by every tenant, bulk runs are capped below it
+    serve(main, webhook, maintenance, scheduler, backfill, limit=PIPELINE_RUN_SLOTS)
\ No newline at end of file
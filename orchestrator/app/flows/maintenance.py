@@ -0,0 +1,63 @@
+from prefect import flow
+from datetime import datetime, timezone
+import logging
+
+from app.constants import LANDING_SCHEMA, STAGING_SCHEMA, TRANSACTIONS_LANDING_TABLE, TRANSACTIONS_WEBHOOK_LANDING_TABLE, \
+    SPACES_LANDING_TABLE, BALANCE_LANDING_TABLE, TRANSACTIONS_STAGING_TABLE, SPACES_STAGING_TABLE, BALANCE_STAGING_TABLE
+from app.tasks.maintenance import measure_table, rewrite_table, checkpoint_database, record_maintenance
+
+logger = logging.getLogger(__name__)
+
+# Tables rewritten by truncate/insert or upserts on every pipeline run
+MAINTENANCE_TABLES = [
+    f"{LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}",
+    f"{LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}",
+    f"{LANDING_SCHEMA}.{SPACES_LANDING_TABLE}",
+    f"{LANDING_SCHEMA}.{BALANCE_LANDING_TABLE}",
+    f"{STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE}",
+    f"{STAGING_SCHEMA}.{SPACES_STAGING_TABLE}",
+    f"{STAGING_SCHEMA}.{BALANCE_STAGING_TABLE}",
+]
+
+@flow(name="storage-maintenance", log_prints=True, description="Measure table fragmentation and rewrite tables over the threshold",timeout_seconds=1800)
+def storage_maintenance(tables: list[str] = MAINTENANCE_TABLES, fragmentation_threshold: float = 0.5):
+    run_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    before = {table: measure_table(table) for table in tables}
+    # Without storage info a fragmented table looks the same as a healthy one, never let that pass silently
+    unmeasured = [table for table, metrics in before.items() if metrics["fragmentation"] is None]
+    if unmeasured:
+        logger.error(f"Storage info unavailable, {len(unmeasured)} of {len(tables)} tables cannot be "
+                     f"checked for fragmentation: {unmeasured}")
+
+    rewritten = []
+    for table, metrics in before.items():
+        if metrics["fragmentation"] is not None and metrics["fragmentation"] >= fragmentation_threshold:
+            rewrite_table(table)
+            rewritten.append(table)
+    logger.info(f"Rewrote {len(rewritten)} of {len(tables)} tables: {rewritten}")
+
+    checkpoint_database()
+    after = {table: measure_table(table) for table in tables}
+
+    record_maintenance([
+        {
+            "run_at": run_at,
+            "table_name": table,
+            "action": "rewrite" if table in rewritten else "unmeasured" if table in unmeasured else "none",
+            "live_rows": after[table]["live_rows"],
+            "row_groups_before": before[table]["row_groups"],
+            "row_groups_after": after[table]["row_groups"],
+            "fragmentation_before": before[table]["fragmentation"],
+            "fragmentation_after": after[table]["fragmentation"],
+            "size_bytes_before": before[table]["size_bytes"],
+            "size_bytes_after": after[table]["size_bytes"],
+            "scan_ms_before": before[table]["scan_ms"],
+            "scan_ms_after": after[table]["scan_ms"],
+        }
+        for table in tables
+    ])
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging()
+    storage_maintenance()
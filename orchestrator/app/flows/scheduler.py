@@ -0,0 +1,75 @@
+from prefect import flow, get_client
+from prefect.client.schemas.filters import FlowRunFilter, FlowRunFilterDeploymentId, FlowRunFilterState, \
+    FlowRunFilterStateType
+from prefect.client.schemas.objects import StateType
+from prefect.client.schemas.sorting import FlowRunSort
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from app.constants import DEFAULT_TENANT, TENANT_TAG, TENANT_BULK_SLOTS
+from app.tasks.tenants import Tenant, load_tenants, sync_tenant_limits
+
+logger = logging.getLogger(__name__)
+
+MAIN_DEPLOYMENT = "main-pipeline/main-pipeline"
+# Runs holding a bulk lane, a main run queued behind one would wait inside its serve slot
+BULK_DEPLOYMENTS = [MAIN_DEPLOYMENT, "historical-backfill/historical-backfill"]
+IN_FLIGHT_STATES = [StateType.SCHEDULED, StateType.PENDING, StateType.RUNNING]
+# Completed main runs read back to find each tenant's last refresh, the most the api returns per page
+REFRESH_HISTORY = 200
+
+def pick_due_tenants(tenants: List[Tenant], in_flight: Counter, last_refreshed: Dict[str, datetime],
+                     free_slots: int, now: datetime) -> List[Tenant]:
+    """
+    Fair queue of main pipeline runs.
+
+    A tenant is due once refresh_minutes have passed since its last completed run and it
+    has no bulk run (main pipeline or backfill) in flight. Due tenants are served least recently refreshed first, as many as
+    there are free bulk slots, so a busy tenant waits its turn instead of jumping the queue.
+    """
+    never = datetime.min.replace(tzinfo=timezone.utc)
+    due = [
+        tenant for tenant in tenants
+        if tenant.active and not in_flight[tenant.tenant_id]
+        and now - last_refreshed.get(tenant.tenant_id, never) >= timedelta(minutes=tenant.refresh_minutes)
+    ]
+    due.sort(key=lambda tenant: last_refreshed.get(tenant.tenant_id, never))
+    return due[:max(free_slots, 0)]
+
+@flow(name="tenant-scheduler", log_prints=True, description="Queue main pipeline runs of due tenants fairly",timeout_seconds=300)
+def tenant_scheduler():
+    tenants = load_tenants()
+    sync_tenant_limits(tenants)
+    with get_client(sync_client=True) as client:
+        deployment = client.read_deployment_by_name(MAIN_DEPLOYMENT)
+        bulk_deployment_ids = [client.read_deployment_by_name(name).id for name in BULK_DEPLOYMENTS]
+        in_flight_runs = client.read_flow_runs(flow_run_filter=FlowRunFilter(
+            deployment_id=FlowRunFilterDeploymentId(any_=bulk_deployment_ids),
+            state=FlowRunFilterState(type=FlowRunFilterStateType(any_=IN_FLIGHT_STATES))))
+        completed_runs = client.read_flow_runs(flow_run_filter=FlowRunFilter(
+            deployment_id=FlowRunFilterDeploymentId(any_=[deployment.id]),
+            state=FlowRunFilterState(type=FlowRunFilterStateType(any_=[StateType.COMPLETED]))),
+            sort=FlowRunSort.END_TIME_DESC, limit=REFRESH_HISTORY)
+
+        in_flight = Counter(run.parameters.get("tenant_id", DEFAULT_TENANT) for run in in_flight_runs)
+        last_refreshed: Dict[str, datetime] = {}
+        for run in completed_runs:
+            last_refreshed.setdefault(run.parameters.get("tenant_id", DEFAULT_TENANT), run.end_time)
+
+        free_slots = TENANT_BULK_SLOTS - sum(in_flight.values())
+        picked = pick_due_tenants(tenants, in_flight, last_refreshed, free_slots, datetime.now(timezone.utc))
+        for tenant in picked:
+            client.create_flow_run_from_deployment(
+                deployment.id,
+                parameters={"tenant_id": tenant.tenant_id},
+                tags=[TENANT_TAG.format(tenant_id=tenant.tenant_id)],
+            )
+    logger.info(f"Queued main pipeline for {[tenant.tenant_id for tenant in picked]}, "
+                f"{sum(in_flight.values())} runs in flight, {max(free_slots, 0)} bulk slots were free")
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging()
+    tenant_scheduler()
@@ -1,28 +1,38 @@
 from prefect import flow
 import logging
+from typing import Dict
 
-from app.tasks.api_calls import upload_spaces, get_account_details
-from app.tasks.sql import execute_raw_sql, execute_transaction, truncate_lnd_spaces , truncate_stg_spaces, insert_spaces_to_staging
+from app.constants import SPACES_HASH_VARIABLE, DEFAULT_TENANT
+from app.tasks.api_calls import upload_spaces, get_account_uids, record_payload_hash, account_hash_variable
+from app.tasks.sql import execute_transaction, delete_stg_spaces_for_tenant, insert_spaces_to_staging
 
 logger = logging.getLogger(__name__)
 
 @flow(name="refresh-landing-spaces", log_prints=True, description="Full refresh of landing spaces table via api call",timeout_seconds=180)     
-def refresh_lnd_spaces():
-    account_uid = get_account_details('accountUid')
-    execute_raw_sql(truncate_lnd_spaces, label="Trunacate Landing Spaces")
-    upload_spaces(account_uid)
+def refresh_lnd_spaces(force: bool = False, tenant_id: str = DEFAULT_TENANT) -> Dict[str, str]:
+    """Reload the tenant's accounts in parallel, returns the new payload hash of each account that changed."""
+    account_uids = get_account_uids(tenant_id)
+    hash_variables = [account_hash_variable(SPACES_HASH_VARIABLE, uid) for uid in account_uids]
+    futures = upload_spaces.map(account_uids, hash_variables, force=force, tenant_id=tenant_id)
+    digests = dict(zip(account_uids, futures.result()))
+    return {uid: digest for uid, digest in digests.items() if digest is not None}
     
 @flow(name="insert-spaces-to-staging", log_prints=True, description="Insert spaces from landing to staging Table",timeout_seconds=180)
-def insert_to_spaces_staging():
+def insert_to_spaces_staging(tenant_id: str = DEFAULT_TENANT):
     execute_transaction([
-        (truncate_stg_spaces , "truncate stg.spaces "),
+        (delete_stg_spaces_for_tenant , "delete tenant stg.spaces"),
         (insert_spaces_to_staging, "insert spaces to staging from landing")
-    ], label="spaces to staging table")
+    ], label="spaces to staging table", params={"tenant_id": tenant_id})
     
 @flow(name="pipe-spaces-lnd-to-stg", log_prints=True, description="Pipeline: spaces from lnd to stg",timeout_seconds=360)    
-def spaces_dag():
-    refresh_lnd_spaces()
-    insert_to_spaces_staging()
+def spaces_dag(force: bool = False, tenant_id: str = DEFAULT_TENANT):
+    digests = refresh_lnd_spaces(force, tenant_id)
+    if not digests:
+        logger.info("Spaces unchanged for every account, skipping staging")
+        return
+    insert_to_spaces_staging(tenant_id)
+    for account_uid, digest in digests.items():
+        record_payload_hash(account_hash_variable(SPACES_HASH_VARIABLE, account_uid), digest)
     
 if __name__ == "__main__":
     from app.utils.logging_config import setup_logging
@@ -1,32 +1,43 @@
 from prefect import flow
 import logging
 
-from app.tasks.api_calls import upload_13m_transactions,get_account_details
-from app.tasks.sql import execute_raw_sql, execute_transaction, truncate_lnd_transactions, truncate_stg_transactions , insert_transactions_to_staging, insert_webhook_transactions_to_staging
+from app.constants import DEFAULT_TENANT
+from app.tasks.api_calls import upload_13m_transactions, get_account_uids, refresh_window_start
+from app.tasks.sql import execute_raw_sql, execute_transaction, delete_lnd_transactions_for_tenant_since, delete_stg_transactions_for_tenant , insert_transactions_to_staging, insert_webhook_transactions_to_staging, \
+    upsert_counterparties_from_api, upsert_counterparties_from_webhook, record_webhook_freshness
 
 logger = logging.getLogger(__name__)
 
-@flow(name="refresh-landing-transactions", log_prints=True, description="Full refresh of landing transactions Table via api call",timeout_seconds=180)            
-def refresh_lnd_transactions():
-    execute_raw_sql(truncate_lnd_transactions, label="Truncate Landing Transactions Table")
-    account_uid = get_account_details('accountUid')
-    upload_13m_transactions(account_uid)
+@flow(name="refresh-landing-transactions", log_prints=True, description="Refresh of the last 13 months of landing transactions via api call",timeout_seconds=180)            
+def refresh_lnd_transactions(tenant_id: str = DEFAULT_TENANT):
+    # Accounts are claimed first, the delete clears the tenant's partition only and keeps
+    # backfilled history from before the refresh window
+    account_uids = get_account_uids(tenant_id)
+    since = refresh_window_start()
+    execute_raw_sql(delete_lnd_transactions_for_tenant_since, label="Delete Tenant Landing Transactions",
+                    params={"tenant_id": tenant_id, "since": since.replace(tzinfo=None)})
+    upload_13m_transactions.map(account_uids, tenant_id=tenant_id, since=since).result()
     
 @flow(name="insert-transactions-to-staging-api", log_prints=True, description="Insert transactions from API landing to staging Table",timeout_seconds=180)
-def insert_to_staging():
+def insert_to_staging(tenant_id: str = DEFAULT_TENANT):
     execute_transaction([
-        (truncate_stg_transactions , "Truncate Staging Transactions Table "),
+        (delete_stg_transactions_for_tenant , "Delete Tenant Staging Transactions"),
+        (upsert_counterparties_from_api, "Add new counterparties from landing"),
         (insert_transactions_to_staging, "Insert transactions to staging from landing")
-    ], label="spaces to staging table")
+    ], label="spaces to staging table", params={"tenant_id": tenant_id})
     
 @flow(name="pipe-transactions-lnd-to-stg-api", log_prints=True, description="Pipeline: transaction from lnd to stg",timeout_seconds=360)    
-def transactions_dag():
-    refresh_lnd_transactions()
-    insert_to_staging()
+def transactions_dag(tenant_id: str = DEFAULT_TENANT):
+    refresh_lnd_transactions(tenant_id)
+    insert_to_staging(tenant_id)
     
 @flow(name="insert-transactions-to-staging-webhook", log_prints=True, description="Insert transactions from webhook landing to staging Table",timeout_seconds=60)
-def insert_webhook_to_staging():
-    execute_raw_sql(insert_webhook_transactions_to_staging, label="Merge webhook transactions")
+def insert_webhook_to_staging(tenant_id: str = DEFAULT_TENANT):
+    execute_transaction([
+        (upsert_counterparties_from_webhook, "Add new counterparties from webhook landing"),
+        (record_webhook_freshness, "Record webhook event freshness"),
+        (insert_webhook_transactions_to_staging, "Merge webhook transactions")
+    ], label="webhook transactions to staging", params={"tenant_id": tenant_id})
     
 if __name__ == "__main__":
     from app.utils.logging_config import setup_logging
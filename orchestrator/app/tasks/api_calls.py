@@ -1,27 +1,57 @@
 import requests
 import logging
-from typing import Any, Dict, List , Generator, Tuple
+import hashlib
+import json
+from typing import Any, Dict, List , Generator, Iterator, Tuple, Optional
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
-import pandas as pd
-from sqlalchemy import inspect
 
 from prefect import task, flow
+from prefect.concurrency.sync import concurrency
+from prefect.variables import Variable
 
-from app.constants import get_md_engine
-from app.constants import LANDING_SCHEMA, TRANSACTIONS_LANDING_TABLE ,STARLING_TOKEN ,SPACES_LANDING_TABLE, BALANCE_LANDING_TABLE
-from app.tasks.sql import execute_raw_sql, truncate_lnd_transactions , truncate_lnd_spaces
+from app.constants import get_md_connection
+from app.constants import TRANSACTIONS_LANDING_TABLE ,STARLING_API_URL ,SPACES_LANDING_TABLE, BALANCE_LANDING_TABLE, \
+    BALANCE_HASH_VARIABLE, DEFAULT_TENANT, TRANSACTIONS_REFRESH_MONTHS
+from app.tasks.sql import delete_lnd_spaces_for_account, delete_lnd_balance_for_account
+from app.tasks.tenants import get_tenant, claim_accounts
+from app.tasks.landing import to_typed_batch, load_typed_batch, with_account, TRANSACTIONS_LANDING_COLUMNS, \
+    SPACES_LANDING_COLUMNS, BALANCE_LANDING_COLUMNS
 
 logger = logging.getLogger(__name__)
 
-@task(task_run_name="get_account_details-{detail}")
-def get_account_details(detail: str = None ,api_key: str = STARLING_TOKEN) -> List[Dict[str, Any]]:
-    url = "https://api.starlingbank.com/api/v2/accounts"
+# ==============================================================================
+# STARLING API
+# ==============================================================================
+def starling_get(path: str, tenant_id: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    """GET a Starling api path with the tenant's token, callers hold the tenant's api_slot."""
     headers = {
-        "Authorization": f"Bearer {api_key}",
+        "Authorization": f"Bearer {get_tenant(tenant_id).token()}",
         "Accept": "application/json"
     }
-    response = requests.get(url, headers=headers)
+    return requests.get(f"{STARLING_API_URL}{path}", headers=headers, params=params)
+
+@contextmanager
+def api_slot(tenant_id: str) -> Iterator[None]:
+    """
+    Hold a slot of the tenant's api limit while a bulk task pages through the feed.
+
+    Fanned out accounts, backfill windows and concurrent flow runs on every worker stay within
+    the token's rate limit. Taken once per task rather than per request, the first acquisition
+    of a task run costs about 2 s on the Prefect server, far longer than the request it guards.
+    Single requests (accounts, spaces, balance) take none, so webhook runs never pay for it.
+    """
+    with concurrency(get_tenant(tenant_id).api_limit, occupy=1):
+        yield
+
+def account_hash_variable(hash_variable: str, account_uid: str) -> str:
+    """Prefect variable holding the last staged payload hash of one account."""
+    return f"{hash_variable}-{account_uid}"
+
+@task(task_run_name="get_account_details-{detail}")
+def get_account_details(detail: str = None ,tenant_id: str = DEFAULT_TENANT) -> List[Dict[str, Any]]:
+    response = starling_get("/api/v2/accounts", tenant_id)
     if response.status_code == 200:
         response = response.json()
         logging.info("Fetched account details successfully.")
@@ -37,30 +67,46 @@ def get_account_details(detail: str = None ,api_key: str = STARLING_TOKEN) -> Li
         logging.error(f"Error {response.status_code}: {response.text}")
         response.raise_for_status()
 
+@task(task_run_name="get_account_uids-{tenant_id}")
+def get_account_uids(tenant_id: str = DEFAULT_TENANT) -> List[str]:
+    """Accounts of the tenant's token holder (primary, joint, additional, business) that the tenant owns."""
+    account_uids = [account["accountUid"] for account in get_account_details.fn(tenant_id=tenant_id)]
+    if not account_uids:
+        logger.error("No accounts returned by the api")
+        raise ValueError("No accounts found")
+    owned = claim_accounts(tenant_id, account_uids)
+    logger.info(f"Tenant {tenant_id} owns {len(owned)} of {len(account_uids)} accounts")
+    return owned
+
 @task(task_run_name="get_transactions-from:{from_timestamp}-to:{to_timestamp}")
 def get_transactions(
     account_uid : str,
     from_timestamp : datetime, 
     to_timestamp : datetime, 
-    api_key : str =STARLING_TOKEN
+    tenant_id : str = DEFAULT_TENANT
 ) -> List[Dict[str, Any]]:
     
-    url = f"https://api.starlingbank.com/api/v2/feed/account/{account_uid}/settled-transactions-between" 
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Accept': 'application/json'
-    }  
     params = {
         'minTransactionTimestamp': from_timestamp,  
         'maxTransactionTimestamp': to_timestamp
     }
-    response = requests.get(url, headers=headers, params=params)
+    response = starling_get(f"/api/v2/feed/account/{account_uid}/settled-transactions-between", tenant_id, params)
     if response.status_code == 200:
         return response.json().get("feedItems", [])
     else:
         logging.error(f"Error {response.status_code}: {response.text}")
         response.raise_for_status()
 
+def api_timestamp(value: datetime) -> str:
+    """Starling's timestamp format, millisecond precision in UTC."""
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def refresh_window_start(months: int = TRANSACTIONS_REFRESH_MONTHS) -> datetime:
+    """First month the main pipeline re-pulls, everything landed from here on is replaced."""
+    start = datetime.now(timezone.utc) - relativedelta(months=months)
+    return start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
 @task        
 def generate_monthly_ranges(
     start: datetime,
@@ -72,85 +118,90 @@ def generate_monthly_ranges(
     current = start.replace(day=1, tzinfo=timezone.utc)
     while current < end:
         next_month = current + relativedelta(months=1)
-        yield (
-            current.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
-            min(next_month, end).isoformat(timespec="milliseconds").replace("+00:00", "Z")
-        )
+        yield api_timestamp(current), api_timestamp(min(next_month, end))
         current = next_month
 
-@task            
-def clean_transactions(df: pd.DataFrame, existing_cols: list):
-    # Keep only columns that exist in the table
-    try:
-        df = df[[c for c in df.columns if c in existing_cols]]
-        return df
-    except KeyError as e:
-        logger.error(f"Error cleaning transactions: {e}")
-        return pd.DataFrame(columns=existing_cols)
-
-@task    
-def upload_13m_transactions(account_uid: str, months: int = 13):
+@task(task_run_name="upload_13m_transactions-{account_uid}")
+def upload_13m_transactions(account_uid: str, months: int = TRANSACTIONS_REFRESH_MONTHS,
+                            tenant_id: str = DEFAULT_TENANT, since: Optional[datetime] = None):
+    """Land an account's transactions of the refresh window, `since` is the start the landing delete used."""
     to_timestamp = datetime.now(timezone.utc)
-    from_timestamp = to_timestamp - relativedelta(months=months)
+    from_timestamp = since or refresh_window_start(months)
 
-    # Inspect table columns once
+    # One connection for every monthly batch
     try:
-        md_engine = get_md_engine()    
-        inspector = inspect(md_engine)
-        existing_cols = [col['name'] for col in inspector.get_columns(table_name=TRANSACTIONS_LANDING_TABLE, schema=LANDING_SCHEMA)]
+        conn = get_md_connection()
     except Exception as e:
-        logger.error(f"Cannot reach landing table for inspection : {e}")
+        logger.error(f"Cannot connect to MotherDuck : {e}")
         raise
 
-    for from_ts, to_ts in generate_monthly_ranges(from_timestamp, to_timestamp):
-        transactions = get_transactions(account_uid, from_ts, to_ts)
-        if not transactions:
-            continue
-        try:  
-            df = pd.json_normalize(transactions)
-            df = clean_transactions(df, existing_cols)
-            df.to_sql(TRANSACTIONS_LANDING_TABLE, md_engine,schema=LANDING_SCHEMA, if_exists='append', index=False)
-            logger.info(f"Uploaded {len(df)} transactions from {from_ts} to {to_ts}")
-        except Exception as e:
-            logger.error(f"Error uploading transactions from {from_ts} to {to_ts}: {e}")
-            continue
+    with conn, api_slot(tenant_id):
+        for from_ts, to_ts in generate_monthly_ranges(from_timestamp, to_timestamp):
+            transactions = get_transactions(account_uid, from_ts, to_ts, tenant_id)
+            if not transactions:
+                continue
+            try:  
+                df = to_typed_batch(with_account(transactions, account_uid), TRANSACTIONS_LANDING_COLUMNS)
+                load_typed_batch(conn, df, TRANSACTIONS_LANDING_TABLE, TRANSACTIONS_LANDING_COLUMNS)
+                logger.info(f"Uploaded {len(df)} transactions of account {account_uid} from {from_ts} to {to_ts}")
+            except Exception as e:
+                # A skipped month would leave a silent gap in the refresh window
+                logger.error(f"Error uploading transactions of account {account_uid} from {from_ts} to {to_ts}: {e}")
+                raise
+
+def payload_hash(payload: Any) -> str:
+    """Stable content hash of an api response, independent of key order."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+@task(task_run_name="record_payload_hash-{name}")
+def record_payload_hash(name: str, digest: str) -> None:
+    """Remember the payload that staging now reflects, call only after staging succeeded."""
+    Variable.set(name, digest, overwrite=True)
+    logger.info(f"Recorded payload hash {name}={digest[:12]}")
+
+def replace_landing(df, delete_sql: str, account_uid: str, table: str, columns: Dict[str, str]) -> None:
+    """Replace one account's rows of a landing table in one transaction so they are never left missing."""
+    with get_md_connection() as conn:
+        conn.begin()
+        conn.execute(delete_sql, [account_uid])
+        load_typed_batch(conn, df, table, columns)
+        conn.commit()
 
 @task
 def get_spaces(
     account_uid : str,
-    api_key : str =STARLING_TOKEN
+    tenant_id : str = DEFAULT_TENANT
 ) -> List[Dict[str, Any]]:
     
-    url = f"https://api.starlingbank.com/api/v2/account/{account_uid}/spaces" 
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Accept': 'application/json'
-    }  
-    response = requests.get(url, headers=headers)
+    response = starling_get(f"/api/v2/account/{account_uid}/spaces", tenant_id)
     if response.status_code == 200:
         return response.json().get("savingsGoals", [])
     else:
         logging.error(f"Error {response.status_code}: {response.text}")
         response.raise_for_status()
 
-@task    
-def upload_spaces(account_uid: str):    
-    try:
-        md_engine = get_md_engine()    
-        inspector = inspect(md_engine)
-        existing_cols = [col['name'] for col in inspector.get_columns(table_name=SPACES_LANDING_TABLE, schema=LANDING_SCHEMA)]
-    except Exception as e:
-        logger.error(f"Cannot reach landing table for inspection : {e}")
-        raise
-    spaces = get_spaces(account_uid)
-    if not spaces:
-        logger.error(f"Error extracting spaces: {e}")
+@task(task_run_name="upload_spaces-{account_uid}")
+def upload_spaces(account_uid: str, hash_variable: str, force: bool = False,
+                  tenant_id: str = DEFAULT_TENANT) -> Optional[str]:
+    """
+    Reload an account's landing spaces when the api payload changed since the last staged run.
+
+    Returns the new payload hash, or None when nothing changed and no writes were made.
+    """
+    spaces = get_spaces(account_uid, tenant_id)
+    # An account without spaces returns an empty list, loaded as zero rows to clear removed spaces
+    if spaces is None:
+        logger.error("No spaces payload returned by the api")
         raise ValueError("No spaces data found") 
+    digest = payload_hash(spaces)
+    if not force and digest == Variable.get(hash_variable, default=None):
+        logger.info("Spaces unchanged since last run, skipping MotherDuck writes")
+        return None
     try:  
-        df = pd.json_normalize(spaces)
-        df = clean_transactions(df, existing_cols)
-        df.to_sql(SPACES_LANDING_TABLE, md_engine,schema=LANDING_SCHEMA, if_exists='append', index=False)
+        df = to_typed_batch(with_account(spaces, account_uid), SPACES_LANDING_COLUMNS)
+        replace_landing(df, delete_lnd_spaces_for_account, account_uid, SPACES_LANDING_TABLE, SPACES_LANDING_COLUMNS)
         logger.info(f"Uploaded {len(df)} spaces")
+        return digest
     except Exception as e:
         logger.error(f"Error uploading spaces: {e}")
         raise
@@ -158,39 +209,37 @@ def upload_spaces(account_uid: str):
 @task
 def get_balance(
     account_uid : str,
-    api_key : str = STARLING_TOKEN
+    tenant_id : str = DEFAULT_TENANT
 ) -> List[Dict[str, Any]]:
     
-    url = f"https://api.starlingbank.com/api/v2/accounts/{account_uid}/balance" 
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Accept': 'application/json'
-    }  
-    response = requests.get(url, headers=headers)
+    response = starling_get(f"/api/v2/accounts/{account_uid}/balance", tenant_id)
     if response.status_code == 200:
         return response.json()#.get("savingsGoals", [])
     else:
         logging.error(f"Error {response.status_code}: {response.text}")
         response.raise_for_status()
 
-@task    
-def upload_balance(account_uid: str):    
-    try:
-        md_engine = get_md_engine()    
-        inspector = inspect(md_engine)
-        existing_cols = [col['name'] for col in inspector.get_columns(table_name=BALANCE_LANDING_TABLE, schema=LANDING_SCHEMA)]
-    except Exception as e:
-        logger.error(f"Cannot reach landing table for inspection : {e}")
-        raise
-    balance = get_balance(account_uid)
+@task(task_run_name="upload_balance-{account_uid}")
+def upload_balance(account_uid: str, hash_variable: str, force: bool = False,
+                   tenant_id: str = DEFAULT_TENANT) -> Optional[str]:
+    """
+    Reload an account's landing balance when the api payload changed since the last staged run.
+
+    Returns the new payload hash, or None when nothing changed and no writes were made.
+    """
+    balance = get_balance(account_uid, tenant_id)
     if not balance:
-        logger.error(f"Error extracting spaces: {e}")
-        raise ValueError("No spaces data found") 
+        logger.error("No balance returned by the api")
+        raise ValueError("No balance data found") 
+    digest = payload_hash(balance)
+    if not force and digest == Variable.get(hash_variable, default=None):
+        logger.info("Balance unchanged since last run, skipping MotherDuck writes")
+        return None
     try:  
-        df = pd.json_normalize(balance)
-        df = clean_transactions(df, existing_cols)
-        df.to_sql(BALANCE_LANDING_TABLE, md_engine,schema=LANDING_SCHEMA, if_exists='append', index=False)
+        df = to_typed_batch(with_account([balance], account_uid), BALANCE_LANDING_COLUMNS)
+        replace_landing(df, delete_lnd_balance_for_account, account_uid, BALANCE_LANDING_TABLE, BALANCE_LANDING_COLUMNS)
         logger.info(f"Uploaded {len(df)} balance")
+        return digest
     except Exception as e:
         logger.error(f"Error uploading balance: {e}")
         raise
@@ -199,6 +248,5 @@ if __name__ == "__main__":
     #from app.utils.logging_config import setup_logging
     #setup_logging()
     account_uid = get_account_details('accountUid')
-    execute_raw_sql(truncate_lnd_spaces, label="Trunacate Landing Spaces")
-    upload_balance(account_uid)
+    upload_balance(account_uid, account_hash_variable(BALANCE_HASH_VARIABLE, account_uid), force=True)
     pass
\ No newline at end of file
@@ -0,0 +1,92 @@
+'''Historical backfill: a date range split into windows, each tracked in ops.backfill_ledger'''
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from prefect import task
+
+from app.constants import get_md_connection
+from app.constants import TRANSACTIONS_LANDING_TABLE, DEFAULT_TENANT
+from app.tasks.api_calls import get_transactions, api_timestamp, api_slot
+from app.tasks.landing import to_typed_batch, load_typed_batch, with_account, TRANSACTIONS_LANDING_COLUMNS
+from app.tasks.sql import plan_backfill_windows, select_open_backfill_windows, delete_lnd_transactions_in_window, \
+    mark_backfill_window_done, mark_backfill_window_failed, summarise_backfill
+
+logger = logging.getLogger(__name__)
+
+def naive_utc(value: datetime) -> datetime:
+    """Naive UTC, the convention of every timestamp in the database."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def make_backfill_id(tenant_id: str, start: datetime, end: datetime, window_days: int) -> str:
+    """Same range, same id, so rerunning a backfill resumes its ledger instead of starting over."""
+    return f"{tenant_id}:{start:%Y-%m-%dT%H:%M}:{end:%Y-%m-%dT%H:%M}:{window_days}d"
+
+def split_windows(start: datetime, end: datetime, window_days: int) -> List[Tuple[datetime, datetime]]:
+    """Consecutive [start, end) windows of window_days covering the range, the last one may be shorter."""
+    if window_days < 1:
+        logger.error(f"Backfill windows must span at least a day, got {window_days}")
+        raise ValueError("window_days must be at least 1")
+    windows = []
+    current = start
+    while current < end:
+        window_end = min(current + timedelta(days=window_days), end)
+        windows.append((current, window_end))
+        current = window_end
+    return windows
+
+@task(task_run_name="plan_backfill-{backfill_id}")
+def plan_backfill(backfill_id: str, tenant_id: str, account_uids: List[str],
+                  windows: List[Tuple[datetime, datetime]]) -> List[Tuple[str, datetime, datetime]]:
+    """Record every account and window as pending unless already in the ledger, return the ones not done."""
+    with get_md_connection() as conn:
+        conn.execute(plan_backfill_windows, {
+            "backfill_id": backfill_id,
+            "tenant_id": tenant_id,
+            "account_uids": account_uids,
+            "window_starts": [window_start for window_start, _ in windows],
+            "window_ends": [window_end for _, window_end in windows],
+        })
+        open_windows = conn.execute(select_open_backfill_windows, {"backfill_id": backfill_id}).fetchall()
+    logger.info(f"Backfill {backfill_id}: {len(open_windows)} of {len(account_uids) * len(windows)} windows left to load")
+    return open_windows
+
+@task(task_run_name="backfill_window-{account_uid}-{window_start:%Y-%m-%d}", retries=2, retry_delay_seconds=30)
+def backfill_window(account_uid: str, window_start: datetime, window_end: datetime, backfill_id: str,
+                    tenant_id: str = DEFAULT_TENANT) -> int:
+    """
+    Replace an account's landing transactions of one window and mark the window done.
+
+    The delete, the load and the ledger update share one transaction, so a crash leaves the
+    window pending with none of its rows half landed, and a rerun loads it exactly once.
+    """
+    window = {"backfill_id": backfill_id, "account_uid": account_uid, "window_start": window_start}
+    try:
+        with api_slot(tenant_id):
+            transactions = get_transactions.fn(account_uid, api_timestamp(window_start), api_timestamp(window_end),
+                                               tenant_id)
+        df = to_typed_batch(with_account(transactions, account_uid), TRANSACTIONS_LANDING_COLUMNS)
+        # Adjacent windows share their boundary, a transaction belongs to the window it falls in
+        df = df[(df["transactionTime"] >= window_start) & (df["transactionTime"] < window_end)]
+        with get_md_connection() as conn:
+            conn.begin()
+            conn.execute(delete_lnd_transactions_in_window,
+                         {"account_uid": account_uid, "window_start": window_start, "window_end": window_end})
+            if len(df):
+                load_typed_batch(conn, df, TRANSACTIONS_LANDING_TABLE, TRANSACTIONS_LANDING_COLUMNS)
+            conn.execute(mark_backfill_window_done, {**window, "row_count": len(df)})
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Backfill {backfill_id}: window {window_start} to {window_end} of account {account_uid} failed: {e}")
+        with get_md_connection() as conn:
+            conn.execute(mark_backfill_window_failed, {**window, "error": str(e)[:1000]})
+        raise
+    logger.info(f"Backfill {backfill_id}: landed {len(df)} transactions of account {account_uid} "
+                f"from {window_start} to {window_end}")
+    return len(df)
+
+def backfill_progress(backfill_id: str) -> Dict[str, Tuple[int, int]]:
+    """Windows and landed rows per ledger status."""
+    with get_md_connection() as conn:
+        rows = conn.execute(summarise_backfill, {"backfill_id": backfill_id}).fetchall()
+    return {status: (windows, row_count) for status, windows, row_count in rows}
@@ -0,0 +1,102 @@
+import logging
+from typing import Any, Dict, List
+
+import duckdb
+import pandas as pd
+
+from app.constants import LANDING_SCHEMA
+from app.utils.tracing import sql_span
+
+logger = logging.getLogger(__name__)
+
+# Explicit landing schemas, these must match database/tables/lnd.*.sql
+TRANSACTIONS_LANDING_COLUMNS: Dict[str, str] = {
+    "feedItemUid": "UUID",
+    "accountUid": "UUID",
+    "categoryUid": "UUID",
+    "direction": "VARCHAR",
+    "updatedAt": "TIMESTAMP",
+    "transactionTime": "TIMESTAMP",
+    "settlementTime": "TIMESTAMP",
+    "source": "VARCHAR",
+    "sourceSubType": "VARCHAR",
+    "status": "VARCHAR",
+    "transactingApplicationUserUid": "VARCHAR",
+    "counterPartyType": "VARCHAR",
+    "counterPartyUid": "VARCHAR",
+    "counterPartyName": "VARCHAR",
+    "counterPartySubEntityUid": "VARCHAR",
+    "reference": "VARCHAR",
+    "country": "VARCHAR",
+    "spendingCategory": "VARCHAR",
+    "userNote": "VARCHAR",
+    "hasAttachment": "BOOLEAN",
+    "hasReceipt": "BOOLEAN",
+    "batchPaymentDetails": "VARCHAR",
+    "amount.currency": "VARCHAR",
+    "amount.minorUnits": "BIGINT",
+    "sourceAmount.currency": "VARCHAR",
+    "sourceAmount.minorUnits": "BIGINT",
+    "counterPartySubEntityName": "VARCHAR",
+    "counterPartySubEntityIdentifier": "VARCHAR",
+    "counterPartySubEntitySubIdentifier": "VARCHAR",
+}
+
+SPACES_LANDING_COLUMNS: Dict[str, str] = {
+    "savingsGoalUid": "UUID",
+    "accountUid": "UUID",
+    "name": "VARCHAR",
+    "sortOrder": "BIGINT",
+    "state": "VARCHAR",
+    "totalSaved.currency": "VARCHAR",
+    "totalSaved.minorUnits": "BIGINT",
+}
+
+BALANCE_LANDING_COLUMNS: Dict[str, str] = {
+    "accountUid": "UUID",
+    **{
+        f"{prefix}.{suffix}": sql_type
+        for prefix in ("clearedBalance", "effectiveBalance", "pendingTransactions", "acceptedOverdraft", "amount",
+                       "totalClearedBalance", "totalEffectiveBalance")
+        for suffix, sql_type in (("currency", "VARCHAR"), ("minorUnits", "BIGINT"))
+    },
+}
+
+def with_account(records: List[Dict[str, Any]], account_uid: str) -> List[Dict[str, Any]]:
+    """Tag api records with the account they were fetched for, the payloads themselves do not carry it."""
+    return [{**record, "accountUid": account_uid} for record in records]
+
+def to_typed_batch(records: List[Dict[str, Any]], columns: Dict[str, str]) -> pd.DataFrame:
+    """
+    Flatten api records into a DataFrame holding exactly the landing columns.
+
+    Timestamps are parsed to naive UTC, integers and booleans get nullable dtypes, and
+    fields missing from the payload become null columns instead of being dropped.
+    """
+    df = pd.json_normalize(records).reindex(columns=list(columns))
+    for column, sql_type in columns.items():
+        if sql_type == "TIMESTAMP":
+            df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601").dt.tz_localize(None)
+        elif sql_type == "BIGINT":
+            df[column] = df[column].astype("Int64")
+        elif sql_type == "BOOLEAN":
+            df[column] = df[column].astype("boolean")
+        else:
+            df[column] = df[column].astype("string")
+    return df
+
+def load_typed_batch(conn: duckdb.DuckDBPyConnection, df: pd.DataFrame, table: str, columns: Dict[str, str]) -> int:
+    """Append a typed batch to a landing table, casting uuids once on the way in. An empty batch is a no-op."""
+    if df.empty:
+        return 0
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    select_list = ", ".join(f'"{column}"::{sql_type}' for column, sql_type in columns.items())
+    insert_sql = f"INSERT INTO {LANDING_SCHEMA}.{table} ({column_list}) SELECT {select_list} FROM landing_batch"
+    conn.register("landing_batch", df)
+    try:
+        with sql_span(insert_sql, f"load {table}") as span:
+            span.set_attribute("db.rows", len(df))
+            conn.execute(insert_sql)
+    finally:
+        conn.unregister("landing_batch")
+    return len(df)
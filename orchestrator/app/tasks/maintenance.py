@@ -0,0 +1,138 @@
+import math
+import re
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+import duckdb
+from prefect import task
+from prefect.cache_policies import NO_CACHE
+
+from app.constants import get_md_connection
+from app.constants import OPS_SCHEMA, STORAGE_MAINTENANCE_TABLE
+
+logger = logging.getLogger(__name__)
+
+# DuckDB row group capacity, a compact table needs ceil(rows / ROW_GROUP_SIZE) row groups
+ROW_GROUP_SIZE = 122880
+
+storage_info_query = """
+    SELECT
+        COUNT(DISTINCT row_group_id) AS row_groups,
+        COUNT(DISTINCT block_id) FILTER (WHERE persistent) AS blocks
+    FROM pragma_storage_info(?)
+"""
+
+block_size_query = """
+    SELECT block_size
+    FROM pragma_database_size()
+    WHERE database_name = current_database()
+"""
+
+table_ddl_query = """
+    SELECT sql
+    FROM duckdb_tables()
+    WHERE database_name = current_database() AND schema_name = ? AND table_name = ?
+"""
+
+index_ddl_query = """
+    SELECT sql
+    FROM duckdb_indexes()
+    WHERE database_name = current_database() AND schema_name = ? AND table_name = ? AND sql IS NOT NULL
+"""
+
+def fragmentation(live_rows: int, row_groups: int) -> float:
+    """
+    Share of row groups that a freshly written table would not need.
+
+    Truncate/insert churn keeps appending row groups, so a table holding one row
+    after 100 reloads reports 100 row groups and a fragmentation of 0.99.
+    """
+    if not row_groups:
+        return 0.0
+    ideal = max(1, math.ceil(live_rows / ROW_GROUP_SIZE))
+    return max(0.0, 1 - ideal / row_groups)
+
+def _scan_ms(conn: duckdb.DuckDBPyConnection, table: str) -> float:
+    """Time a full scan that touches every column but returns a single row."""
+    started = time.perf_counter()
+    conn.execute(f"SELECT MAX(hash(COLUMNS(*))) FROM {table}").fetchall()
+    return round((time.perf_counter() - started) * 1000, 3)
+
+@task(cache_policy=NO_CACHE, task_run_name="measure_table-{table}")
+def measure_table(table: str) -> Dict[str, Any]:
+    """
+    Measure live rows, row groups, on-disk size and scan time for a schema.table.
+
+    Storage metrics are None when the backend does not expose pragma_storage_info, the
+    flow records such tables as unmeasured.
+    """
+    with get_md_connection() as conn:
+        live_rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        row_groups: Optional[int] = None
+        size_bytes: Optional[int] = None
+        try:
+            row_groups, blocks = conn.execute(storage_info_query, [table]).fetchone()
+            size_bytes = blocks * conn.execute(block_size_query).fetchone()[0]
+        except duckdb.Error as e:
+            logger.warning(f"Storage info unavailable for {table}: {e}")
+        scan_ms = _scan_ms(conn, table)
+
+    metrics = {
+        "live_rows": live_rows,
+        "row_groups": row_groups,
+        "fragmentation": None if row_groups is None else round(fragmentation(live_rows, row_groups), 4),
+        "size_bytes": size_bytes,
+        "scan_ms": scan_ms,
+    }
+    logger.info(f"Measured {table}: {metrics}")
+    return metrics
+
+@task(cache_policy=NO_CACHE, task_run_name="rewrite_table-{table}")
+def rewrite_table(table: str) -> None:
+    """
+    Rewrite a table into fresh row groups, keeping its DDL and indexes.
+
+    The table is rebuilt from its own CREATE statement, filled, and swapped in by
+    rename inside one transaction, so readers never see a partial table.
+    """
+    schema, name = table.split(".")
+    rewrite_name = f"{name}__rewrite"
+    with get_md_connection() as conn:
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            create_sql = conn.execute(table_ddl_query, [schema, name]).fetchone()[0]
+            index_sqls = [row[0] for row in conn.execute(index_ddl_query, [schema, name]).fetchall()]
+            conn.execute(re.sub(r"^CREATE TABLE [^(]+\(", f"CREATE TABLE {schema}.{rewrite_name}(", create_sql, count=1))
+            conn.execute(f"INSERT INTO {schema}.{rewrite_name} SELECT * FROM {table}")
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {schema}.{rewrite_name} RENAME TO {name}")
+            for index_sql in index_sqls:
+                conn.execute(index_sql)
+            conn.execute("COMMIT")
+            logger.info(f"Rewrote {table} ({len(index_sqls)} indexes recreated)")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Rewrite of {table} failed and rolled back: {e}")
+            raise
+
+@task(cache_policy=NO_CACHE)
+def checkpoint_database() -> None:
+    """Flush the WAL and release blocks freed by rewrites."""
+    with get_md_connection() as conn:
+        conn.execute("CHECKPOINT")
+    logger.info("Checkpoint complete")
+
+@task(cache_policy=NO_CACHE)
+def record_maintenance(rows: List[Dict[str, Any]]) -> None:
+    """Append before/after measurements to the ops maintenance log."""
+    columns = ["run_at", "table_name", "action", "live_rows", "row_groups_before", "row_groups_after",
+               "fragmentation_before", "fragmentation_after", "size_bytes_before", "size_bytes_after",
+               "scan_ms_before", "scan_ms_after"]
+    with get_md_connection() as conn:
+        conn.executemany(
+            f"INSERT INTO {OPS_SCHEMA}.{STORAGE_MAINTENANCE_TABLE} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            [[row[column] for column in columns] for row in rows],
+        )
+    logger.info(f"Recorded maintenance results for {len(rows)} tables")
@@ -7,37 +7,52 @@ from prefect import task
 from prefect.cache_policies import NO_CACHE
 
 from app.constants import get_md_engine
+from app.utils.tracing import sql_span
 from app.constants import TRANSACTIONS_LANDING_TABLE, LANDING_SCHEMA, STAGING_SCHEMA,TRANSACTIONS_STAGING_TABLE, SPACES_LANDING_TABLE, \
-    SPACES_STAGING_TABLE , BALANCE_LANDING_TABLE, BALANCE_STAGING_TABLE, TRANSACTIONS_WEBHOOK_LANDING_TABLE
+    SPACES_STAGING_TABLE , BALANCE_LANDING_TABLE, BALANCE_STAGING_TABLE, TRANSACTIONS_WEBHOOK_LANDING_TABLE, \
+    COUNTERPARTY_STAGING_TABLE, OPS_SCHEMA, FRESHNESS_TABLE, TENANTS_TABLE, TENANT_ACCOUNTS_TABLE, DEFAULT_TENANT, \
+    BACKFILL_LEDGER_TABLE
     
 logger = logging.getLogger(__name__)
 
+def _execute(connection, sql: str, params: Optional[dict]) -> None:
+    # DuckDB binds $name parameters itself and rejects unused ones, so a statement gets only
+    # the parameters it references and parameterised statements skip SQLAlchemy's text()
+    bound = {name: value for name, value in (params or {}).items() if f"${name}" in sql}
+    if bound:
+        connection.exec_driver_sql(sql, bound)
+    else:
+        connection.execute(text(sql))
+
 @task(cache_policy=NO_CACHE,task_run_name="execute_raw_sql-{label}")
-def execute_raw_sql(sql: str, label: Optional[str] = None) -> None:
+def execute_raw_sql(sql: str, label: Optional[str] = None, params: Optional[dict] = None) -> None:
     """
     Execute single SQL statement.
     
     Args:
         sql_statements: List of tuples (sql, description)
         label: Label for logging
+        params: $name parameters of the statement
     """
     engine = get_md_engine()
     try:
-        with engine.begin() as connection:  # begin a transaction and auto-commit
-            connection.execute(text(sql))
+        with engine.begin() as connection, sql_span(sql, label):  # begin a transaction and auto-commit
+            _execute(connection, sql, params)
             logger.info(f"executed raw sql: {label}, SQL Snippet: {sql[:50]}")
     except Exception as e:
         logger.error(f"Error executing raw SQL: {label}, SQL Snippet: {sql[:50]} -->> Error {e}") 
         raise
 
 @task(cache_policy=NO_CACHE, task_run_name="execute_transaction-{label}")
-def execute_transaction(sql_statements: list[tuple[str, str]], label: Optional[str] = None) -> None:
+def execute_transaction(sql_statements: list[tuple[str, str]], label: Optional[str] = None,
+                        params: Optional[dict] = None) -> None:
     """
     Execute multiple SQL statements in a single transaction.
     
     Args:
         sql_statements: List of tuples (sql, description)
         label: Label for logging
+        params: $name parameters shared by every statement
     """
     engine = get_md_engine()
     
@@ -45,7 +60,8 @@ def execute_transaction(sql_statements: list[tuple[str, str]], label: Optional[s
         with engine.begin() as connection:  # Single transaction for all statements
             for sql, description in sql_statements:
                 logger.info(f"Executing: {description}")
-                connection.execute(text(sql))
+                with sql_span(sql, description):
+                    _execute(connection, sql, params)
                 logger.info(f"Completed: {description}")
             
             # If we get here, all succeeded - commit happens automatically
@@ -56,14 +72,85 @@ def execute_transaction(sql_statements: list[tuple[str, str]], label: Optional[s
         logger.error(f"Transaction failed and rolled back: {label} - Error: {e}")
         raise
 
-truncate_lnd_transactions = f"""
-    TRUNCATE TABLE {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE};
+def normalised_counterparty_name(column: str) -> str:
+    """
+    SQL expression folding spelling variants of a merchant onto one name.
+
+    Lowercases, drops card processor prefixes (SQ *, SUMUP *), turns punctuation and
+    underscores into single spaces and strips trailing legal suffixes and store numbers,
+    so 'TESCO_STORES 3456' and 'Tesco Stores Ltd.' both become 'tesco stores'.
+    """
+    return f"""NULLIF(REGEXP_REPLACE(
+            TRIM(REGEXP_REPLACE(
+                REGEXP_REPLACE(LOWER({column}), '^(sq|sumup|zettle|iz|paypal|sp) ?\\*', ''),
+                '[^a-z0-9&]+', ' ', 'g')),
+            '( (ltd|limited|plc|llp|inc|uk|gb|[0-9]{{3,}}))+$', ''), '')"""
+
+def counterparty_key_map(source_table: str) -> str:
+    """Map each distinct raw counterparty name in a landing table to its surrogate key."""
+    return f"""(
+        SELECT n.raw_name, c.counterparty_key
+        FROM (SELECT DISTINCT counterPartyName AS raw_name FROM {source_table}) n
+            JOIN {STAGING_SCHEMA}.{COUNTERPARTY_STAGING_TABLE} c
+                ON c.counterparty_name = {normalised_counterparty_name('n.raw_name')}
+    )"""
+
+def tenant_partition(column: str) -> str:
+    """
+    Predicate keeping the rows of the $tenant_id parameter's accounts, a tenant's partition.
+
+    Rows from before multi-account support carry no account and belong to the default tenant.
+    """
+    return f"""({column} IN (SELECT account_uid FROM {OPS_SCHEMA}.{TENANT_ACCOUNTS_TABLE} WHERE tenant_id = $tenant_id)
+        OR ({column} IS NULL AND $tenant_id = '{DEFAULT_TENANT}'))"""
+
+# Per tenant, so one tenant's merge never moves the watermark past another's unmerged rows
+webhook_watermark = f"""
+    (SELECT COALESCE(MAX(last_modified),'1900-01-01'::TIMESTAMP) FROM {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE}
+     WHERE {tenant_partition('account_uid')})
 """
-truncate_lnd_spaces = f"""
-    TRUNCATE TABLE {LANDING_SCHEMA}.{SPACES_LANDING_TABLE};
+
+def upsert_counterparties(source_table: str, where: str = "TRUE") -> str:
+    """
+    Add the counterparties of a landing table's rows matching where that are not in the dimension yet.
+
+    Each new normalised name keeps the raw name, uid and type of its earliest transaction.
+    """
+    return f"""
+    INSERT INTO {STAGING_SCHEMA}.{COUNTERPARTY_STAGING_TABLE} (
+        counterparty_name, raw_name, counterparty_uid, counterparty_type, first_seen, last_modified
+    )
+    SELECT
+        n.counterparty_name,
+        ARG_MIN(n.counterPartyName, n.transactionTime),
+        ARG_MIN(n.counterPartyUid, n.transactionTime),
+        ARG_MIN(LOWER(REPLACE(n.counterPartyType, '_', ' ')), n.transactionTime),
+        MIN(n.transactionTime),
+        CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            {normalised_counterparty_name('counterPartyName')} AS counterparty_name,
+            counterPartyName,
+            ARG_MIN(counterPartyUid, transactionTime) AS counterPartyUid,
+            ARG_MIN(counterPartyType, transactionTime) AS counterPartyType,
+            MIN(transactionTime) AS transactionTime
+        FROM {source_table}
+        WHERE {where}
+        GROUP BY counterPartyName
+    ) n
+        ANTI JOIN {STAGING_SCHEMA}.{COUNTERPARTY_STAGING_TABLE} c
+            ON c.counterparty_name = n.counterparty_name
+    WHERE n.counterparty_name IS NOT NULL
+    GROUP BY n.counterparty_name
+    ;
 """
-truncate_lnd_balance = f"""
-    TRUNCATE TABLE {LANDING_SCHEMA}.{BALANCE_LANDING_TABLE};
+
+# Rows landed before multi-account support carry no account and are replaced on first reload
+delete_lnd_spaces_for_account = f"""
+    DELETE FROM {LANDING_SCHEMA}.{SPACES_LANDING_TABLE} WHERE accountUid = ? OR accountUid IS NULL;
+"""
+delete_lnd_balance_for_account = f"""
+    DELETE FROM {LANDING_SCHEMA}.{BALANCE_LANDING_TABLE} WHERE accountUid = ? OR accountUid IS NULL;
 """
 truncate_stg_transactions = f"""
     TRUNCATE TABLE {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE};
@@ -71,9 +158,24 @@ truncate_stg_transactions = f"""
 truncate_stg_spaces = f"""
     TRUNCATE TABLE {STAGING_SCHEMA}.{SPACES_STAGING_TABLE};
 """
+# The refresh window of the main pipeline, history before $since is kept for backfills
+delete_lnd_transactions_for_tenant_since = f"""
+    DELETE FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}
+    WHERE {tenant_partition('accountUid')} AND (transactionTime >= $since OR transactionTime IS NULL);
+"""
+delete_stg_transactions_for_tenant = f"""
+    DELETE FROM {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE} WHERE {tenant_partition('account_uid')};
+"""
+delete_stg_spaces_for_tenant = f"""
+    DELETE FROM {STAGING_SCHEMA}.{SPACES_STAGING_TABLE} WHERE {tenant_partition('account_uid')};
+"""
+delete_stg_balance_for_tenant = f"""
+    DELETE FROM {STAGING_SCHEMA}.{BALANCE_STAGING_TABLE} WHERE {tenant_partition('account_uid')};
+"""
 insert_transactions_to_staging = f"""
     INSERT INTO {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE} (
         transaction_id,
+        account_uid,
         space_id,
         in_or_out,
         updated_at,
@@ -81,6 +183,7 @@ insert_transactions_to_staging = f"""
         source_type,
         counter_party_type,
         counter_party_name,
+        counterparty_key,
         reference,
         user_note,
         country,
@@ -92,16 +195,20 @@ insert_transactions_to_staging = f"""
         data_source,
         last_modified
     )
-    FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}
+    FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE} l
+        LEFT JOIN {counterparty_key_map(f'{LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}')} c
+            ON c.raw_name = l.counterPartyName
     SELECT
-        feedItemUid::UUID AS transaction_id,
-        categoryUid::UUID AS space_id,
+        feedItemUid AS transaction_id,
+        accountUid AS account_uid,
+        categoryUid AS space_id,
         LOWER(direction) AS in_or_out,
-        updatedAt::DATETIME AS updated_at,
-        transactionTime::DATETIME AS transaction_time,
+        updatedAt AS updated_at,
+        transactionTime AS transaction_time,
         LOWER(REPLACE(sourceSubType, '_', ' ')) AS source_type,
         LOWER(REPLACE(counterPartyType, '_', ' ')) AS counter_party_type,
         LOWER(REPLACE(counterPartyName, '_', ' ')) AS counter_party_name,
+        c.counterparty_key,
         reference,
         userNote AS user_note,
         country,
@@ -112,11 +219,18 @@ insert_transactions_to_staging = f"""
         received_at,
         'api_pull' AS data_source,
         CURRENT_TIMESTAMP AS last_modified
+    WHERE {tenant_partition('l.accountUid')}
     ;
 """
+upsert_counterparties_from_api = upsert_counterparties(f"{LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}")
+upsert_counterparties_from_webhook = upsert_counterparties(
+    f"{LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}",
+    where=f"last_modified > {webhook_watermark} AND {tenant_partition('accountUid')}",
+)
 insert_spaces_to_staging = f"""
     INSERT INTO {STAGING_SCHEMA}.{SPACES_STAGING_TABLE} (
            space_id, 
+           account_uid, 
            space_name, 
            amount, 
            received_at, 
@@ -124,11 +238,13 @@ insert_spaces_to_staging = f"""
         )
         SELECT 
           savingsGoalUid, 
+          accountUid, 
           name, 
           ("totalSaved.minorUnits"/ 100.0),
           received_at , 
           CURRENT_TIMESTAMP AS last_modified
         FROM {LANDING_SCHEMA}.{SPACES_LANDING_TABLE}
+        WHERE {tenant_partition('accountUid')}
     ;
 """
 
@@ -137,26 +253,44 @@ truncate_stg_balance = f"""
 """
 
 insert_balance_to_staging = f"""
-        INSERT INTO {STAGING_SCHEMA}.{BALANCE_STAGING_TABLE} (balance, balance_with_spaces, received_at, last_modified)
+        INSERT INTO {STAGING_SCHEMA}.{BALANCE_STAGING_TABLE} (account_uid, balance, balance_with_spaces, received_at, last_modified)
         SELECT
+            accountUid AS account_uid,
             ("effectiveBalance.minorUnits" / 100.0)::DECIMAL(19, 2) AS balance,
             ("totalClearedBalance.minorUnits" / 100.0)::DECIMAL(19, 2) AS balance_with_spaces,
             received_at ,
             CURRENT_TIMESTAMP AS last_modified   
-        FROM {LANDING_SCHEMA}.{BALANCE_LANDING_TABLE};
+        FROM {LANDING_SCHEMA}.{BALANCE_LANDING_TABLE}
+        WHERE {tenant_partition('accountUid')};
+"""
+# Must run before the merge in the same transaction, the merge moves the watermark past these rows
+record_webhook_freshness = f"""
+        INSERT OR IGNORE INTO {OPS_SCHEMA}.{FRESHNESS_TABLE} (webhook_event_uid, transaction_id, event_at, landed_at, staged_at)
+        SELECT
+            webhookEventUid,
+            feedItemUid,
+            eventTimestamp,
+            last_modified,
+            CURRENT_TIMESTAMP
+        FROM {LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}
+        WHERE last_modified > {webhook_watermark}
+          AND {tenant_partition('accountUid')}
+          AND webhookEventUid IS NOT NULL;
 """
 insert_webhook_transactions_to_staging = f"""
         MERGE INTO {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE} AS t
             USING(
                 SELECT
-                    feedItemUid::UUID AS transaction_id,
-                    categoryUid::UUID AS space_id,
+                    feedItemUid AS transaction_id,
+                    accountUid AS account_uid,
+                    categoryUid AS space_id,
                     LOWER(direction) AS in_or_out,
-                    updatedAt::TIMESTAMP AS updated_at,
-                    transactionTime::TIMESTAMP AS transaction_time,
+                    updatedAt AS updated_at,
+                    transactionTime AS transaction_time,
                     'unavailable' AS source_type,
                     LOWER(REPLACE(counterPartyType, '_', ' ')) AS counter_party_type,
                     LOWER(REPLACE(counterPartyName, '_', ' ')) AS counter_party_name,
+                    c.counterparty_key,
                     reference,
                     userNote AS user_note,
                     country,
@@ -166,14 +300,18 @@ insert_webhook_transactions_to_staging = f"""
                     NULL::VARCHAR AS status,  
                     received_at,
                     'webhook' AS data_source,
-                    last_modified, 
+                    w.last_modified, 
                     current_user() AS last_modified_by  
-                FROM {LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}
-                WHERE last_modified > (SELECT COALESCE(MAX(last_modified),'1900-01-01'::TIMESTAMP) FROM {STAGING_SCHEMA}.{TRANSACTIONS_STAGING_TABLE})
+                FROM {LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE} w
+                    LEFT JOIN {counterparty_key_map(f'{LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}')} c
+                        ON c.raw_name = w.counterPartyName
+                WHERE w.last_modified > {webhook_watermark}
+                  AND {tenant_partition('w.accountUid')}
             ) AS s
             ON s.transaction_id = t.transaction_id
             WHEN MATCHED THEN 
                 UPDATE SET 
+                    account_uid = s.account_uid,
                     space_id = s.space_id,
                     in_or_out = s.in_or_out,
                     updated_at = s.updated_at,
@@ -181,6 +319,7 @@ insert_webhook_transactions_to_staging = f"""
                     source_type = s.source_type,
                     counter_party_type = s.counter_party_type,
                     counter_party_name = s.counter_party_name,
+                    counterparty_key = s.counterparty_key,
                     reference = s.reference,
                     user_note = s.user_note,
                     country = s.country,
@@ -193,16 +332,75 @@ insert_webhook_transactions_to_staging = f"""
                     last_modified = s.last_modified,
                     last_modified_by = s.last_modified_by
             WHEN NOT MATCHED THEN 
-                INSERT (transaction_id, space_id, in_or_out, updated_at, transaction_time, 
-                        source_type, counter_party_type, counter_party_name, reference, user_note, 
+                INSERT (transaction_id, account_uid, space_id, in_or_out, updated_at, transaction_time, 
+                        source_type, counter_party_type, counter_party_name, counterparty_key, reference, user_note, 
                         country, spending_category, currency, amount, status, received_at, 
                         data_source, last_modified, last_modified_by)
-                VALUES (s.transaction_id, s.space_id, s.in_or_out, s.updated_at, s.transaction_time,
-                        s.source_type, s.counter_party_type, s.counter_party_name, s.reference, s.user_note,
+                VALUES (s.transaction_id, s.account_uid, s.space_id, s.in_or_out, s.updated_at, s.transaction_time,
+                        s.source_type, s.counter_party_type, s.counter_party_name, s.counterparty_key, s.reference, s.user_note,
                         s.country, s.spending_category, s.currency, s.amount, s.status, s.received_at,
                         s.data_source, s.last_modified, s.last_modified_by);
 """
 
+# ==============================================================================
+# TENANTS
+# ==============================================================================
+select_tenants = f"""
+    SELECT tenant_id, token_env, account_holder_uid::VARCHAR AS account_holder_uid, max_concurrent_runs,
+           refresh_minutes, active
+    FROM {OPS_SCHEMA}.{TENANTS_TABLE}
+    ORDER BY tenant_id;
+"""
+# First claim wins, a joint account seen by a second tenant keeps its owner
+claim_tenant_accounts = f"""
+    INSERT OR IGNORE INTO {OPS_SCHEMA}.{TENANT_ACCOUNTS_TABLE} (account_uid, tenant_id)
+    SELECT UNNEST($account_uids)::UUID, $tenant_id;
+"""
+select_account_owners = f"""
+    SELECT account_uid::VARCHAR, tenant_id
+    FROM {OPS_SCHEMA}.{TENANT_ACCOUNTS_TABLE}
+    WHERE account_uid IN (SELECT UNNEST($account_uids)::UUID);
+"""
+
+# ==============================================================================
+# BACKFILL
+# ==============================================================================
+# Re-planning an existing backfill keeps the status of its windows, so a rerun resumes it
+plan_backfill_windows = f"""
+    INSERT OR IGNORE INTO {OPS_SCHEMA}.{BACKFILL_LEDGER_TABLE} (backfill_id, tenant_id, account_uid, window_start, window_end)
+    SELECT $backfill_id, $tenant_id, a.account_uid::UUID, w.window_start, w.window_end
+    FROM (SELECT UNNEST($account_uids) AS account_uid) a
+        CROSS JOIN (SELECT UNNEST($window_starts)::TIMESTAMP AS window_start,
+                           UNNEST($window_ends)::TIMESTAMP AS window_end) w;
+"""
+select_open_backfill_windows = f"""
+    SELECT account_uid::VARCHAR, window_start, window_end
+    FROM {OPS_SCHEMA}.{BACKFILL_LEDGER_TABLE}
+    WHERE backfill_id = $backfill_id AND status <> 'done'
+    ORDER BY window_start DESC, account_uid;
+"""
+delete_lnd_transactions_in_window = f"""
+    DELETE FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}
+    WHERE accountUid = $account_uid::UUID AND transactionTime >= $window_start AND transactionTime < $window_end;
+"""
+# Runs in the transaction that loads the window, a window is only ever done with its rows landed
+mark_backfill_window_done = f"""
+    UPDATE {OPS_SCHEMA}.{BACKFILL_LEDGER_TABLE}
+    SET status = 'done', row_count = $row_count, attempts = attempts + 1, error = NULL, updated_at = CURRENT_TIMESTAMP
+    WHERE backfill_id = $backfill_id AND account_uid = $account_uid::UUID AND window_start = $window_start;
+"""
+mark_backfill_window_failed = f"""
+    UPDATE {OPS_SCHEMA}.{BACKFILL_LEDGER_TABLE}
+    SET status = 'failed', attempts = attempts + 1, error = $error, updated_at = CURRENT_TIMESTAMP
+    WHERE backfill_id = $backfill_id AND account_uid = $account_uid::UUID AND window_start = $window_start;
+"""
+summarise_backfill = f"""
+    SELECT status, COUNT(*) AS windows, COALESCE(SUM(row_count), 0) AS row_count
+    FROM {OPS_SCHEMA}.{BACKFILL_LEDGER_TABLE}
+    WHERE backfill_id = $backfill_id
+    GROUP BY status;
+"""
+
 if __name__ == "__main__":
     #execute_raw_sql(create_lnd_schema, label="Create Landing Schema")
     #execute_raw_sql(create_lnd_transactions_api_pull, label="Create Transactions Table")
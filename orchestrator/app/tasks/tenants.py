@@ -0,0 +1,125 @@
+'''Tenant registry: whose Starling token a run uses, which accounts it owns and how many slots it gets'''
+import os
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+import duckdb
+from prefect import get_client
+from prefect.client.schemas.actions import GlobalConcurrencyLimitCreate, GlobalConcurrencyLimitUpdate
+from prefect.concurrency.sync import concurrency
+from prefect.exceptions import ObjectNotFound
+
+from app.constants import get_md_connection
+from app.constants import DEFAULT_TENANT, DEFAULT_TOKEN_ENV, STARLING_CONCURRENCY_LIMIT, \
+    STARLING_MAX_CONCURRENT_REQUESTS, TENANT_BULK_LIMIT, TENANT_BULK_SLOTS
+from app.tasks.sql import select_tenants, claim_tenant_accounts, select_account_owners
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Tenant:
+    tenant_id: str
+    token_env: str = DEFAULT_TOKEN_ENV
+    account_holder_uid: Optional[str] = None
+    max_concurrent_runs: int = 1
+    refresh_minutes: int = 1440
+    active: bool = True
+
+    def token(self) -> str:
+        token = os.getenv(self.token_env)
+        if not token:
+            logger.error(f"Tenant {self.tenant_id}: environment variable {self.token_env} holds no Starling token")
+            raise ValueError(f"No Starling token for tenant {self.tenant_id}")
+        return token
+
+    @property
+    def api_limit(self) -> str:
+        """Starling throttles per token, so every tenant's feed tasks share their own limit."""
+        return f"{STARLING_CONCURRENCY_LIMIT}-{self.tenant_id}"
+
+    @property
+    def bulk_limit(self) -> str:
+        return f"tenant-{self.tenant_id}-bulk"
+
+# ==============================================================================
+# REGISTRY
+# ==============================================================================
+def load_tenants() -> List[Tenant]:
+    """Every registered tenant, or the default tenant alone while the registry is empty."""
+    try:
+        with get_md_connection() as conn:
+            rows = conn.execute(select_tenants).fetchall()
+    except duckdb.CatalogException:
+        logger.warning("No tenant registry in the database, running for the default tenant only")
+        rows = []
+    tenants = [Tenant(*row) for row in rows]
+    return tenants or [Tenant(DEFAULT_TENANT)]
+
+@lru_cache(maxsize=None)
+def get_tenant(tenant_id: str = DEFAULT_TENANT) -> Tenant:
+    """Registry entry of one tenant, read once per flow run process."""
+    tenants = {tenant.tenant_id: tenant for tenant in load_tenants()}
+    tenant = tenants.get(tenant_id) or (Tenant(DEFAULT_TENANT) if tenant_id == DEFAULT_TENANT else None)
+    if tenant is None:
+        logger.error(f"Tenant {tenant_id} is not registered in the tenant registry")
+        raise ValueError(f"Unknown tenant {tenant_id}")
+    if not tenant.active:
+        logger.error(f"Tenant {tenant_id} is inactive")
+        raise ValueError(f"Inactive tenant {tenant_id}")
+    return tenant
+
+def claim_accounts(tenant_id: str, account_uids: List[str]) -> List[str]:
+    """
+    Record the tenant as owner of its accounts and return the ones it owns.
+
+    An account already owned by another tenant, a joint account, is skipped so its
+    rows are loaded once, into the partition of the tenant that saw it first.
+    """
+    params = {"tenant_id": tenant_id, "account_uids": account_uids}
+    with get_md_connection() as conn:
+        conn.execute(claim_tenant_accounts, params)
+        owners = dict(conn.execute(select_account_owners, {"account_uids": account_uids}).fetchall())
+    for account_uid in account_uids:
+        if owners.get(account_uid) != tenant_id:
+            logger.info(f"Account {account_uid} belongs to tenant {owners.get(account_uid)}, skipping it for {tenant_id}")
+    return [account_uid for account_uid in account_uids if owners.get(account_uid) == tenant_id]
+
+# ==============================================================================
+# CONCURRENCY
+# ==============================================================================
+def ensure_concurrency_limit(name: str, limit: int) -> None:
+    """Create a Prefect global concurrency limit, or resize it to `limit`."""
+    with get_client(sync_client=True) as client:
+        try:
+            client.read_global_concurrency_limit_by_name(name)
+            client.update_global_concurrency_limit(name, GlobalConcurrencyLimitUpdate(limit=limit))
+        except ObjectNotFound:
+            client.create_global_concurrency_limit(GlobalConcurrencyLimitCreate(name=name, limit=limit))
+
+def sync_tenant_limits(tenants: List[Tenant]) -> None:
+    """
+    Create every limit the tenants' runs hold a slot of.
+
+    A missing limit is skipped by Prefect rather than enforced, so this runs on deploy and
+    on every scheduler tick to pick up newly registered tenants.
+    """
+    ensure_concurrency_limit(TENANT_BULK_LIMIT, TENANT_BULK_SLOTS)
+    for tenant in tenants:
+        ensure_concurrency_limit(tenant.api_limit, STARLING_MAX_CONCURRENT_REQUESTS)
+        ensure_concurrency_limit(tenant.bulk_limit, tenant.max_concurrent_runs)
+    logger.info(f"Concurrency limits synced for {len(tenants)} tenants")
+
+@contextmanager
+def bulk_lane(tenant_id: str) -> Iterator[None]:
+    """
+    Hold a bulk slot of the tenant and of all tenants together while a heavy run works.
+
+    Webhook runs never take one, so however many bulk runs wait, real-time updates of
+    every tenant still run.
+    """
+    tenant = get_tenant(tenant_id)
+    with concurrency([TENANT_BULK_LIMIT, tenant.bulk_limit], occupy=1):
+        yield
@@ -0,0 +1,65 @@
+'''OpenTelemetry setup, every span is a no-op unless the tracing extra is installed and an exporter configured'''
+import os
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import Span, SpanKind
+
+from app.constants import DATABASE
+
+log = logging.getLogger(__name__)
+
+SERVICE_NAME = "orchestrator"
+OTLP_ENDPOINT_ENV = "OTEL_EXPORTER_OTLP_ENDPOINT"
+TRACE_FILE_ENV = "TRACE_EXPORT_FILE"
+# Label Prefect parents its own flow and task run spans on
+TRACEPARENT_LABEL = "__OTEL_TRACEPARENT"
+SQL_SNIPPET = 500
+
+tracer = trace.get_tracer("app")
+_configured = False
+
+def setup_tracing(service_name: str = SERVICE_NAME) -> bool:
+    """
+    Install a tracer provider exporting to a local collector, a JSON lines file, or both.
+
+    OTEL_EXPORTER_OTLP_ENDPOINT sends spans over OTLP/HTTP, TRACE_EXPORT_FILE appends one
+    span per line. Returns True when spans are exported.
+    """
+    global _configured
+    endpoint, path = os.getenv(OTLP_ENDPOINT_ENV), os.getenv(TRACE_FILE_ENV)
+    if _configured or not (endpoint or path):
+        return _configured
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        log.warning("Tracing is configured but opentelemetry-sdk is missing, install the tracing extra")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    if endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        except ImportError:
+            log.warning("OTLP endpoint is set but opentelemetry-exporter-otlp-proto-http is missing, install the tracing extra")
+    if path:
+        exporter = ConsoleSpanExporter(out=open(path, "a", encoding="utf-8"),
+                                       formatter=lambda span: span.to_json(indent=None) + "\n")
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    # Spans still buffered are flushed by the provider's exit hook
+    trace.set_tracer_provider(provider)
+    _configured = True
+    log.info(f"Tracing enabled for {service_name}")
+    return True
+
+@contextmanager
+def sql_span(sql: str, label: Optional[str] = None) -> Iterator[Span]:
+    """Client span for one SQL statement, child of the current task run span."""
+    attributes = {"db.system": "duckdb", "db.name": DATABASE, "db.statement": sql.strip()[:SQL_SNIPPET]}
+    with tracer.start_as_current_span(f"sql {label or 'statement'}", kind=SpanKind.CLIENT, attributes=attributes) as span:
+        yield span
@@ -0,0 +1,38 @@
+import logging
+from pathlib import Path
+from typing import List
+
+import duckdb
+
+from app.constants import DATABASE
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+DATABASE_DIR = REPO_DIR / "database"
+
+# Ordered list of every DDL file, shared with the dashboard's benchmark seeder
+DDL_MANIFEST = DATABASE_DIR / "ddl_order.txt"
+
+def ddl_files() -> List[str]:
+    """DDL files of a fresh database in dependency order, as listed in the manifest."""
+    lines = (line.strip() for line in DDL_MANIFEST.read_text().splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+def build_local_database(directory: Path) -> Path:
+    """
+    Create a fresh local DuckDB file from the DDL in database/.
+
+    The file is named after DATABASE so fully qualified names such as
+    b_app.sem.spending resolve exactly as they do on MotherDuck.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    db_path = directory / f"{DATABASE}.duckdb"
+    for path in (db_path, db_path.with_suffix(".duckdb.wal")):
+        path.unlink(missing_ok=True)
+
+    with duckdb.connect(str(db_path)) as conn:
+        for ddl_file in ddl_files():
+            conn.execute((DATABASE_DIR / ddl_file).read_text())
+            logger.info(f"Applied {ddl_file}")
+    return db_path
@@ -0,0 +1,340 @@
+'''
+End-to-end pipeline benchmark.
+
+Runs main_pipeline and then webhook_pipeline fully offline: the Starling API is served by
+benchmarks.starling_server, MotherDuck is replaced by a local b_app.duckdb built from
+database/ and Prefect runs against a throwaway local server. For every scale the report
+holds the pipeline wall time, every subflow and task duration read back from the Prefect
+API, rows per landing and staging table before and after, requests and bytes served by
+the stand-in and peak process memory. The JSON report can be diffed between commits and
+the run exits non-zero when a pipeline or subflow regresses beyond the threshold.
+
+    cd orchestrator
+    python -m benchmarks.pipeline_bench --update-baseline   # record a baseline
+    python -m benchmarks.pipeline_bench                     # compare against it
+    python -m benchmarks.pipeline_bench --accounts 3        # fan out over several accounts
+'''
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import duckdb
+import pandas as pd
+import prefect
+from prefect import get_client
+from prefect.client.schemas.filters import FlowRunFilter, FlowRunFilterStartTime, TaskRunFilter, \
+    TaskRunFilterStartTime
+from prefect.testing.utilities import prefect_test_harness
+from prefect.variables import Variable
+
+from app.constants import LOCAL_DUCKDB_ENV, LANDING_SCHEMA, STAGING_SCHEMA, TRANSACTIONS_WEBHOOK_LANDING_TABLE, \
+    SPACES_HASH_VARIABLE, BALANCE_HASH_VARIABLE, DEFAULT_TOKEN_ENV
+from app.flows.main_pipe import main_pipeline, webhook_pipeline
+from app.tasks import api_calls
+from app.tasks.tenants import get_tenant, load_tenants, sync_tenant_limits
+from benchmarks.local_db import REPO_DIR, build_local_database
+from benchmarks.starling_data import DEFAULT_SEED, SyntheticAccount
+from benchmarks.starling_server import StarlingStandIn, StandInConfig
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "pipeline_baseline.json"
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+# The api pull covers 13 months, the synthetic history is sized so every transaction falls inside it
+HISTORY_YEARS = 13 / 12
+API_PAGE_LIMIT = 200
+
+# ==============================================================================
+# MEASUREMENT
+# ==============================================================================
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+class PeakMemory:
+    """
+    Peak resident memory of this process while the block runs, DuckDB allocations included.
+
+    Samples /proc every interval seconds. Where /proc is unavailable it falls back to
+    the lifetime maximum from getrusage, which never goes down between runs.
+    """
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="peak-memory", daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, _rss_bytes() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemory":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        if not self.peak_bytes:
+            # ru_maxrss is kilobytes on Linux
+            self.peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_bytes / 2**20, 1)
+
+def table_counts(db_path: Path) -> Dict[str, int]:
+    with duckdb.connect(str(db_path)) as conn:
+        tables = conn.execute(
+            "SELECT schema_name, table_name FROM duckdb_tables() WHERE schema_name IN (?, ?) ORDER BY ALL",
+            [LANDING_SCHEMA, STAGING_SCHEMA],
+        ).fetchall()
+        return {
+            f"{schema}.{table}": conn.execute(f"SELECT COUNT(*) FROM {schema}.{table}").fetchone()[0]
+            for schema, table in tables
+        }
+
+def _read_all(read: Callable[..., list]) -> list:
+    results, offset = [], 0
+    while True:
+        page = read(limit=API_PAGE_LIMIT, offset=offset)
+        results.extend(page)
+        if len(page) < API_PAGE_LIMIT:
+            return results
+        offset += API_PAGE_LIMIT
+
+def _seconds(run) -> float:
+    if run.start_time and run.end_time:
+        return (run.end_time - run.start_time).total_seconds()
+    return run.total_run_time.total_seconds()
+
+def prefect_timings(since: datetime) -> Dict[str, Any]:
+    """Durations of every flow and task run started since `since`, read back from the Prefect API."""
+    with get_client(sync_client=True) as client:
+        flow_names = {flow.id: flow.name for flow in client.read_flows()}
+        flow_runs = _read_all(lambda **page: client.read_flow_runs(
+            flow_run_filter=FlowRunFilter(start_time=FlowRunFilterStartTime(after_=since)), **page))
+        task_runs = _read_all(lambda **page: client.read_task_runs(
+            task_run_filter=TaskRunFilter(start_time=TaskRunFilterStartTime(after_=since)), **page))
+
+    flows = defaultdict(float)
+    for run in flow_runs:
+        flows[flow_names.get(run.flow_id, str(run.flow_id))] += _seconds(run)
+
+    # Every subflow also leaves a placeholder task run in its parent, those are already under flows
+    subflow_placeholders = {flow_run.parent_task_run_id for flow_run in flow_runs}
+    task_runs = [run for run in task_runs if run.id not in subflow_placeholders]
+    # Task keys are the task function plus a source hash, templated run names would split them up
+    tasks = defaultdict(lambda: {"count": 0, "total_s": 0.0, "max_s": 0.0})
+    for run in task_runs:
+        seconds = _seconds(run)
+        summary = tasks[run.task_key.rsplit("-", 1)[0].rsplit(".", 1)[-1]]
+        summary["count"] += 1
+        summary["total_s"] += seconds
+        summary["max_s"] = max(summary["max_s"], seconds)
+
+    return {
+        "flows": {name: round(seconds, 3) for name, seconds in sorted(flows.items())},
+        "tasks": {
+            name: {key: round(value, 3) if isinstance(value, float) else value for key, value in summary.items()}
+            for name, summary in sorted(tasks.items())
+        },
+        "task_runs": [
+            {"name": run.name, "state": run.state_name, "seconds": round(_seconds(run), 3)}
+            for run in sorted(task_runs, key=lambda run: run.start_time)
+        ],
+    }
+
+# ==============================================================================
+# SCENARIO
+# ==============================================================================
+def land_webhook_events(db_path: Path, account: SyntheticAccount, count: int) -> None:
+    """Write webhook events straight to landing, as the webhook service would after a burst."""
+    events = [account.webhook_event(i) for i in range(account.transactions - count // 2,
+                                                       account.transactions + count - count // 2)]
+    df = pd.json_normalize([{**event["content"], **{k: v for k, v in event.items() if k != "content"}}
+                            for event in events], sep="_")
+    for column in ("updatedAt", "transactionTime", "settlementTime", "eventTimestamp"):
+        df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601").dt.tz_localize(None)
+
+    table = f"{LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}"
+    with duckdb.connect(str(db_path)) as conn:
+        landing_columns = [name for name, *_ in conn.execute(f"DESCRIBE {table}").fetchall()]
+        columns = ", ".join(f'"{column}"' for column in landing_columns if column in df.columns)
+        conn.register("webhook_events", df)
+        conn.execute(f"INSERT OR REPLACE INTO {table} ({columns}, last_modified) "
+                     f"SELECT {columns}, CURRENT_TIMESTAMP FROM webhook_events")
+
+def run_pipeline(pipeline: Callable[[], Any], db_path: Path, server: StarlingStandIn) -> Dict[str, Any]:
+    rows_before = table_counts(db_path)
+    api_before = server.stats()
+    since = datetime.now(timezone.utc)
+
+    started = time.perf_counter()
+    with PeakMemory() as memory:
+        pipeline()
+    wall_s = time.perf_counter() - started
+
+    rows_after = table_counts(db_path)
+    api_after = server.stats()
+    return {
+        "wall_s": round(wall_s, 3),
+        "peak_rss_mb": memory.peak_mb,
+        **prefect_timings(since),
+        "rows": {table: {"before": rows_before.get(table, 0), "after": count} for table, count in rows_after.items()},
+        "api": {
+            "requests": sum(api_after["requests"].values()) - sum(api_before["requests"].values()),
+            "bytes": api_after["bytes_sent"] - api_before["bytes_sent"],
+        },
+    }
+
+def run_scale(transactions: int, webhooks: int, latency_ms: float, workdir: Path, accounts: int = 1) -> Dict[str, Any]:
+    db_path = build_local_database(workdir / f"scale_{transactions}")
+    os.environ[LOCAL_DUCKDB_ENV] = str(db_path)
+
+    # Every account holds `transactions`, webhooks arrive for the primary one
+    account, *additional = [SyntheticAccount(transactions=transactions, years=HISTORY_YEARS,
+                                             seed=DEFAULT_SEED if n == 0 else f"{DEFAULT_SEED}-{n}")
+                            for n in range(accounts)]
+    # Every scale starts from empty staging, so the payload hashes of the previous one must go
+    for synthetic in (account, *additional):
+        for variable in (SPACES_HASH_VARIABLE, BALANCE_HASH_VARIABLE):
+            Variable.unset(api_calls.account_hash_variable(variable, synthetic.account_uid))
+
+    server = StarlingStandIn(account, StandInConfig(latency_ms=latency_ms), port=0,
+                             additional_accounts=additional).start()
+    api_calls.STARLING_API_URL = server.url
+    # The stand-in accepts any token, the default tenant only needs one to be set
+    os.environ.setdefault(DEFAULT_TOKEN_ENV, "bench-token")
+    get_tenant.cache_clear()
+    sync_tenant_limits(load_tenants())
+    try:
+        results = {"main_pipeline": run_pipeline(main_pipeline, db_path, server)}
+        land_webhook_events(db_path, account, webhooks)
+        results["webhook_pipeline"] = run_pipeline(webhook_pipeline, db_path, server)
+    finally:
+        server.stop()
+    logger.info(f"[{transactions}] " + ", ".join(f"{name}: {run['wall_s']}s" for name, run in results.items()))
+    return results
+
+# ==============================================================================
+# REPORTING
+# ==============================================================================
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     min_delta_s: float) -> List[str]:
+    """
+    Compare pipeline wall times and subflow durations per scale.
+
+    A duration regresses when it is both `threshold` slower relative to the baseline
+    and at least `min_delta_s` slower in absolute terms.
+    """
+    regressions = []
+    for scale, pipelines in current["scales"].items():
+        for pipeline, result in pipelines.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(pipeline)
+            if base is None:
+                logger.warning(f"No baseline for {pipeline} at scale {scale}")
+                continue
+            durations = {"wall": (result["wall_s"], base["wall_s"])}
+            durations.update({f"flow {name}": (seconds, base["flows"].get(name, 0.0))
+                              for name, seconds in result["flows"].items()})
+            for name, (seconds, base_seconds) in durations.items():
+                delta = seconds - base_seconds
+                if delta > min_delta_s and seconds > base_seconds * (1 + threshold):
+                    change = f"+{delta / base_seconds:.0%}" if base_seconds else "new"
+                    regressions.append(f"{pipeline} {name} @ {scale}: {base_seconds}s -> {seconds}s ({change})")
+    return regressions
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'scale':>10}  {'pipeline':<18}  {'wall s':>8}  {'peak MB':>8}  {'requests':>8}  slowest tasks")
+    for scale, pipelines in report["scales"].items():
+        for pipeline, result in pipelines.items():
+            slowest = sorted(result["tasks"].items(), key=lambda item: item[1]["total_s"], reverse=True)[:3]
+            tasks = ", ".join(f"{name} {summary['total_s']}s" for name, summary in slowest)
+            print(f"{scale:>10}  {pipeline:<18}  {result['wall_s']:>8}  {result['peak_rss_mb']:>8}  "
+                  f"{result['api']['requests']:>8}  {tasks}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against offline stand-ins")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="transactions in the api window")
+    parser.add_argument("--webhooks", type=int, default=100, help="webhook events landed before the webhook pipeline")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="simulated Starling api latency")
+    parser.add_argument("--accounts", type=int, default=1, help="accounts served by the stand-in, each of every scale")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-s", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="write the full report to this file")
+    parser.add_argument("--workdir", type=Path, help="where the local databases are built (default: temp dir)")
+    args = parser.parse_args(argv)
+
+    # The throwaway server shares one sqlite file, keep its telemetry writes out of the way
+    os.environ.setdefault("PREFECT_SERVER_ANALYTICS_ENABLED", "false")
+    with tempfile.TemporaryDirectory() as tmp, prefect_test_harness():
+        workdir = args.workdir or Path(tmp)
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "duckdb_version": duckdb.__version__,
+            "prefect_version": prefect.__version__,
+            "latency_ms": args.latency_ms,
+            "webhooks": args.webhooks,
+            "accounts": args.accounts,
+            "scales": {
+                str(scale): run_scale(scale, args.webhooks, args.latency_ms, workdir, args.accounts)
+                for scale in args.scales
+            },
+        }
+
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        logger.info(f"Report written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline updated at {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        logger.error(f"No baseline at {args.baseline}, run with --update-baseline first")
+        return 1
+
+    regressions = find_regressions(report, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_s)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging(log_to_file=False)
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import logging
+
+import duckdb
+
+from app.constants import LANDING_SCHEMA, TRANSACTIONS_LANDING_TABLE, TRANSACTIONS_WEBHOOK_LANDING_TABLE, \
+    SPACES_LANDING_TABLE, BALANCE_LANDING_TABLE, OPS_SCHEMA, TENANT_ACCOUNTS_TABLE, DEFAULT_TENANT
+
+logger = logging.getLogger(__name__)
+
+N_SPACES = 10
+N_MERCHANTS = 500
+WEBHOOK_RATIO = 0.01
+# Each merchant shows up under three spellings that the counterparty dimension folds together
+MERCHANT_PREFIXES = "['MERCHANT_', 'Merchant ', 'merchant-']"
+MERCHANT_SUFFIXES = "['_SHOP', ' Shop Ltd', '-shop']"
+CATEGORIES = ['GROCERIES', 'EATING_OUT', 'TRANSPORT', 'SHOPPING', 'ENTERTAINMENT', 'BILLS_AND_SERVICES',
+              'GENERAL', 'SAVING']
+
+# Ids are md5 based so runs are reproducible and webhook rows can overlap api rows
+seed_spaces = f"""
+    INSERT INTO {LANDING_SCHEMA}.{SPACES_LANDING_TABLE}
+        (savingsGoalUid, accountUid, "name", sortOrder, state, "totalSaved.currency", "totalSaved.minorUnits")
+    SELECT
+        md5('space-' || i)::UUID,
+        md5('account')::UUID,
+        'Space ' || i,
+        i,
+        'ACTIVE',
+        'GBP',
+        (i + 1) * 10000
+    FROM range({N_SPACES}) AS t(i);
+"""
+
+seed_balance = f"""
+    INSERT INTO {LANDING_SCHEMA}.{BALANCE_LANDING_TABLE}
+        (accountUid, "clearedBalance.currency", "clearedBalance.minorUnits",
+         "effectiveBalance.currency", "effectiveBalance.minorUnits",
+         "totalClearedBalance.currency", "totalClearedBalance.minorUnits",
+         "totalEffectiveBalance.currency", "totalEffectiveBalance.minorUnits")
+    VALUES (md5('account')::UUID, 'GBP', 123456, 'GBP', 120000, 'GBP', 678901, 'GBP', 650000);
+"""
+
+seed_transactions = f"""
+    INSERT INTO {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}
+        (feedItemUid, accountUid, categoryUid, direction, updatedAt, transactionTime, settlementTime, source,
+         sourceSubType, status, counterPartyType, counterPartyUid, counterPartyName, reference, country,
+         spendingCategory, userNote, hasAttachment, hasReceipt, "amount.currency", "amount.minorUnits",
+         "sourceAmount.currency", "sourceAmount.minorUnits")
+    SELECT
+        md5('tx-' || i)::UUID,
+        md5('account')::UUID,
+        CASE WHEN i % 20 = 0 THEN md5('space-' || (i % {N_SPACES}))::UUID ELSE md5('default')::UUID END,
+        CASE WHEN i % 10 = 0 THEN 'IN' ELSE 'OUT' END,
+        ts + INTERVAL 1 HOUR,
+        ts,
+        ts + INTERVAL 1 DAY,
+        'MASTER_CARD',
+        'CONTACTLESS',
+        'SETTLED',
+        'MERCHANT',
+        md5('merchant-' || (i % {N_MERCHANTS}))::UUID::VARCHAR,
+        list_element({MERCHANT_PREFIXES}, (i % 3)::INTEGER + 1) || (i % {N_MERCHANTS})
+            || list_element({MERCHANT_SUFFIXES}, (i % 3)::INTEGER + 1),
+        'REF ' || i,
+        'GB',
+        list_element(?, (i % {len(CATEGORIES)})::INTEGER + 1),
+        NULL,
+        false,
+        false,
+        'GBP',
+        (hash(i) % 10000)::BIGINT + 1,
+        'GBP',
+        (hash(i) % 10000)::BIGINT + 1
+    FROM (
+        SELECT i, TIMESTAMP '2024-01-01' + to_seconds((i * 7919) % (400 * 86400)) AS ts
+        FROM range(?) AS t(i)
+    );
+"""
+
+# Half of the webhook rows update existing transactions, half are new
+seed_webhook = f"""
+    INSERT INTO {LANDING_SCHEMA}.{TRANSACTIONS_WEBHOOK_LANDING_TABLE}
+        (feedItemUid, categoryUid, accountUid, amount_currency, amount_minorUnits, sourceAmount_currency,
+         sourceAmount_minorUnits, direction, updatedAt, transactionTime, settlementTime, source, status,
+         counterPartyType, counterPartyUid, counterPartyName, reference, country, spendingCategory,
+         hasAttachment, receiptPresent, webhookEventUid, eventTimestamp, accountHolderUid, last_modified)
+    SELECT
+        md5(CASE WHEN i % 2 = 0 THEN 'tx-' ELSE 'webhook-' END || i)::UUID,
+        md5('default')::UUID,
+        md5('account')::UUID,
+        'GBP',
+        (hash(i) % 10000)::INTEGER + 1,
+        'GBP',
+        (hash(i) % 10000)::INTEGER + 1,
+        'OUT',
+        ts,
+        ts,
+        ts,
+        'MASTER_CARD',
+        'SETTLED',
+        'MERCHANT',
+        md5('merchant-' || (i % {N_MERCHANTS}))::UUID::VARCHAR,
+        'MERCHANT_' || (i % {N_MERCHANTS}) || '_SHOP',
+        'REF ' || i,
+        'GB',
+        list_element(?, (i % {len(CATEGORIES)})::INTEGER + 1),
+        false,
+        false,
+        md5('event-' || i)::UUID::VARCHAR,
+        ts,
+        md5('holder')::UUID::VARCHAR,
+        CURRENT_TIMESTAMP + INTERVAL 1 DAY
+    FROM (
+        SELECT i, TIMESTAMP '2025-01-01' + to_seconds(i * 60) AS ts
+        FROM range(?) AS t(i)
+    );
+"""
+
+# The seeded account belongs to the default tenant, so tenant scoped statements see its rows
+seed_tenant_accounts = f"""
+    INSERT INTO {OPS_SCHEMA}.{TENANT_ACCOUNTS_TABLE} (account_uid, tenant_id)
+    VALUES (md5('account')::UUID, '{DEFAULT_TENANT}');
+"""
+
+def load_synthetic_data(conn: duckdb.DuckDBPyConnection, transactions: int) -> None:
+    """Fill every landing table with synthetic rows, sized by the number of api transactions."""
+    webhook_rows = max(1, int(transactions * WEBHOOK_RATIO))
+    conn.execute(seed_tenant_accounts)
+    conn.execute(seed_spaces)
+    conn.execute(seed_balance)
+    conn.execute(seed_transactions, [CATEGORIES, transactions])
+    conn.execute(seed_webhook, [CATEGORIES, webhook_rows])
+    logger.info(f"Seeded {transactions} api transactions and {webhook_rows} webhook transactions")
@@ -0,0 +1,223 @@
+'''
+SQL performance regression suite.
+
+Builds a local DuckDB from database/, seeds synthetic data at several scales and runs
+the staging statements, semantic views and dashboard queries with profiling enabled.
+Timings and plan operators are written to a JSON report and compared with a stored
+baseline; the run exits non-zero when a statement regresses beyond the threshold.
+
+    cd orchestrator
+    python -m benchmarks.sql_bench --update-baseline       # record a baseline
+    python -m benchmarks.sql_bench                         # compare against it
+'''
+
+import argparse
+import json
+import logging
+import runpy
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+
+from app.tasks.sql import insert_transactions_to_staging, insert_webhook_transactions_to_staging, \
+    insert_spaces_to_staging, insert_balance_to_staging, truncate_stg_transactions, truncate_stg_spaces, \
+    truncate_stg_balance, upsert_counterparties_from_api, upsert_counterparties_from_webhook, \
+    delete_stg_transactions_for_tenant, delete_lnd_transactions_for_tenant_since
+from app.constants import STAGING_SCHEMA, COUNTERPARTY_STAGING_TABLE, LANDING_SCHEMA, TRANSACTIONS_LANDING_TABLE, \
+    DEFAULT_TENANT
+from benchmarks.local_db import REPO_DIR, build_local_database
+from benchmarks.seed import load_synthetic_data
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "sql_baseline.json"
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DASHBOARD_QUERIES = runpy.run_path(str(REPO_DIR / "dashboard" / "app" / "queries.py"))
+
+@dataclass
+class Statement:
+    name: str
+    sql: str
+    # Untimed statements run before every repetition so each one starts from the same state
+    setup: List[str] = field(default_factory=list)
+    params: Optional[Any] = None
+
+# Tenant scoped statements run against the default tenant's partition, where the seed puts every row
+TENANT_PARAMS = {"tenant_id": DEFAULT_TENANT}
+
+def _bind(sql: str, params: Optional[Any] = None) -> Optional[Any]:
+    return params if params is not None else (TENANT_PARAMS if "$tenant_id" in sql else None)
+
+# The seed spans 400 days from 2024-01-01, so like the main pipeline's refresh window this
+# drops all but the oldest landed month
+REFRESH_SINCE = datetime(2024, 2, 1)
+# The landing delete is destructive, every repetition restores the rows from a copy taken on the first
+LANDING_SNAPSHOT = f"{LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}_bench"
+RESTORE_LANDING_TRANSACTIONS = [
+    f"CREATE TABLE IF NOT EXISTS {LANDING_SNAPSHOT} AS SELECT * FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}",
+    f"DELETE FROM {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE}",
+    f"INSERT INTO {LANDING_SCHEMA}.{TRANSACTIONS_LANDING_TABLE} SELECT * FROM {LANDING_SNAPSHOT}",
+]
+
+STATEMENTS = [
+    Statement("insert_spaces_to_staging", insert_spaces_to_staging, setup=[truncate_stg_spaces]),
+    Statement("insert_balance_to_staging", insert_balance_to_staging, setup=[truncate_stg_balance]),
+    Statement("upsert_counterparties_from_api", upsert_counterparties_from_api,
+              setup=[f"DELETE FROM {STAGING_SCHEMA}.{COUNTERPARTY_STAGING_TABLE}"]),
+    Statement("insert_transactions_to_staging", insert_transactions_to_staging, setup=[truncate_stg_transactions]),
+    Statement("delete_stg_transactions_for_tenant", delete_stg_transactions_for_tenant,
+              setup=[truncate_stg_transactions, insert_transactions_to_staging]),
+    Statement("upsert_counterparties_from_webhook", upsert_counterparties_from_webhook,
+              setup=[truncate_stg_transactions, insert_transactions_to_staging]),
+    Statement("insert_webhook_transactions_to_staging", insert_webhook_transactions_to_staging,
+              setup=[truncate_stg_transactions, insert_transactions_to_staging]),
+    Statement("delete_lnd_transactions_for_tenant_since", delete_lnd_transactions_for_tenant_since,
+              setup=RESTORE_LANDING_TRANSACTIONS, params={**TENANT_PARAMS, "since": REFRESH_SINCE}),
+    Statement("sem_available", "SELECT * FROM b_app.sem.available"),
+    Statement("sem_spending", "SELECT * FROM b_app.sem.spending"),
+    Statement("dashboard_data_versions", DASHBOARD_QUERIES["data_versions_query"]),
+    Statement("dashboard_available_budget", DASHBOARD_QUERIES["available_budget_query"]),
+    Statement("dashboard_summary", DASHBOARD_QUERIES["summary_query"]),
+    Statement("dashboard_filtered_spending", DASHBOARD_QUERIES["filtered_spending_query"],
+              setup=[f"CREATE OR REPLACE TEMP TABLE summary_df AS {DASHBOARD_QUERIES['summary_query']}"],
+              params=["0000-01", "9999-12"]),
+]
+
+def _flatten_operators(node: Dict[str, Any], depth: int = 0) -> List[Dict[str, Any]]:
+    """Flatten a DuckDB json profile tree into a list of operators with their depth."""
+    operators = []
+    for child in node.get("children", []):
+        operators.append({
+            "depth": depth,
+            "operator": child.get("operator_type"),
+            "timing_ms": round(child.get("operator_timing", 0.0) * 1000, 3),
+            "cardinality": child.get("operator_cardinality"),
+        })
+        operators.extend(_flatten_operators(child, depth + 1))
+    return operators
+
+def profile_statement(conn: duckdb.DuckDBPyConnection, statement: Statement, repeats: int,
+                      profile_path: Path) -> Dict[str, Any]:
+    """Run one statement `repeats` times with profiling enabled and summarise the runs."""
+    latencies, wall_times, profiles = [], [], []
+    for _ in range(repeats):
+        for sql in statement.setup:
+            conn.execute(sql, _bind(sql))
+        conn.execute("PRAGMA enable_profiling='json'")
+        conn.execute(f"PRAGMA profiling_output='{profile_path}'")
+        started = time.perf_counter()
+        conn.execute(statement.sql, _bind(statement.sql, statement.params)).fetchall()
+        wall_times.append((time.perf_counter() - started) * 1000)
+        conn.execute("PRAGMA disable_profiling")
+        profile = json.loads(profile_path.read_text())
+        latencies.append(profile["latency"] * 1000)
+        profiles.append(profile)
+
+    median = statistics.median(latencies)
+    representative = profiles[latencies.index(min(latencies, key=lambda x: abs(x - median)))]
+    return {
+        "latency_ms": round(median, 3),
+        "wall_ms": round(statistics.median(wall_times), 3),
+        "rows_returned": representative.get("rows_returned"),
+        "rows_scanned": representative.get("cumulative_rows_scanned"),
+        "operators": _flatten_operators(representative),
+    }
+
+def run_scale(transactions: int, repeats: int, workdir: Path) -> Dict[str, Any]:
+    db_path = build_local_database(workdir / f"scale_{transactions}")
+    results = {}
+    with duckdb.connect(str(db_path)) as conn:
+        load_synthetic_data(conn, transactions)
+        conn.execute("CHECKPOINT")
+        for statement in STATEMENTS:
+            results[statement.name] = profile_statement(conn, statement, repeats, db_path.with_suffix(".profile.json"))
+            logger.info(f"[{transactions}] {statement.name}: {results[statement.name]['latency_ms']} ms")
+    return results
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     min_delta_ms: float) -> List[str]:
+    """
+    Compare median latencies per scale and statement.
+
+    A statement regresses when it is both `threshold` slower relative to the baseline
+    and at least `min_delta_ms` slower in absolute terms, so sub-millisecond noise is ignored.
+    """
+    regressions = []
+    for scale, statements in current["scales"].items():
+        for name, result in statements.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(name)
+            if base is None:
+                logger.warning(f"No baseline for {name} at scale {scale}")
+                continue
+            delta = result["latency_ms"] - base["latency_ms"]
+            if delta > min_delta_ms and result["latency_ms"] > base["latency_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{name} @ {scale}: {base['latency_ms']} ms -> {result['latency_ms']} ms "
+                    f"(+{delta / base['latency_ms']:.0%})"
+                )
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'scale':>10}  {'statement':<40}  {'latency ms':>12}  {'wall ms':>10}  {'rows':>10}")
+    for scale, statements in report["scales"].items():
+        for name, result in statements.items():
+            print(f"{scale:>10}  {name:<40}  {result['latency_ms']:>12}  {result['wall_ms']:>10}  "
+                  f"{result['rows_returned']:>10}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SQL performance regression suite")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="api transaction counts to seed")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per statement, the median is reported")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="write the full report to this file")
+    parser.add_argument("--workdir", type=Path, help="where the local databases are built (default: temp dir)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "duckdb_version": duckdb.__version__,
+            "repeats": args.repeats,
+            "scales": {str(scale): run_scale(scale, args.repeats, workdir) for scale in args.scales},
+        }
+
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        logger.info(f"Report written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline updated at {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        logger.error(f"No baseline at {args.baseline}, run with --update-baseline first")
+        return 1
+
+    regressions = find_regressions(report, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging(log_to_file=False)
+    sys.exit(main())
@@ -0,0 +1,184 @@
+'''
+Deterministic synthetic Starling account: feed items, spaces, balance and webhook events.
+
+Nothing is materialised up front. Feed item i sits at a fixed slot on the account's
+timeline and is derived from a hash of its index, so any time window is generated in
+time proportional to the items it holds, and millions of transactions over many years
+cost no memory until they are requested. Ids are md5 based like benchmarks.seed, the
+same index always yields the same item. Accounts with another seed get their own ids, so
+several of them can be served side by side as the accounts of one token holder.
+'''
+
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.seed import N_SPACES, N_MERCHANTS, CATEGORIES
+
+MERCHANT_SPELLINGS = [("MERCHANT_", "_SHOP"), ("Merchant ", " Shop Ltd"), ("merchant-", "-shop")]
+SOURCES = [("MASTER_CARD", "CONTACTLESS"), ("MASTER_CARD", "CHIP_AND_PIN"), ("MASTER_CARD", "ONLINE"),
+           ("FASTER_PAYMENTS_OUT", None), ("DIRECT_DEBIT", None)]
+# One in INCOME_EVERY items is money in, one in SPACE_EVERY is paid from a space
+INCOME_EVERY = 10
+SPACE_EVERY = 20
+# Seed whose ids match benchmarks.seed, other seeds prefix their ids
+DEFAULT_SEED = "starling"
+
+def md5_uuid(value: str) -> str:
+    """Same id as DuckDB's md5(value)::UUID, so generated items line up with benchmarks.seed rows."""
+    return str(uuid.UUID(hashlib.md5(value.encode("utf-8")).hexdigest()))
+
+def api_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def _default_end() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+@dataclass(frozen=True)
+class SyntheticAccount:
+    transactions: int = 100_000
+    years: float = 5
+    spaces: int = N_SPACES
+    merchants: int = N_MERCHANTS
+    end: datetime = field(default_factory=_default_end)
+    seed: str = DEFAULT_SEED
+
+    @property
+    def start(self) -> datetime:
+        return self.end - timedelta(days=365 * self.years)
+
+    @property
+    def slot(self) -> timedelta:
+        """Timeline width owned by one feed item, each item lands somewhere inside its slot."""
+        return (self.end - self.start) / self.transactions
+
+    @property
+    def account_uid(self) -> str:
+        return md5_uuid(f"{self.seed}-account")
+
+    @property
+    def account_holder_uid(self) -> str:
+        return md5_uuid(f"{self.seed}-holder")
+
+    @property
+    def default_category_uid(self) -> str:
+        return self._uid("default")
+
+    def _uid(self, value: str) -> str:
+        return md5_uuid(value if self.seed == DEFAULT_SEED else f"{self.seed}-{value}")
+
+    def _hash(self, kind: str, i: int) -> int:
+        return int.from_bytes(hashlib.md5(f"{self.seed}-{kind}-{i}".encode("utf-8")).digest()[:8], "big")
+
+    def transaction_time(self, i: int) -> datetime:
+        jitter = (self._hash("time", i) % 1_000_000) / 1_000_000
+        return self.start + self.slot * (i + jitter)
+
+    def feed_item(self, i: int, updated_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """Feed item i as the settled-transactions-between endpoint returns it."""
+        h = self._hash("item", i)
+        # Squaring skews spend towards a few popular merchants, like a real account
+        merchant = int(self.merchants * ((h % 10_000) / 10_000) ** 2)
+        prefix, suffix = MERCHANT_SPELLINGS[i % len(MERCHANT_SPELLINGS)]
+        source, sub_type = SOURCES[merchant % len(SOURCES)]
+        incoming = i % INCOME_EVERY == 0
+        # Mostly small card spend with a long tail of larger payments
+        minor_units = 100 + (h >> 16) % 5_000 if (h >> 40) % 20 else 10_000 + (h >> 16) % 150_000
+        category_uid = self._uid(f"space-{i % self.spaces}") if i % SPACE_EVERY == 0 else self.default_category_uid
+        transaction_time = self.transaction_time(i)
+        amount = {"currency": "GBP", "minorUnits": minor_units}
+        return {
+            "feedItemUid": self._uid(f"tx-{i}"),
+            "categoryUid": category_uid,
+            "amount": amount,
+            "sourceAmount": dict(amount),
+            "direction": "IN" if incoming else "OUT",
+            "updatedAt": api_timestamp(updated_at or transaction_time + timedelta(hours=1)),
+            "transactionTime": api_timestamp(transaction_time),
+            "settlementTime": api_timestamp(transaction_time + timedelta(days=1)),
+            "source": "FASTER_PAYMENTS_IN" if incoming else source,
+            "sourceSubType": None if incoming else sub_type,
+            "status": "SETTLED",
+            "transactingApplicationUserUid": None,
+            "counterPartyType": "SENDER" if incoming else "MERCHANT",
+            "counterPartyUid": md5_uuid(f"merchant-{merchant}"),
+            "counterPartyName": f"{prefix}{merchant}{suffix}",
+            "counterPartySubEntityUid": None,
+            "reference": f"REF {i}",
+            "country": "GB",
+            "spendingCategory": "INCOME" if incoming else CATEGORIES[merchant % len(CATEGORIES)],
+            "userNote": None,
+            "hasAttachment": False,
+            "hasReceipt": False,
+            "batchPaymentDetails": None,
+        }
+
+    def feed_items(self, start: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+        """Items with start <= transactionTime < end, only the slots overlapping the window are visited."""
+        first = max(0, int((start - self.start) / self.slot))
+        last = min(self.transactions, int((end - self.start) / self.slot) + 1)
+        for i in range(first, last):
+            if start <= self.transaction_time(i) < end:
+                yield self.feed_item(i)
+
+    def account(self) -> Dict[str, Any]:
+        """This account as one entry of the /api/v2/accounts response."""
+        primary = self.seed == DEFAULT_SEED
+        return {
+            "accountUid": self.account_uid,
+            "accountType": "PRIMARY" if primary else "ADDITIONAL",
+            "defaultCategory": self.default_category_uid,
+            "currency": "GBP",
+            "createdAt": api_timestamp(self.start),
+            "name": "Personal" if primary else self.seed,
+        }
+
+    def accounts(self) -> Dict[str, Any]:
+        return {"accounts": [self.account()]}
+
+    def spaces_payload(self) -> Dict[str, List[Dict[str, Any]]]:
+        goals = []
+        for i in range(self.spaces):
+            saved = (self._hash("space", i) % 500_000) + 1_000
+            goals.append({
+                "savingsGoalUid": self._uid(f"space-{i}"),
+                "name": f"Space {i}",
+                "target": {"currency": "GBP", "minorUnits": saved * 2},
+                "totalSaved": {"currency": "GBP", "minorUnits": saved},
+                "savedPercentage": 50,
+                "sortOrder": i,
+                "state": "ACTIVE",
+            })
+        return {"savingsGoals": goals}
+
+    def balance(self) -> Dict[str, Any]:
+        cleared = self._hash("balance", 0) % 1_000_000
+        spaces = sum(goal["totalSaved"]["minorUnits"] for goal in self.spaces_payload()["savingsGoals"])
+        amount = lambda minor_units: {"currency": "GBP", "minorUnits": minor_units}
+        return {
+            "clearedBalance": amount(cleared),
+            "effectiveBalance": amount(cleared - 2_500),
+            "pendingTransactions": amount(2_500),
+            "acceptedOverdraft": amount(0),
+            "amount": amount(cleared - 2_500),
+            "totalClearedBalance": amount(cleared + spaces),
+            "totalEffectiveBalance": amount(cleared + spaces - 2_500),
+        }
+
+    def webhook_event(self, i: int, event_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Feed item webhook for item i, as Starling posts it to /starling/feed-item.
+
+        Indices below `transactions` update an existing item, higher ones are new transactions.
+        """
+        event_time = event_time or datetime.now(timezone.utc)
+        content = self.feed_item(i, updated_at=event_time)
+        content.update({"accountUid": self.account_uid, "receiptPresent": False, "feedItemFailureReason": None})
+        return {
+            "webhookEventUid": md5_uuid(f"{self.seed}-event-{i}-{event_time.timestamp()}"),
+            "eventTimestamp": api_timestamp(event_time),
+            "accountHolderUid": self.account_holder_uid,
+            "content": content,
+        }
@@ -0,0 +1,303 @@
+'''
+Offline stand-in for the Starling API, serving a SyntheticAccount over HTTP.
+
+Serves the endpoints api_calls.py uses with configurable latency, a request rate limit
+and random throttling answered with 429 and Retry-After, and a maximum feed window so
+callers must page through history in time windows as they would against Starling.
+Point the orchestrator at it with STARLING_API_URL. Additional accounts are listed by
+/api/v2/accounts next to the primary one. It also replays bursts of signed feed item
+webhooks at the webhook service.
+
+    cd orchestrator
+    python -m benchmarks.starling_server serve --transactions 1000000 --years 10 --latency-ms 80
+    python -m benchmarks.starling_server serve --accounts 3
+    python -m benchmarks.starling_server replay --url http://localhost:5000/starling/feed-item --count 500
+'''
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from benchmarks.starling_data import SyntheticAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+FEED_PATH = re.compile(r"^/api/v2/feed/account/(?P<uid>[^/]+)/settled-transactions-between$")
+SPACES_PATH = re.compile(r"^/api/v2/account/(?P<uid>[^/]+)/spaces$")
+BALANCE_PATH = re.compile(r"^/api/v2/accounts/(?P<uid>[^/]+)/balance$")
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Sustained requests per second before answering 429, None disables the limit
+    rate_limit: Optional[float] = None
+    # Share of requests throttled at random regardless of rate, exercises retry paths
+    throttle_ratio: float = 0.0
+    retry_after: int = 1
+    # Widest feed window served in one request, wider ones are rejected with 400
+    max_window_days: Optional[int] = None
+    # Bearer token required on every request, None accepts any
+    token: Optional[str] = None
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+def parse_api_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class StarlingStandIn(ThreadingHTTPServer):
+    """Threaded HTTP server answering Starling API calls from a primary SyntheticAccount and any additional ones."""
+    daemon_threads = True
+
+    def __init__(self, account: SyntheticAccount, config: Optional[StandInConfig] = None, host: str = "127.0.0.1",
+                 port: int = DEFAULT_PORT, additional_accounts: Sequence[SyntheticAccount] = ()):
+        self.account = account
+        self.accounts = {a.account_uid: a for a in (account, *additional_accounts)}
+        self.config = config or StandInConfig()
+        self.requests = Counter()
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._bucket = TokenBucket(self.config.rate_limit) if self.config.rate_limit else None
+        self._random = random.Random(account.seed)
+        self._stats_lock = threading.Lock()
+        super().__init__((host, port), StarlingHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StarlingStandIn":
+        """Serve from a daemon thread, for benchmarks that drive the stand-in in process."""
+        threading.Thread(target=self.serve_forever, name="starling-stand-in", daemon=True).start()
+        logger.info(f"Starling stand-in serving {len(self.accounts)} accounts at {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {"requests": dict(self.requests), "throttled": self.throttled, "bytes_sent": self.bytes_sent}
+
+    def should_throttle(self) -> bool:
+        with self._stats_lock:
+            random_hit = self._random.random() < self.config.throttle_ratio
+        throttled = random_hit or (self._bucket is not None and not self._bucket.take())
+        if throttled:
+            with self._stats_lock:
+                self.throttled += 1
+        return throttled
+
+    def record(self, endpoint: str, sent: int) -> None:
+        with self._stats_lock:
+            self.requests[endpoint] += 1
+            self.bytes_sent += sent
+
+class StarlingHandler(BaseHTTPRequestHandler):
+    server: StarlingStandIn
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+    def _send(self, endpoint: str, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.record(endpoint, len(payload))
+
+    def _route(self, path: str, query: Dict[str, list]) -> Tuple[str, int, Any]:
+        if path == "/api/v2/accounts":
+            return "accounts", 200, {"accounts": [a.account() for a in self.server.accounts.values()]}
+
+        for endpoint, pattern in (("feed", FEED_PATH), ("spaces", SPACES_PATH), ("balance", BALANCE_PATH)):
+            match = pattern.match(path)
+            if match is None:
+                continue
+            account = self.server.accounts.get(match["uid"])
+            if account is None:
+                return endpoint, 404, {"errors": [{"message": f"Account {match['uid']} not found"}]}
+            if endpoint == "spaces":
+                return endpoint, 200, account.spaces_payload()
+            if endpoint == "balance":
+                return endpoint, 200, account.balance()
+            return endpoint, *self._feed(account, query)
+        return "unknown", 404, {"errors": [{"message": f"No route for {path}"}]}
+
+    def _feed(self, account: SyntheticAccount, query: Dict[str, list]) -> Tuple[int, Any]:
+        try:
+            start = parse_api_timestamp(query["minTransactionTimestamp"][0])
+            end = parse_api_timestamp(query["maxTransactionTimestamp"][0])
+        except (KeyError, ValueError) as e:
+            return 400, {"errors": [{"message": f"Invalid transaction timestamps: {e}"}]}
+        max_days = self.server.config.max_window_days
+        if max_days is not None and end - start > timedelta(days=max_days):
+            return 400, {"errors": [{"message": f"Window wider than {max_days} days, page through smaller windows"}]}
+        return 200, {"feedItems": list(account.feed_items(start, end))}
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        if config.latency_ms or config.jitter_ms:
+            time.sleep((config.latency_ms + random.uniform(0, config.jitter_ms)) / 1000)
+        if config.token and self.headers.get("Authorization") != f"Bearer {config.token}":
+            return self._send("unauthorized", 403, {"error": "invalid_token"})
+        if self.server.should_throttle():
+            return self._send("throttled", 429, {"error": "TOO_MANY_REQUESTS"},
+                              {"Retry-After": str(config.retry_after)})
+        url = urlparse(self.path)
+        endpoint, status, body = self._route(url.path, parse_qs(url.query))
+        self._send(endpoint, status, body)
+
+# ==============================================================================
+# WEBHOOK REPLAY
+# ==============================================================================
+def sign_payload(body: bytes, secret: str) -> str:
+    """Starling shared secret signature: base64 of sha512 over the secret followed by the raw body."""
+    return base64.b64encode(hashlib.sha512(secret.encode("utf-8") + body).digest()).decode("ascii")
+
+def replay_webhooks(url: str, account: SyntheticAccount, count: int, concurrency: int = 10,
+                    update_ratio: float = 0.5, secret: Optional[str] = None, timeout: float = 30) -> Dict[str, Any]:
+    """
+    Post a burst of feed item webhooks and report status codes and latency percentiles.
+
+    update_ratio of the events update existing feed items, the rest are new transactions.
+    Every body is signed in X-Hook-Signature when a secret is given.
+    """
+    updates = int(count * update_ratio)
+    indices = [(i * 7919) % account.transactions for i in range(updates)]
+    indices += range(account.transactions, account.transactions + count - updates)
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def post(i: int) -> Tuple[int, float]:
+        body = json.dumps(account.webhook_event(i)).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if secret:
+            headers["X-Hook-Signature"] = sign_payload(body, secret)
+        started = time.perf_counter()
+        try:
+            status = session.post(url, data=body, headers=headers, timeout=timeout).status_code
+        except requests.RequestException as e:
+            logger.warning(f"Webhook {i} failed: {e}")
+            status = 0
+        return status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(post, indices))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for _, ms in results)
+    return {
+        "events": len(results),
+        "statuses": dict(Counter(status for status, _ in results)),
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 1) if latencies else None,
+    }
+
+# ==============================================================================
+# CLI
+# ==============================================================================
+def _account(args: argparse.Namespace, seed: Optional[str] = None) -> SyntheticAccount:
+    return SyntheticAccount(transactions=args.transactions, years=args.years, spaces=args.spaces,
+                            merchants=args.merchants, seed=seed or args.seed)
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline Starling API stand-in and webhook replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve the synthetic account over HTTP")
+    replay = commands.add_parser("replay", help="post a burst of signed feed item webhooks")
+    for command in (serve, replay):
+        command.add_argument("--transactions", type=int, default=100_000)
+        command.add_argument("--years", type=float, default=5)
+        command.add_argument("--spaces", type=int, default=10)
+        command.add_argument("--merchants", type=int, default=500)
+        command.add_argument("--seed", default="starling", help="same seed, same account")
+
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--rate-limit", type=float, help="requests per second before answering 429")
+    serve.add_argument("--throttle-ratio", type=float, default=0.0, help="share of requests answered 429 at random")
+    serve.add_argument("--retry-after", type=int, default=1)
+    serve.add_argument("--max-window-days", type=int, help="reject feed windows wider than this")
+    serve.add_argument("--token", help="require this bearer token")
+    serve.add_argument("--accounts", type=int, default=1, help="accounts listed for the token holder")
+
+    replay.add_argument("--url", required=True, help="webhook endpoint, e.g. http://localhost:5000/starling/feed-item")
+    replay.add_argument("--count", type=int, default=100)
+    replay.add_argument("--concurrency", type=int, default=10)
+    replay.add_argument("--update-ratio", type=float, default=0.5)
+    replay.add_argument("--secret", help="sign bodies in X-Hook-Signature with this shared secret")
+    args = parser.parse_args(argv)
+
+    account = _account(args)
+    if args.command == "replay":
+        print(json.dumps(replay_webhooks(args.url, account, args.count, args.concurrency, args.update_ratio,
+                                         args.secret), indent=2))
+        return 0
+
+    config = StandInConfig(args.latency_ms, args.jitter_ms, args.rate_limit, args.throttle_ratio,
+                           args.retry_after, args.max_window_days, args.token)
+    additional = [_account(args, f"{args.seed}-{n}") for n in range(1, args.accounts)]
+    server = StarlingStandIn(account, config, args.host, args.port, additional)
+    print(f"STARLING_API_URL={server.url}")
+    print(f"ACCOUNT_UUID={account.account_uid}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Served {server.stats()}")
+    return 0
+
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    setup_logging(log_to_file=False)
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""Fixtures shared by the orchestrator tests"""
+import pytest
+
+from app.constants import LOCAL_DUCKDB_ENV
+from benchmarks.local_db import build_local_database
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A local database built from database/ that the tasks connect to instead of MotherDuck."""
+    path = build_local_database(tmp_path)
+    monkeypatch.setenv(LOCAL_DUCKDB_ENV, str(path))
+    return str(path)
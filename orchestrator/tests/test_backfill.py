@@ -0,0 +1,109 @@
+"""Window planning, resumption and exactly-once landing of historical backfills"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import duckdb
+import pytest
+
+import app.tasks.backfill as backfill
+from app.tasks.backfill import split_windows, make_backfill_id, plan_backfill, backfill_window, backfill_progress
+
+ACCOUNT = "00000000-0000-0000-0000-0000000000a1"
+START = datetime(2024, 1, 1)
+END = datetime(2024, 3, 1)
+BACKFILL_ID = make_backfill_id("alex", START, END, 30)
+# Transactions on both ends of the range and on the boundary between its two windows
+TRANSACTION_TIMES = [START, datetime(2024, 1, 15), datetime(2024, 1, 31), datetime(2024, 2, 10),
+                     datetime(2024, 3, 1) - timedelta(milliseconds=1), END]
+
+class FakeFeed:
+    """Starling's feed over a fixed set of transactions, both ends of a query are inclusive."""
+
+    def __init__(self, times):
+        self.items = [{"feedItemUid": str(uuid4()), "categoryUid": str(uuid4()), "direction": "OUT",
+                       "transactionTime": time.isoformat(timespec="milliseconds") + "Z"} for time in times]
+        self.failing = set()
+
+    def fn(self, account_uid, from_timestamp, to_timestamp, tenant_id):
+        if from_timestamp in self.failing:
+            raise ConnectionError("Starling unavailable")
+        return [item for item in self.items if from_timestamp <= item["transactionTime"] <= to_timestamp]
+
+@contextmanager
+def no_slot(tenant_id):
+    yield
+
+@pytest.fixture
+def feed(monkeypatch):
+    feed = FakeFeed(TRANSACTION_TIMES)
+    monkeypatch.setattr(backfill, "get_transactions", feed)
+    monkeypatch.setattr(backfill, "api_slot", no_slot)
+    return feed
+
+def _run(windows):
+    for account_uid, window_start, window_end in plan_backfill.fn(BACKFILL_ID, "alex", [ACCOUNT], windows):
+        try:
+            backfill_window.fn(account_uid, window_start, window_end, BACKFILL_ID, "alex")
+        except ConnectionError:
+            pass
+
+def _ledger(database):
+    with duckdb.connect(database) as conn:
+        return conn.execute("""SELECT window_start, status, attempts, row_count FROM ops.backfill_ledger
+                               WHERE backfill_id = ? ORDER BY window_start""", [BACKFILL_ID]).fetchall()
+
+def _landed(database):
+    with duckdb.connect(database) as conn:
+        return conn.execute("""SELECT transactionTime, COUNT(*) FROM lnd.transactions_api_pull
+                               GROUP BY ALL ORDER BY transactionTime""").fetchall()
+
+def test_windows_cover_the_range_without_gaps_or_overlap():
+    windows = split_windows(START, END, 30)
+    assert windows == [(START, datetime(2024, 1, 31)), (datetime(2024, 1, 31), END)]
+    assert split_windows(START, datetime(2024, 1, 31), 30) == [(START, datetime(2024, 1, 31))]
+    # The last window stops at the range end
+    assert split_windows(START, datetime(2024, 3, 5), 30)[-1] == (END, datetime(2024, 3, 5))
+    assert split_windows(START, START + timedelta(days=1), 30) == [(START, START + timedelta(days=1))]
+
+@pytest.mark.parametrize("start, end", [(START, START), (END, START)])
+def test_empty_range_has_no_windows(start, end):
+    assert split_windows(start, end, 30) == []
+
+def test_windows_span_at_least_a_day():
+    with pytest.raises(ValueError):
+        split_windows(START, END, 0)
+
+def test_same_range_resumes_the_same_backfill():
+    assert make_backfill_id("alex", START, END, 30) == BACKFILL_ID
+    assert make_backfill_id("sam", START, END, 30) != BACKFILL_ID
+    assert make_backfill_id("alex", START, END, 7) != BACKFILL_ID
+
+def test_replan_keeps_done_windows(database, feed):
+    windows = split_windows(START, END, 30)
+    _run(windows)
+    assert plan_backfill.fn(BACKFILL_ID, "alex", [ACCOUNT], windows) == []
+    assert [status for _, status, _, _ in _ledger(database)] == ["done", "done"]
+
+def test_failed_window_is_picked_up_on_rerun(database, feed):
+    windows = split_windows(START, END, 30)
+    feed.failing.add("2024-01-31T00:00:00.000Z")
+    _run(windows)
+    assert _ledger(database) == [(START, "done", 1, 2), (datetime(2024, 1, 31), "failed", 1, None)]
+    assert plan_backfill.fn(BACKFILL_ID, "alex", [ACCOUNT], windows) == [(ACCOUNT, datetime(2024, 1, 31), END)]
+
+    feed.failing.clear()
+    _run(windows)
+    assert _ledger(database) == [(START, "done", 1, 2), (datetime(2024, 1, 31), "done", 2, 3)]
+    assert backfill_progress(BACKFILL_ID) == {"done": (2, 5)}
+
+def test_rows_on_a_window_edge_land_exactly_once(database, feed):
+    windows = split_windows(START, END, 30)
+    _run(windows)
+    # The range end belongs to the next backfill, the shared boundary to the later window
+    expected = [(time, 1) for time in TRANSACTION_TIMES if time < END]
+    assert _landed(database) == expected
+
+    # Reloading a done window replaces its rows rather than adding to them
+    backfill_window.fn(ACCOUNT, *windows[0], BACKFILL_ID, "alex")
+    assert _landed(database) == expected
@@ -0,0 +1,42 @@
+"""Typed landing loads and per-account replacement of landing rows"""
+from uuid import uuid4
+
+import duckdb
+import pytest
+
+import app.tasks.api_calls as api_calls
+from app.tasks.api_calls import upload_spaces
+from app.tasks.landing import to_typed_batch, load_typed_batch, SPACES_LANDING_COLUMNS
+
+ACCOUNT = "00000000-0000-0000-0000-0000000000a1"
+OTHER_ACCOUNT = "00000000-0000-0000-0000-0000000000b1"
+
+def _space(name):
+    return {"savingsGoalUid": str(uuid4()), "name": name,
+            "target": {"currency": "GBP", "minorUnits": 10000}, "state": "ACTIVE"}
+
+def _spaces_per_account(database):
+    with duckdb.connect(database) as conn:
+        return dict(conn.execute("SELECT accountUid::VARCHAR, COUNT(*) FROM lnd.spaces GROUP BY ALL").fetchall())
+
+def test_empty_batch_loads_nothing(database):
+    with duckdb.connect(database) as conn:
+        assert load_typed_batch(conn, to_typed_batch([], SPACES_LANDING_COLUMNS), "spaces", SPACES_LANDING_COLUMNS) == 0
+        assert conn.execute("SELECT COUNT(*) FROM lnd.spaces").fetchone() == (0,)
+
+def test_account_without_spaces_clears_its_landing_rows(database, monkeypatch):
+    payloads = {ACCOUNT: [_space("holiday"), _space("rainy day")], OTHER_ACCOUNT: [_space("car")]}
+    monkeypatch.setattr(api_calls, "get_spaces", lambda account_uid, tenant_id: payloads[account_uid])
+    for account_uid in payloads:
+        upload_spaces.fn(account_uid, "spaces_hash", force=True)
+    assert _spaces_per_account(database) == {ACCOUNT: 2, OTHER_ACCOUNT: 1}
+
+    # Both spaces closed, an empty payload is still a change to land
+    payloads[ACCOUNT] = []
+    assert upload_spaces.fn(ACCOUNT, "spaces_hash", force=True) is not None
+    assert _spaces_per_account(database) == {OTHER_ACCOUNT: 1}
+
+def test_missing_payload_fails(database, monkeypatch):
+    monkeypatch.setattr(api_calls, "get_spaces", lambda account_uid, tenant_id: None)
+    with pytest.raises(ValueError):
+        upload_spaces.fn(ACCOUNT, "spaces_hash", force=True)
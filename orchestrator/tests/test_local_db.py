@@ -0,0 +1,13 @@
+"""The DDL manifest the benchmark databases are built from"""
+import duckdb
+
+from benchmarks.local_db import DATABASE_DIR, build_local_database, ddl_files
+
+def test_manifest_lists_every_table_view_and_index():
+    on_disk = {path.relative_to(DATABASE_DIR).as_posix()
+               for folder in ("schema", "tables", "views", "index") for path in (DATABASE_DIR / folder).glob("*.sql")}
+    assert sorted(ddl_files()) == sorted(on_disk)
+
+def test_manifest_builds_a_database(tmp_path):
+    with duckdb.connect(str(build_local_database(tmp_path))) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM b_app.sem.spending").fetchone() == (0,)
@@ -0,0 +1,36 @@
+"""Fragmentation driven rewrites and what the maintenance log records"""
+import logging
+
+import pytest
+
+import app.flows.maintenance as maintenance
+from app.flows.maintenance import storage_maintenance
+from app.tasks.maintenance import fragmentation, ROW_GROUP_SIZE
+
+def test_fragmentation_counts_row_groups_a_rewrite_would_drop():
+    assert fragmentation(1, 100) == pytest.approx(0.99)
+    assert fragmentation(ROW_GROUP_SIZE * 2, 2) == 0.0
+    assert fragmentation(0, 0) == 0.0
+
+@pytest.fixture
+def recorded(monkeypatch):
+    metrics = {
+        "lnd.fragmented": {"row_groups": 10, "fragmentation": 0.9},
+        "lnd.compact": {"row_groups": 1, "fragmentation": 0.0},
+        "lnd.unmeasured": {"row_groups": None, "fragmentation": None},
+    }
+    rows = []
+    monkeypatch.setattr(maintenance, "measure_table", lambda table: {
+        "live_rows": 1, "size_bytes": None, "scan_ms": 1.0, **metrics[table]})
+    monkeypatch.setattr(maintenance, "rewrite_table", lambda table: metrics[table].update(row_groups=1, fragmentation=0.0))
+    monkeypatch.setattr(maintenance, "checkpoint_database", lambda: None)
+    monkeypatch.setattr(maintenance, "record_maintenance", rows.extend)
+    return rows
+
+def test_tables_without_storage_info_are_recorded_as_unmeasured(recorded, caplog):
+    with caplog.at_level(logging.ERROR, logger=maintenance.__name__):
+        storage_maintenance.fn(["lnd.fragmented", "lnd.compact", "lnd.unmeasured"])
+    assert {row["table_name"]: row["action"] for row in recorded} == \
+        {"lnd.fragmented": "rewrite", "lnd.compact": "none", "lnd.unmeasured": "unmeasured"}
+    errors = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert len(errors) == 1 and "lnd.unmeasured" in errors[0].getMessage()
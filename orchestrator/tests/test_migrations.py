@@ -0,0 +1,68 @@
+"""Upgrading databases created before the typed landing tables"""
+from datetime import datetime
+
+import duckdb
+import pytest
+
+from app.tasks.sql import delete_lnd_transactions_in_window
+from benchmarks.local_db import build_local_database, DATABASE_DIR
+
+ACCOUNT = "00000000-0000-0000-0000-0000000000a1"
+
+@pytest.fixture
+def legacy_database(tmp_path):
+    """A database whose landing transactions still hold uuids and timestamps as VARCHAR."""
+    conn = duckdb.connect(str(build_local_database(tmp_path)))
+    conn.execute("""
+        CREATE OR REPLACE TABLE lnd.transactions_api_pull AS
+        SELECT * EXCLUDE (accountUid) REPLACE (
+            feedItemUid::VARCHAR AS feedItemUid, categoryUid::VARCHAR AS categoryUid,
+            updatedAt::VARCHAR AS updatedAt, transactionTime::VARCHAR AS transactionTime,
+            settlementTime::VARCHAR AS settlementTime)
+        FROM lnd.transactions_api_pull;
+        INSERT INTO lnd.transactions_api_pull (feedItemUid, categoryUid, direction, transactionTime)
+        VALUES (uuid()::VARCHAR, uuid()::VARCHAR, 'OUT', '2023-12-31T23:59:59.999Z'),
+               (uuid()::VARCHAR, NULL, 'IN', '2024-01-01T00:00:00.000Z');
+    """)
+    yield conn
+    conn.close()
+
+def _migrate(conn):
+    for migration in ("add_account_uid.sql", "type_lnd_transactions.sql"):
+        conn.execute((DATABASE_DIR / "migrations" / migration).read_text())
+
+def test_migration_types_landing_transactions_and_keeps_rows(legacy_database):
+    _migrate(legacy_database)
+    _migrate(legacy_database)
+    types = dict(legacy_database.execute("""SELECT column_name, data_type FROM information_schema.columns
+                                            WHERE table_schema = 'lnd' AND table_name = 'transactions_api_pull'""").fetchall())
+    assert {column: types[column] for column in ("feedItemUid", "accountUid", "transactionTime")} == \
+        {"feedItemUid": "UUID", "accountUid": "UUID", "transactionTime": "TIMESTAMP"}
+    assert legacy_database.execute("SELECT transactionTime FROM lnd.transactions_api_pull ORDER BY 1").fetchall() == \
+        [(datetime(2023, 12, 31, 23, 59, 59, 999000),), (datetime(2024, 1, 1),)]
+
+def test_window_delete_runs_on_a_migrated_database(legacy_database):
+    _migrate(legacy_database)
+    legacy_database.execute(f"UPDATE lnd.transactions_api_pull SET accountUid = '{ACCOUNT}'")
+    legacy_database.execute(delete_lnd_transactions_in_window, {"account_uid": ACCOUNT, "window_start": datetime(2024, 1, 1),
+                                                                "window_end": datetime(2024, 2, 1)})
+    assert legacy_database.execute("SELECT COUNT(*) FROM lnd.transactions_api_pull").fetchone() == (1,)
+
+def test_webhook_migration_types_ids_and_keeps_the_primary_key(tmp_path):
+    with duckdb.connect(str(build_local_database(tmp_path))) as conn:
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE lnd.transactions_webhook AS
+            SELECT * REPLACE (feedItemUid::VARCHAR AS feedItemUid, categoryUid::VARCHAR AS categoryUid,
+                              accountUid::VARCHAR AS accountUid)
+            FROM lnd.transactions_webhook;
+            INSERT INTO lnd.transactions_webhook (feedItemUid, accountUid, last_modified)
+            VALUES (uuid()::VARCHAR, '{ACCOUNT}', CURRENT_TIMESTAMP);
+        """)
+        for _ in range(2):
+            conn.execute((DATABASE_DIR / "migrations" / "type_lnd_transactions_webhook.sql").read_text())
+        feed_item_uid, account_uid = conn.execute("SELECT feedItemUid, accountUid FROM lnd.transactions_webhook").fetchone()
+        assert str(account_uid) == ACCOUNT
+        # The webhook service writes ids as strings, a replayed event still replaces its row
+        conn.execute("INSERT OR REPLACE INTO lnd.transactions_webhook (feedItemUid, accountUid) VALUES (?, ?)",
+                     [str(feed_item_uid), ACCOUNT])
+        assert conn.execute("SELECT COUNT(*) FROM lnd.transactions_webhook").fetchone() == (1,)
@@ -0,0 +1,68 @@
+"""Fair queueing of tenants and isolation of their partitions"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import duckdb
+import pytest
+
+from app.flows.scheduler import pick_due_tenants
+from app.tasks.sql import execute_raw_sql, execute_transaction, delete_lnd_transactions_for_tenant_since, \
+    delete_stg_transactions_for_tenant, insert_transactions_to_staging
+from app.tasks.tenants import Tenant, claim_accounts
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+ALEX_ACCOUNT = "00000000-0000-0000-0000-0000000000a1"
+SAM_ACCOUNT = "00000000-0000-0000-0000-0000000000b1"
+JOINT_ACCOUNT = "00000000-0000-0000-0000-0000000000c1"
+
+def test_due_tenants_are_served_least_recently_refreshed_first():
+    tenants = [Tenant("alex"), Tenant("sam"), Tenant("kim"), Tenant("lee", refresh_minutes=120)]
+    last_refreshed = {"alex": NOW - timedelta(days=2), "sam": NOW - timedelta(days=3), "lee": NOW - timedelta(hours=1)}
+    picked = pick_due_tenants(tenants, Counter(), last_refreshed, free_slots=3, now=NOW)
+    # kim never ran, lee refreshed within its interval
+    assert [tenant.tenant_id for tenant in picked] == ["kim", "sam", "alex"]
+
+def test_tenants_in_flight_or_inactive_are_skipped():
+    tenants = [Tenant("alex"), Tenant("sam"), Tenant("kim", active=False)]
+    picked = pick_due_tenants(tenants, Counter({"alex": 1}), {}, free_slots=3, now=NOW)
+    assert [tenant.tenant_id for tenant in picked] == ["sam"]
+
+@pytest.mark.parametrize("free_slots, expected", [(2, ["alex", "sam"]), (0, []), (-1, [])])
+def test_free_slots_cap_the_queued_runs(free_slots, expected):
+    tenants = [Tenant("alex"), Tenant("sam"), Tenant("kim")]
+    last_refreshed = {"alex": NOW - timedelta(days=3), "sam": NOW - timedelta(days=2), "kim": NOW - timedelta(days=1)}
+    picked = pick_due_tenants(tenants, Counter(), last_refreshed, free_slots=free_slots, now=NOW)
+    assert [tenant.tenant_id for tenant in picked] == expected
+
+def _counts(database: str, table: str, column: str) -> dict:
+    with duckdb.connect(database) as conn:
+        return dict(conn.execute(f"SELECT {column}::VARCHAR, COUNT(*) FROM {table} GROUP BY ALL").fetchall())
+
+def test_tenant_reload_leaves_other_tenants_rows_untouched(database):
+    with duckdb.connect(database) as conn:
+        conn.execute(f"""
+            INSERT INTO ops.tenant_accounts (account_uid, tenant_id) VALUES ('{ALEX_ACCOUNT}', 'alex'), ('{SAM_ACCOUNT}', 'sam');
+            INSERT INTO lnd.transactions_api_pull (feedItemUid, accountUid, categoryUid, direction, transactionTime)
+            SELECT uuid(), account_uid::UUID, uuid(), 'OUT', TIMESTAMP '2025-01-01' + INTERVAL (n) DAY
+            FROM (VALUES ('{ALEX_ACCOUNT}'), ('{SAM_ACCOUNT}')) a(account_uid), range(10) r(n);
+        """)
+    for tenant_id in ("alex", "sam"):
+        execute_raw_sql.fn(insert_transactions_to_staging, params={"tenant_id": tenant_id})
+
+    # Alex's refresh drops the refresh window of alex's accounts and rebuilds alex's staging
+    execute_raw_sql.fn(delete_lnd_transactions_for_tenant_since,
+                       params={"tenant_id": "alex", "since": datetime(2025, 1, 6)})
+    execute_transaction.fn([
+        (delete_stg_transactions_for_tenant, "Delete Tenant Staging Transactions"),
+        (insert_transactions_to_staging, "Insert transactions to staging from landing"),
+    ], params={"tenant_id": "alex"})
+
+    assert _counts(database, "lnd.transactions_api_pull", "accountUid") == {ALEX_ACCOUNT: 5, SAM_ACCOUNT: 10}
+    assert _counts(database, "stg.transactions", "account_uid") == {ALEX_ACCOUNT: 5, SAM_ACCOUNT: 10}
+
+def test_joint_account_stays_with_the_first_claimer(database):
+    assert claim_accounts("alex", [ALEX_ACCOUNT, JOINT_ACCOUNT]) == [ALEX_ACCOUNT, JOINT_ACCOUNT]
+    assert claim_accounts("sam", [SAM_ACCOUNT, JOINT_ACCOUNT]) == [SAM_ACCOUNT]
+    with duckdb.connect(database) as conn:
+        owners = dict(conn.execute("SELECT account_uid::VARCHAR, tenant_id FROM ops.tenant_accounts").fetchall())
+    assert owners == {ALEX_ACCOUNT: "alex", JOINT_ACCOUNT: "alex", SAM_ACCOUNT: "sam"}
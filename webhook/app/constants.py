@@ -9,7 +9,10 @@ APP_DIR = Path(__file__).parent
 
 MOTHERDUCK_TOKEN = os.getenv('MD_TOKEN')
 DATABASE = 'b_app'
+# Single account deployments without a tenant registry, routed to the default tenant
 ACCOUNT_UUID = os.getenv('ACCOUNT_UUID')
+DEFAULT_TENANT = "default"
+TENANT_TAG = "tenant:{tenant_id}"
 
 def get_md_connection():
     md_connection = duckdb.connect(f'md:{DATABASE}?motherduck_token={MOTHERDUCK_TOKEN}')
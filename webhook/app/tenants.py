@@ -0,0 +1,67 @@
+'''Routes webhook events to the tenant owning their account'''
+import logging
+from typing import Optional
+
+import duckdb
+from werkzeug.exceptions import Unauthorized
+
+from app.constants import ACCOUNT_UUID, DEFAULT_TENANT
+
+log = logging.getLogger(__name__)
+
+account_owner_query = """
+    SELECT a.tenant_id, COALESCE(t.active, true)
+    FROM ops.tenant_accounts a
+        LEFT JOIN ops.tenants t USING (tenant_id)
+    WHERE a.account_uid = $account_uid::UUID
+"""
+account_holder_tenant_query = """
+    SELECT tenant_id, active
+    FROM ops.tenants
+    WHERE account_holder_uid = $account_holder_uid::UUID
+"""
+# The pipeline merges a tenant's webhook rows by account, claim the account before landing it
+claim_account_query = """
+    INSERT OR IGNORE INTO ops.tenant_accounts (account_uid, tenant_id)
+    VALUES ($account_uid::UUID, $tenant_id)
+"""
+
+def _find_tenant(conn: duckdb.DuckDBPyConnection, account_uid: str, account_holder_uid: str) -> Optional[tuple]:
+    """Owner of the account, else the tenant registered for the account holder."""
+    owner = conn.execute(account_owner_query, {"account_uid": account_uid}).fetchone()
+    if owner is None and account_holder_uid:
+        owner = conn.execute(account_holder_tenant_query, {"account_holder_uid": account_holder_uid}).fetchone()
+    if owner is None and account_uid == ACCOUNT_UUID:
+        owner = (DEFAULT_TENANT, True)
+    return owner
+
+def route_to_tenant(conn: duckdb.DuckDBPyConnection, account_uid: Optional[str], account_holder_uid: Optional[str]) -> str:
+    """
+    Tenant a webhook event belongs to, raises Unauthorized for accounts no tenant owns.
+
+    Lookup order: the account's owner in ops.tenant_accounts, then the tenant registered
+    for the account holder, then ACCOUNT_UUID for deployments without a registry.
+    """
+    if not account_uid:
+        log.error("Webhook without an account UID")
+        raise Unauthorized('Invalid account UID')
+    try:
+        owner = _find_tenant(conn, account_uid, account_holder_uid)
+    except duckdb.ConversionException:
+        log.error(f"Invalid account UID in webhook: {account_uid}")
+        raise Unauthorized('Invalid account UID')
+    except duckdb.CatalogException:
+        # No tenant registry yet, only the configured account is accepted
+        owner = None
+        if account_uid == ACCOUNT_UUID:
+            return DEFAULT_TENANT
+
+    if owner is None:
+        log.error(f"Invalid account UID in webhook: {account_uid}")
+        raise Unauthorized('Invalid account UID')
+    tenant_id, active = owner
+    if not active:
+        log.error(f"Webhook for inactive tenant {tenant_id}")
+        raise Unauthorized('Inactive tenant')
+    conn.execute(claim_account_query, {"account_uid": account_uid, "tenant_id": tenant_id})
+    return tenant_id
@@ -3,16 +3,25 @@ load_dotenv()
 
 import asyncio
 import logging
+from typing import Optional
+from app.constants import DEFAULT_TENANT, TENANT_TAG
 from app.utils.logging_config import setup_logging
+from app.utils.tracing import TRACEPARENT_LABEL
 
 log = logging.getLogger(__name__)
 
 async def trigger_pipeline_async(
     pipeline_name: str = "webhook-pipeline", 
     flow_name: str = "webhook-pipeline",
-    timeout: int = 30
+    timeout: int = 30,
+    traceparent: Optional[str] = None,
+    tenant_id: str = DEFAULT_TENANT
 ):
     from prefect import get_client
+    from prefect.client.schemas.filters import FlowRunFilter, FlowRunFilterDeploymentId, FlowRunFilterState, \
+        FlowRunFilterStateType, FlowRunFilterTags
+    from prefect.client.schemas.objects import StateType
+    tenant_tag = TENANT_TAG.format(tenant_id=tenant_id)
     async with get_client() as client:
         deployment_path = f"{flow_name}/{pipeline_name}"
         log.info(f"Calling Prefect client for deployment: {deployment_path}")
@@ -27,8 +36,25 @@ async def trigger_pipeline_async(
                     raise ValueError(error_msg)
                 
                 log.info(f"Found deployment: {deployment.name} (ID: {deployment.id})")
+
+                # A run of this tenant that has not started yet merges this event too, so a
+                # burst of webhooks queues one run per tenant rather than one per event
+                waiting = await client.read_flow_runs(flow_run_filter=FlowRunFilter(
+                    deployment_id=FlowRunFilterDeploymentId(any_=[deployment.id]),
+                    tags=FlowRunFilterTags(all_=[tenant_tag]),
+                    state=FlowRunFilterState(type=FlowRunFilterStateType(any_=[StateType.SCHEDULED, StateType.PENDING])),
+                ), limit=1)
+                if waiting:
+                    log.info(f"Flow run {waiting[0].id} of tenant {tenant_id} has not started yet, not triggering another")
+                    return waiting[0]
                 
-                flow_run = await client.create_flow_run_from_deployment(deployment.id)
+                # The label parents Prefect's flow and task spans on the webhook trace
+                flow_run = await client.create_flow_run_from_deployment(
+                    deployment.id,
+                    parameters={"tenant_id": tenant_id, **({"traceparent": traceparent} if traceparent else {})},
+                    tags=[tenant_tag],
+                    labels={TRACEPARENT_LABEL: traceparent} if traceparent else None,
+                )
                 
                 log.info(
                     f"Successfully created flow run {flow_run.id} for deployment '{deployment.name}'"
@@ -50,10 +76,12 @@ async def trigger_pipeline_async(
 def trigger_pipeline(
     pipeline_name: str = "webhook-pipeline",
     flow_name: str = "webhook-pipeline",
-    timeout: int = 30
+    timeout: int = 30,
+    traceparent: Optional[str] = None,
+    tenant_id: str = DEFAULT_TENANT
 ):
     """Synchronous wrapper for triggering Prefect pipeline"""
-    return asyncio.run(trigger_pipeline_async(pipeline_name, flow_name, timeout))
+    return asyncio.run(trigger_pipeline_async(pipeline_name, flow_name, timeout, traceparent, tenant_id))
 
 if __name__ == "__main__":
     setup_logging()
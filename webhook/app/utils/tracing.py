@@ -0,0 +1,59 @@
+'''OpenTelemetry setup, every span is a no-op unless the tracing extra is installed and an exporter configured'''
+import os
+import logging
+from typing import Optional
+
+from opentelemetry import propagate, trace
+
+log = logging.getLogger(__name__)
+
+SERVICE_NAME = "webhook"
+OTLP_ENDPOINT_ENV = "OTEL_EXPORTER_OTLP_ENDPOINT"
+TRACE_FILE_ENV = "TRACE_EXPORT_FILE"
+# Label Prefect parents its own flow and task run spans on
+TRACEPARENT_LABEL = "__OTEL_TRACEPARENT"
+
+tracer = trace.get_tracer("app")
+_configured = False
+
+def setup_tracing(service_name: str = SERVICE_NAME) -> bool:
+    """
+    Install a tracer provider exporting to a local collector, a JSON lines file, or both.
+
+    OTEL_EXPORTER_OTLP_ENDPOINT sends spans over OTLP/HTTP, TRACE_EXPORT_FILE appends one
+    span per line. Returns True when spans are exported.
+    """
+    global _configured
+    endpoint, path = os.getenv(OTLP_ENDPOINT_ENV), os.getenv(TRACE_FILE_ENV)
+    if _configured or not (endpoint or path):
+        return _configured
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        log.warning("Tracing is configured but opentelemetry-sdk is missing, install the tracing extra")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    if endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        except ImportError:
+            log.warning("OTLP endpoint is set but opentelemetry-exporter-otlp-proto-http is missing, install the tracing extra")
+    if path:
+        exporter = ConsoleSpanExporter(out=open(path, "a", encoding="utf-8"),
+                                       formatter=lambda span: span.to_json(indent=None) + "\n")
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    # Spans still buffered are flushed by the provider's exit hook
+    trace.set_tracer_provider(provider)
+    _configured = True
+    log.info(f"Tracing enabled for {service_name}")
+    return True
+
+def current_traceparent() -> Optional[str]:
+    """W3C traceparent of the active span, None when nothing is being traced."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")
@@ -1,22 +1,26 @@
 import logging
 from flask import Flask, request, jsonify
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from pydantic import ValidationError
 from datetime import datetime
-from werkzeug.exceptions import Unauthorized
+import duckdb
 
 from app.models import WebhookPayload
-from app.constants import get_md_connection, ACCOUNT_UUID
+from app.constants import get_md_connection, DATABASE
+from app.tenants import route_to_tenant
 from app.trigger import trigger_pipeline
 from app.utils.logging_config import setup_logging
+from app.utils.tracing import setup_tracing, current_traceparent, tracer
 
 app = Flask(__name__)
 log = logging.getLogger(__name__)
 setup_logging()
+setup_tracing()
 
-def insert_webhook_data(payload: WebhookPayload) -> bool:
+def insert_webhook_data(conn: duckdb.DuckDBPyConnection, payload: WebhookPayload) -> bool:
     """Insert webhook payload into MotherDuck table"""
     try:
-        conn = get_md_connection()
         
         insert_query = """      
         INSERT OR REPLACE INTO lnd.transactions_webhook (
@@ -104,8 +108,9 @@ def insert_webhook_data(payload: WebhookPayload) -> bool:
             payload.eventTimestamp,
             payload.accountHolderUid
         )
-        conn.execute(insert_query, values)
-        conn.close()
+        with tracer.start_as_current_span("sql insert transactions_webhook", kind=SpanKind.CLIENT,
+                                          attributes={"db.system": "duckdb", "db.name": DATABASE}):
+            conn.execute(insert_query, values)
         return True
         
     except Exception as e:
@@ -113,15 +118,17 @@ def insert_webhook_data(payload: WebhookPayload) -> bool:
         raise
     
 
-def validate_webhook_auth(payload: WebhookPayload) -> bool:
-    """Validate that the webhook is for the expected account UID"""
-    if not payload.content.accountUid == ACCOUNT_UUID:
-        log.error(f"Invalid account UID in webhook: {payload.content.accountUid}")
-        raise Unauthorized('Invalid account UID')
-    return True
-
 @app.route('/starling/feed-item', methods=['POST'])
 def receive_transaction_webhook():
+    # Root of the trace that follows this event through the pipeline to the dashboard
+    with tracer.start_as_current_span("webhook feed-item", kind=SpanKind.SERVER) as span:
+        response, status = _handle_transaction_webhook()
+        span.set_attribute("http.response.status_code", status)
+        if status >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+        return response, status
+
+def _handle_transaction_webhook():
     try:
         data = request.get_json()
         #log.info(f"Received webhook payload: {data}")
@@ -137,13 +144,20 @@ def receive_transaction_webhook():
                 'status': 'error',
                 'errors': e.errors()
             }), 422
-        validate_webhook_auth(payload)
-        insert_webhook_data(payload)
-        trigger_pipeline()
+        span = trace.get_current_span()
+        span.set_attribute("starling.webhook_event_uid", payload.webhookEventUid)
+        span.set_attribute("starling.feed_item_uid", payload.content.feedItemUid)
+        with get_md_connection() as conn:
+            tenant_id = route_to_tenant(conn, payload.content.accountUid, payload.accountHolderUid)
+            span.set_attribute("tenant.id", tenant_id)
+            insert_webhook_data(conn, payload)
+        with tracer.start_as_current_span("trigger webhook-pipeline"):
+            trigger_pipeline(traceparent=current_traceparent(), tenant_id=tenant_id)
         log.info(f"Received webhook at {datetime.now()}")
         return jsonify({"status": "success"}), 200
     except Exception as e:
         log.error(f"Error processing webhook: {e}")
+        trace.get_current_span().record_exception(e)
         return jsonify({"status": "error", "message": str(e)}), 500
     
 @app.route('/health', methods=['GET'])
@@ -0,0 +1,44 @@
+"""Routing webhook events to tenants"""
+from pathlib import Path
+
+import duckdb
+import pytest
+from werkzeug.exceptions import Unauthorized
+
+from app.tenants import route_to_tenant
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+DDL_FILES = ["schema/ops.sql", "tables/ops.tenants.sql", "tables/ops.tenant_accounts.sql"]
+ALEX_HOLDER = "00000000-0000-0000-0000-00000000000a"
+SAM_ACCOUNT = "00000000-0000-0000-0000-0000000000b1"
+JOINT_ACCOUNT = "00000000-0000-0000-0000-0000000000c1"
+
+@pytest.fixture
+def conn():
+    connection = duckdb.connect()
+    for ddl_file in DDL_FILES:
+        connection.execute((DATABASE_DIR / ddl_file).read_text())
+    connection.execute(f"""
+        INSERT INTO ops.tenants (tenant_id, account_holder_uid, token_env) VALUES
+            ('alex', '{ALEX_HOLDER}', 'STARLING_TOKEN_ALEX'),
+            ('sam', NULL, 'STARLING_TOKEN_SAM');
+        INSERT INTO ops.tenant_accounts (account_uid, tenant_id) VALUES
+            ('{SAM_ACCOUNT}', 'sam'),
+            ('{JOINT_ACCOUNT}', 'sam');
+    """)
+    yield connection
+    connection.close()
+
+def test_account_owner_wins_over_account_holder(conn):
+    # A joint account stays with the tenant that claimed it, whoever's event it is
+    assert route_to_tenant(conn, JOINT_ACCOUNT, ALEX_HOLDER) == "sam"
+
+def test_new_account_is_routed_by_holder_and_claimed(conn):
+    new_account = "00000000-0000-0000-0000-0000000000a2"
+    assert route_to_tenant(conn, new_account, ALEX_HOLDER) == "alex"
+    owner = conn.execute(f"SELECT tenant_id FROM ops.tenant_accounts WHERE account_uid = '{new_account}'").fetchone()
+    assert owner == ("alex",)
+
+def test_unknown_account_is_rejected(conn):
+    with pytest.raises(Unauthorized):
+        route_to_tenant(conn, "00000000-0000-0000-0000-0000000000ff", "00000000-0000-0000-0000-0000000000fe")
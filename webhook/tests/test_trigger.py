@@ -0,0 +1,51 @@
+"""Trace context and tenant handed from the webhook to the pipeline run"""
+from types import SimpleNamespace
+from uuid import uuid4
+
+import prefect
+from app.trigger import trigger_pipeline
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+class FakeClient:
+    def __init__(self, waiting=()):
+        self.created = None
+        self.waiting = list(waiting)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def read_deployment_by_name(self, name):
+        return SimpleNamespace(id=uuid4(), name=name)
+
+    async def read_flow_runs(self, flow_run_filter=None, limit=None):
+        self.filter = flow_run_filter
+        return self.waiting
+
+    async def create_flow_run_from_deployment(self, deployment_id, **kwargs):
+        self.created = kwargs
+        return SimpleNamespace(id="flow-run-id")
+
+def test_traceparent_is_passed_to_flow_run(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(prefect, "get_client", lambda: client)
+    trigger_pipeline(traceparent=TRACEPARENT)
+    assert client.created["parameters"] == {"tenant_id": "default", "traceparent": TRACEPARENT}
+    assert client.created["labels"] == {"__OTEL_TRACEPARENT": TRACEPARENT}
+
+def test_untraced_trigger_sets_no_label(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(prefect, "get_client", lambda: client)
+    trigger_pipeline()
+    assert client.created == {"parameters": {"tenant_id": "default"}, "tags": ["tenant:default"], "labels": None}
+
+def test_waiting_run_of_the_tenant_absorbs_the_event(monkeypatch):
+    client = FakeClient(waiting=[SimpleNamespace(id="waiting-run-id")])
+    monkeypatch.setattr(prefect, "get_client", lambda: client)
+    flow_run = trigger_pipeline(tenant_id="alex")
+    assert flow_run.id == "waiting-run-id"
+    assert client.created is None
+    assert client.filter.tags.all_ == ["tenant:alex"]